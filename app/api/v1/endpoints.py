@@ -1,28 +1,496 @@
 # company-registry-lt\app\api\v1\endpoints.py
-from fastapi import APIRouter, Depends, HTTPException, Path
+import json
+from datetime import date
+from typing import List, Optional
+import os
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse, FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
 
-from app.core.db import get_db
+from app.core.cache import company_cache
+from app.core.http_cache import not_modified, cacheable
+from app.core.config import settings
+from app.core.db import get_read_db, ReadSessionLocal
 from app.models.company import Company
-from app.schemas.company import CompanyResponse
+from app.models.generation import DataGeneration
+from app.core.vat import normalize_pvm, validate_lt_vat
+from app.schemas.company import (
+    CompanyResponse, CompanyBatchRequest, CompanyBatchResponse, PvmBatchRequest,
+    VatValidationResponse, CompanyPage, CompanyHistoryResponse,
+)
+from app.schemas.stats import StatsResponse
+from app.schemas.reconcile import ReconcileRequest, ReconcileResponse, ReconcileResult
+from app.schemas.change import ChangesPage
+from app.services.search import list_companies, company_conditions, fts_available
+from app.services.export import stream_export, snapshot_path
+from app.services.lookup import (
+    lookup_companies, lookup_company_bodies, iter_companies_by, iter_company_bodies,
+    normalize_codes, normalize_pvm_codes,
+)
+from app.services.code_index import code_index, company_json
+from app.services.history import company_history, companies_as_of
+from app.services.stats import GROUPINGS, CAPITAL_BRACKETS, query_stats
+from app.services.reconcile import reconcile_names
+from app.services.changes import ChangesUnavailable, changes_range, changes_select, change_dict
 
 router = APIRouter()
 
+COMPANY_NOT_FOUND = "Компания с таким кодом не найдена"
+COMPANY_NOT_FOUND_BODY = json.dumps(
+    {"detail": COMPANY_NOT_FOUND}, ensure_ascii=False, separators=(",", ":")
+).encode()
+
 @router.get("/company/{code}", response_model=CompanyResponse)
 async def get_company_by_code(
+    request: Request,
     code: str = Path(..., title="Код предприятия", min_length=1, max_length=20),
-    db: AsyncSession = Depends(get_db)
+    as_of: Optional[date] = Query(None, description="Данные на дату (из истории), YYYY-MM-DD"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Поиск компании по коду (JAR Kodas).
+    Сначала — индекс кодов в памяти (mmap, без БД); если он ответить не может,
+    запрос идёт в БД, а готовые ответы (и 404) кэшируются до смены поколения данных.
+    as_of — версия компании, действовавшая на эту дату (таблица истории).
+    Повторный запрос с If-None-Match в том же поколении — 304 без поиска.
     """
+    unchanged = not_modified(request)
+    if unchanged is not None:
+        return unchanged
+
+    if as_of is not None:
+        version = (await companies_as_of(db, [code], as_of)).get(code)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Компания с таким кодом на эту дату не найдена")
+        return cacheable(request, Response(content=company_json(version), media_type="application/json"))
+
+    answered, body = code_index.find(code)
+    if answered:
+        if body is None:
+            return Response(content=COMPANY_NOT_FOUND_BODY, status_code=404, media_type="application/json")
+        return cacheable(request, Response(content=body, media_type="application/json"))
+
+    cached = company_cache.get(code)
+    if cached is not None:
+        status, body = cached
+        return cacheable(request, Response(content=body, status_code=status, media_type="application/json"))
+
+    generation = company_cache.generation
+
     # Асинхронный запрос к БД
     query = select(Company).where(Company.code == code)
     result = await db.execute(query)
     company = result.scalar_one_or_none()
 
     if not company:
-        raise HTTPException(status_code=404, detail="Компания с таким кодом не найдена")
-    
-    return company
\ No newline at end of file
+        status = 404
+        body = COMPANY_NOT_FOUND_BODY
+    else:
+        status = 200
+        body = CompanyResponse.model_validate(company).model_dump_json().encode()
+
+    company_cache.put(code, status, body, generation)
+    return cacheable(request, Response(content=body, status_code=status, media_type="application/json"))
+
+
+@router.get("/company/by-pvm/{pvm_code}", response_model=CompanyResponse)
+async def get_company_by_pvm(
+    request: Request,
+    pvm_code: str = Path(..., title="Код НДС (PVM)", min_length=1, max_length=30),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Поиск компании по коду НДС в любом написании (LT100012345611, lt 1000 1234 5611, 100012345611).
+    """
+    unchanged = not_modified(request)
+    if unchanged is not None:
+        return unchanged
+
+    norm = normalize_pvm(pvm_code)
+    company = None
+    if norm:
+        # Нормализованный код посчитан при импорте — здесь только поиск по индексу
+        result = await db.execute(select(Company).where(Company.pvm_code_norm == norm).limit(1))
+        company = result.scalar_one_or_none()
+
+    if not company:
+        raise HTTPException(status_code=404, detail="Компания с таким кодом НДС не найдена")
+
+    return cacheable(request, Response(content=company_json(company), media_type="application/json"))
+
+
+@router.get("/company/{code}/history", response_model=CompanyHistoryResponse)
+async def get_company_history(
+    request: Request,
+    code: str = Path(..., title="Код предприятия", min_length=1, max_length=20),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Все версии данных компании с интервалами действия [valid_from, valid_to).
+    Новая версия появляется, когда импорт находит изменения (статус, НДС, капитал, название...).
+    """
+    unchanged = not_modified(request)
+    if unchanged is not None:
+        return unchanged
+
+    versions = await company_history(db, code)
+    if not versions:
+        raise HTTPException(status_code=404, detail="История компании не найдена")
+    body = CompanyHistoryResponse(code=code, versions=versions).model_dump_json()
+    return cacheable(request, Response(content=body, media_type="application/json"))
+
+
+@router.post("/companies/by-pvm", response_model=CompanyBatchResponse)
+async def get_companies_by_pvm(
+    request: PvmBatchRequest,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Пакетный поиск компаний по кодам НДС (например, со счетов).
+    Ненайденные коды возвращаются в missing_pvm в исходном написании.
+    """
+    pvm_codes = normalize_pvm_codes(request.pvm_codes)
+    if len(pvm_codes) > settings.batch_max_codes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Слишком много кодов в запросе (максимум {settings.batch_max_codes})"
+        )
+
+    found, _, missing_pvm = await lookup_companies(db, [], pvm_codes)
+    return CompanyBatchResponse(found=found, missing=[], missing_pvm=missing_pvm)
+
+
+@router.post("/reconcile", response_model=ReconcileResponse)
+async def reconcile(
+    request: ReconcileRequest,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Сверка названий без кодов (таблицы бухгалтерии): для каждого названия —
+    до limit компаний-кандидатов со степенью сходства (опечатки, кавычки,
+    правовая форма, диакритика не мешают). Адрес, если передан, уточняет оценку.
+    """
+    if len(request.items) > settings.reconcile_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Слишком много названий в запросе (максимум {settings.reconcile_max_items})"
+        )
+
+    try:
+        candidates = await reconcile_names(
+            db, [(item.name, item.address) for item in request.items],
+            limit=request.limit, min_score=request.min_score,
+        )
+    except OperationalError:
+        # База до первого импорта с триграммным индексом
+        raise HTTPException(status_code=503, detail="Индекс сверки названий ещё не построен")
+    return ReconcileResponse(results=[
+        ReconcileResult(id=item.id, name=item.name, candidates=found)
+        for item, found in zip(request.items, candidates)
+    ])
+
+
+@router.get("/pvm/validate/{pvm_code}", response_model=VatValidationResponse)
+async def validate_pvm_code(
+    pvm_code: str = Path(..., title="Код НДС (PVM)", min_length=1, max_length=30),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Проверка кода НДС Литвы: формат и контрольная цифра, затем наличие в реестре плательщиков.
+    """
+    norm, error = validate_lt_vat(pvm_code)
+    if error:
+        return VatValidationResponse(pvm_code=pvm_code, normalized=norm, valid=False, error=error)
+
+    result = await db.execute(
+        select(Company.code).where(Company.pvm_code_norm == norm).limit(1)
+    )
+    company_code = result.scalar_one_or_none()
+    return VatValidationResponse(
+        pvm_code=pvm_code, normalized=norm, valid=True,
+        registered=company_code is not None, company_code=company_code,
+    )
+
+
+@router.get("/companies", response_model=CompanyPage)
+async def get_companies(
+    request: Request,
+    q: Optional[str] = Query(None, max_length=200, description="Текст в названии или адресе"),
+    status_code: Optional[int] = None,
+    legal_form_code: Optional[int] = None,
+    registered_from: Optional[date] = None,
+    registered_to: Optional[date] = None,
+    capital_min: Optional[float] = None,
+    capital_max: Optional[float] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
+    limit: int = Query(50, ge=1),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Список компаний с фильтрами, упорядоченный по коду.
+    Пагинация курсором (keyset), а не OFFSET: любая страница стоит как первая.
+    """
+    unchanged = not_modified(request)
+    if unchanged is not None:
+        return unchanged
+
+    filters = {
+        "q": q.strip() if q else None,
+        "status_code": status_code,
+        "legal_form_code": legal_form_code,
+        "registered_from": registered_from,
+        "registered_to": registered_to,
+        "capital_min": capital_min,
+        "capital_max": capital_max,
+    }
+    companies, next_cursor, total, total_exact = await list_companies(
+        db, filters, cursor=cursor,
+        limit=min(limit, settings.list_max_limit), count_cap=settings.list_count_cap,
+    )
+    body = CompanyPage(
+        items=companies, next_cursor=next_cursor, total=total, total_exact=total_exact
+    ).model_dump_json()
+    return cacheable(request, Response(content=body, media_type="application/json"))
+
+
+@router.get("/stats", response_model=StatsResponse)
+async def get_stats(
+    request: Request,
+    group_by: List[str] = Query(["legal_form"], description="legal_form, status, registration_year, capital_bracket"),
+    legal_form_code: Optional[int] = None,
+    status_code: Optional[int] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    capital_bracket: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Число компаний по группам (правовая форма, статус, год регистрации, диапазон капитала).
+    Считается по сводке company_stats, которую готовит импортер, — без сканирования companies.
+    """
+    # group_by=legal_form,status и group_by=legal_form&group_by=status — одно и то же
+    groups = [g.strip() for value in group_by for g in value.split(",") if g.strip()]
+    unknown = [g for g in groups if g not in GROUPINGS]
+    if unknown or not groups:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by: допустимо {', '.join(GROUPINGS)}" + (f" (неизвестно: {', '.join(unknown)})" if unknown else ""),
+        )
+    groups = list(dict.fromkeys(groups))
+    if capital_bracket is not None and capital_bracket not in [label for _, _, label in CAPITAL_BRACKETS]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"capital_bracket: допустимо {', '.join(label for _, _, label in CAPITAL_BRACKETS)}",
+        )
+
+    unchanged = not_modified(request)
+    if unchanged is not None:
+        return unchanged
+
+    filters = {
+        "legal_form_code": legal_form_code,
+        "status_code": status_code,
+        "year_from": year_from,
+        "year_to": year_to,
+        "capital_bracket": capital_bracket,
+    }
+    try:
+        total, rows = await query_stats(db, groups, filters)
+    except OperationalError:
+        # База до введения сводки: таблица появится с первым импортом
+        raise HTTPException(status_code=503, detail="Статистика ещё не рассчитана")
+    body = StatsResponse(group_by=groups, total=total, groups=rows).model_dump_json(exclude_unset=True)
+    return cacheable(request, Response(content=body, media_type="application/json"))
+
+
+@router.get("/changes", response_model=ChangesPage)
+async def get_changes(
+    request: Request,
+    since: int = Query(..., ge=0, description="Поколение, по которое клиент уже синхронизирован (0 — с нуля)"),
+    cursor: Optional[int] = Query(None, description="next_cursor из предыдущей страницы"),
+    limit: int = Query(1000, ge=1),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Лента изменений для синхронизации зеркал: какие компании добавлены, изменены
+    (и какие поля) или удалены в поколениях после since. Объём зависит от числа
+    изменений, а не от размера реестра.
+    format=ndjson — вся лента потоком, по строке на изменение; until — в заголовке X-Changes-Until.
+    410 — лента за этот период не сохранилась, нужна полная выгрузка (/api/v1/export).
+    """
+    unchanged = not_modified(request)
+    if unchanged is not None:
+        return unchanged
+
+    try:
+        first_id, until = await changes_range(db, since)
+    except ChangesUnavailable as e:
+        raise HTTPException(status_code=410, detail=f"Нужна полная синхронизация: {e}")
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _changes_ndjson(first_id, until, cursor),
+            media_type="application/x-ndjson",
+            headers={"X-Changes-Until": str(until)},
+        )
+
+    items, next_cursor = [], None
+    if first_id is not None:
+        limit = min(limit, settings.changes_max_limit)
+        result = await db.execute(changes_select(first_id, until, cursor).limit(limit + 1))
+        items = [change_dict(c) for c in result.scalars()]
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = items[-1]["id"]
+    body = ChangesPage(since=since, until=until, items=items, next_cursor=next_cursor).model_dump_json()
+    return cacheable(request, Response(content=body, media_type="application/json"))
+
+
+async def _changes_ndjson(first_id, until, cursor=None):
+    if first_id is None:
+        return
+    # Своя сессия: ответ отдаётся уже после выхода из обработчика (и из get_read_db)
+    async with ReadSessionLocal() as db:
+        result = await db.stream(
+            changes_select(first_id, until, cursor).execution_options(yield_per=5000)
+        )
+        async for changes in result.scalars().partitions():
+            yield "".join(
+                json.dumps(change_dict(c), ensure_ascii=False) + "\n" for c in changes
+            ).encode()
+
+
+@router.get("/export")
+async def export_companies(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    q: Optional[str] = Query(None, max_length=200),
+    status_code: Optional[int] = None,
+    legal_form_code: Optional[int] = None,
+    registered_from: Optional[date] = None,
+    registered_to: Optional[date] = None,
+    capital_min: Optional[float] = None,
+    capital_max: Optional[float] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Выгрузка реестра (или его части по тем же фильтрам, что и /companies)
+    в CSV или NDJSON, сжатая gzip. Отдаётся потоком, по мере чтения из БД.
+    Для полного зеркала выгоднее /export/snapshot.parquet.
+    """
+    q = q.strip() if q else None
+    # Ошибку после начала потока клиент увидел бы как обрезанный ответ 200 —
+    # наличие FTS-индекса проверяем до него (без индекса — LIKE, как в /companies)
+    use_fts = await fts_available(db) if q else True
+    conditions = company_conditions(
+        q=q, status_code=status_code, legal_form_code=legal_form_code,
+        registered_from=registered_from, registered_to=registered_to,
+        capital_min=capital_min, capital_max=capital_max, use_fts=use_fts,
+    )
+    filename = f"companies.{format}.gz"
+    return StreamingResponse(
+        stream_export(conditions, format),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/export/snapshot.parquet")
+async def export_snapshot(request: Request, db: AsyncSession = Depends(get_read_db)):
+    """
+    Parquet-снимок активного поколения (создаётся импортером).
+    ETag меняется только с поколением: повторная загрузка с If-None-Match — 304,
+    прерванная докачивается запросом Range.
+    """
+    result = await db.execute(
+        select(DataGeneration.id).where(DataGeneration.status == "active")
+    )
+    generation_id = result.scalar_one_or_none()
+    path = snapshot_path(generation_id) if generation_id is not None else None
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Снимок ещё не создан")
+
+    etag = f'"gen-{generation_id}-{os.path.getsize(path)}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename=f"companies_{generation_id}.parquet",
+        headers={"ETag": etag},
+    )
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Счётчики кэша ответов по коду (попадания, промахи, вытеснения) — для подбора размера.
+    """
+    return company_cache.stats()
+
+
+@router.post("/companies/batch", response_model=CompanyBatchResponse)
+async def get_companies_batch(
+    request: CompanyBatchRequest,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    as_of: Optional[date] = Query(None, description="Данные на дату (из истории, только коды предприятий)"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Пакетный поиск компаний по кодам предприятий и/или кодам НДС (PVM).
+    format=ndjson — потоковый ответ, по строке JSON на каждый запрошенный код:
+    {"code": "...", "found": true, "company": {...}} или {"pvm_code": "...", "found": false}.
+    as_of — версии компаний на дату (поиск по кодам НДС в истории не поддерживается).
+    """
+    codes = normalize_codes(request.codes)
+    pvm_codes = normalize_pvm_codes(request.pvm_codes)
+    if len(codes) + len(pvm_codes) > settings.batch_max_codes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Слишком много кодов в запросе (максимум {settings.batch_max_codes})"
+        )
+    if as_of is not None and pvm_codes:
+        raise HTTPException(status_code=400, detail="as_of поддерживается только для кодов предприятий")
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _batch_ndjson(codes, pvm_codes, as_of), media_type="application/x-ndjson"
+        )
+
+    # Тело собирается из готовых JSON компаний (из индекса кодов) без повторной сериализации
+    found, missing, missing_pvm = await lookup_company_bodies(db, codes, pvm_codes, as_of)
+    body = b"".join((
+        b'{"found":[', b",".join(found), b'],"missing":',
+        json.dumps(missing, ensure_ascii=False).encode(), b',"missing_pvm":',
+        json.dumps(missing_pvm, ensure_ascii=False).encode(), b"}",
+    ))
+    return Response(content=body, media_type="application/json")
+
+
+async def _batch_ndjson(codes, pvm_codes, as_of=None):
+    # Своя сессия: ответ отдаётся уже после выхода из обработчика (и из get_read_db)
+    async with ReadSessionLocal() as db:
+        async for part, bodies in iter_company_bodies(db, codes, as_of):
+            lines = []
+            for code in part:
+                prefix = json.dumps({"code": code}, ensure_ascii=False)[:-1].encode()
+                body = bodies.get(code)
+                if body is None:
+                    lines.append(prefix + b', "found": false}')
+                else:
+                    lines.append(prefix + b', "found": true, "company": ' + body + b"}")
+            yield b"\n".join(lines) + b"\n"
+
+        async for part, companies in iter_companies_by(db, Company.pvm_code_norm, list(pvm_codes)):
+            by_key = {c.pvm_code_norm: c for c in companies}
+            lines = []
+            for value in part:
+                company = by_key.get(value)
+                line = {"pvm_code": pvm_codes[value], "found": company is not None}
+                if company is not None:
+                    line["company"] = CompanyResponse.model_validate(company).model_dump(mode="json")
+                lines.append(json.dumps(line, ensure_ascii=False))
+            yield "\n".join(lines) + "\n"
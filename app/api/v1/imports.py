@@ -0,0 +1,95 @@
+# company-registry-lt\app\api\v1\imports.py
+import asyncio
+from fastapi import APIRouter, HTTPException, Path, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import List
+
+from app.schemas.job import ImportJobResponse
+from app.services.import_jobs import FINAL_STATUSES, get_job, list_jobs, request_cancel
+
+router = APIRouter()
+
+# Как часто SSE-поток перечитывает задание (сек)
+EVENTS_POLL_SEC = 1.0
+
+
+async def _load_job(job_id: int):
+    job = await run_in_threadpool(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задание импорта не найдено")
+    return job
+
+
+@router.get("/import/jobs", response_model=List[ImportJobResponse])
+async def list_import_jobs(
+    limit: int = Query(20, ge=1, le=200)
+):
+    """
+    Последние задания импорта (новые сверху).
+    """
+    return await run_in_threadpool(list_jobs, limit)
+
+
+@router.get("/import/jobs/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: int = Path(..., title="Номер задания")
+):
+    """
+    Состояние задания: стадия, обработано строк, скорость, ошибка, итоговое поколение.
+    """
+    return await _load_job(job_id)
+
+
+@router.get("/import/jobs/{job_id}/events")
+async def stream_import_job(
+    request: Request,
+    job_id: int = Path(..., title="Номер задания")
+):
+    """
+    Прогресс задания как Server-Sent Events: событие при каждом изменении,
+    поток закрывается, когда задание завершено.
+    """
+    await _load_job(job_id)
+    return StreamingResponse(
+        _job_events(request, job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _job_events(request, job_id):
+    last = None
+    idle_polls = 0
+    while not await request.is_disconnected():
+        job = await _load_job(job_id)
+        data = ImportJobResponse.model_validate(job).model_dump_json()
+        if data != last:
+            yield f"event: progress\ndata: {data}\n\n"
+            last = data
+            idle_polls = 0
+        else:
+            idle_polls += 1
+            if idle_polls % 15 == 0:
+                # Комментарий SSE: не даёт прокси закрыть «молчащее» соединение
+                yield ": keep-alive\n\n"
+        if job.status in FINAL_STATUSES:
+            yield f"event: done\ndata: {data}\n\n"
+            return
+        await asyncio.sleep(EVENTS_POLL_SEC)
+
+
+@router.post("/import/jobs/{job_id}/cancel", response_model=ImportJobResponse)
+async def cancel_import_job(
+    job_id: int = Path(..., title="Номер задания")
+):
+    """
+    Запрашивает отмену. Воркер останавливается на ближайшей проверке (между кусками);
+    если поколение уже публикуется, импорт доводится до конца.
+    """
+    status = await run_in_threadpool(request_cancel, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Задание импорта не найдено")
+    if status in FINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Задание уже завершено ({status})")
+    return await _load_job(job_id)
@@ -0,0 +1,92 @@
+# company-registry-lt/app/core/cache.py
+"""
+Кэш готовых ответов API в памяти процесса (LRU + TTL).
+
+Хранятся уже сериализованные ответы (статус + JSON-байты), в том числе 404.
+Кэш привязан к поколению данных: при смене активного поколения он очищается,
+а ответ, прочитанный из старого поколения, не попадает в кэш после очистки
+(put сверяет поколение, с которым начинался запрос).
+"""
+import time
+import threading
+from collections import OrderedDict
+
+from app.core.config import settings
+
+
+class ResponseCache:
+    def __init__(self, maxsize, ttl, negative_ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # key -> (истекает, статус, тело)
+        self._data = OrderedDict()
+        # Вызывается и из потока импортера (смена поколения)
+        self._lock = threading.Lock()
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """(статус, тело) или None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, status, body = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return status, body
+
+    def put(self, key, status, body, generation):
+        """Сохраняет ответ, если за время запроса поколение не сменилось."""
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if status < 400 else self.negative_ttl
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + ttl, status, body)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def set_generation(self, generation):
+        """Новое активное поколение: все сохранённые ответы устарели."""
+        with self._lock:
+            self.generation = generation
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "generation": self.generation,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Ответы GET /api/v1/company/{code}
+company_cache = ResponseCache(
+    maxsize=settings.company_cache_size,
+    ttl=settings.company_cache_ttl,
+    negative_ttl=settings.company_cache_negative_ttl,
+)
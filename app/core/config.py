@@ -0,0 +1,105 @@
+# company-registry-lt/app/core/config.py
+from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """
+    Технические настройки сервиса.
+    Переопределяются переменными окружения с префиксом REGISTRY_
+    (например, REGISTRY_GENERATION_RETENTION=3).
+    Ссылки на источники данных хранятся в БД (таблица settings), а не здесь.
+    """
+    model_config = SettingsConfigDict(env_prefix="REGISTRY_")
+
+    # --- База данных (SQLite) ---
+    # Путь к файлу БД (по умолчанию data/registry.db в корне проекта)
+    db_path: Optional[str] = None
+    # WAL: читатели не блокируют импортер и наоборот (delete — классический журнал)
+    sqlite_journal_mode: str = "wal"
+    # Отображение файла БД в память (МБ, 0 — выключено)
+    sqlite_mmap_mb: int = 256
+    # Кэш страниц на одно соединение API (МБ)
+    sqlite_cache_mb: int = 16
+    # Сколько ждать освобождения блокировки вместо ошибки "database is locked" (мс)
+    sqlite_busy_timeout_ms: int = 10000
+    # Соединений в пуле только для чтения (запросы API)
+    sqlite_read_pool_size: int = 8
+
+    # --- Поколения данных (импорт) ---
+    # Сколько предыдущих поколений хранить для отката
+    generation_retention: int = 2
+    # Новое поколение не включается, если в нём меньше строк, чем эта доля от активного
+    generation_min_row_ratio: float = 0.5
+
+    # --- Импорт: скачивание источников ---
+    # Каталог скачанных файлов JAR.csv, PVM.csv, CAPITAL.csv (по умолчанию data/temp)
+    import_dir: Optional[str] = None
+    # Размер блока при потоковом скачивании (КБ)
+    download_chunk_kb: int = 1024
+    # Таймаут соединения/чтения (сек)
+    download_timeout: int = 120
+
+    # --- Импорт: потоковая обработка ---
+    # Сколько строк JAR читается, обогащается и записывается за один шаг
+    import_chunk_rows: int = 20000
+    # Жёсткий потолок памяти импортера (RSS, МБ). При превышении импорт прерывается,
+    # активное поколение не затрагивается. 0 — без ограничения
+    import_memory_limit_mb: int = 1024
+    # Процессов для параллельного разбора НДС и капитала (0 — в основном процессе)
+    import_parse_workers: int = 2
+    # Сколько готовых кусков JAR держать впереди записи в БД (память ~ chunk_rows * (prefetch + 2))
+    import_prefetch_chunks: int = 2
+    # Кэш страниц SQLite для соединения импортера (МБ)
+    import_sqlite_cache_mb: int = 64
+
+    # --- Импорт: задания (отдельный процесс-воркер) ---
+    # Как часто воркер пишет прогресс и проверяет отмену (сек)
+    import_job_heartbeat_sec: float = 2.0
+    # Задание без heartbeat дольше этого срока считается упавшим, блокировка снимается (сек).
+    # Воркер пишет heartbeat из отдельного потока, независимо от стадии импорта
+    import_job_stale_sec: int = 300
+
+    # --- Несколько воркеров uvicorn ---
+    # Аренда роли планировщика (сек): ведущий продлевает её каждые lease/3 секунд,
+    # после падения ведущего роль переходит другому не позже этого срока
+    scheduler_lease_sec: int = 30
+    # Как часто каждый воркер проверяет активное поколение и сбрасывает кэши (сек)
+    generation_poll_sec: float = 2.0
+
+    # --- Импорт: инкрементальный режим ---
+    # По умолчанию применять только изменившиеся строки (сравнение хэшей)
+    import_incremental: bool = True
+    # Если изменилась бо́льшая доля строк, выполняется полная сборка нового поколения
+    incremental_max_change_ratio: float = 0.2
+
+    # --- API ---
+    # Максимум кодов (включая коды НДС) в одном пакетном запросе
+    batch_max_codes: int = 5000
+    # Список /api/v1/companies: максимальный размер страницы
+    list_max_limit: int = 200
+    # Подсчёт total для списка с фильтрами останавливается на этом числе (total_exact=false)
+    list_count_cap: int = 10000
+    # Лента изменений /api/v1/changes: максимальный размер страницы (NDJSON — без ограничения)
+    changes_max_limit: int = 5000
+    # Кэш ответов по коду компании: записей (0 — выключен) и срок жизни (сек)
+    company_cache_size: int = 50000
+    company_cache_ttl: int = 3600
+    # Срок жизни ответов 404 — страховка: смену поколения воркеры замечают опросом
+    # (generation_poll_sec) и очищают кэш, но новая компания в любом случае станет
+    # видна не позже этого срока
+    company_cache_negative_ttl: int = 300
+    # HTTP-кэш (Cache-Control: max-age) ответов по коду, поиска и страниц (сек).
+    # 0 — no-cache: клиент и прокси всегда переспрашивают (If-None-Match -> дешёвый 304)
+    http_cache_max_age: int = 600
+    # Сверка названий (POST /api/v1/reconcile): максимум названий в запросе;
+    # блокировка — сколько самых редких триграмм названия ищется в индексе
+    # и сколько строк они могут дать в сумме (цена запроса на одно название);
+    # сколько кандидатов на название оценивается
+    reconcile_max_items: int = 5000
+    reconcile_block_terms: int = 8
+    reconcile_block_docs: int = 3000
+    reconcile_candidates: int = 30
+
+
+settings = Settings()
@@ -1,14 +1,17 @@
 #company-registry-lt\app\core\db.py
 import os
-from sqlalchemy import create_engine
+import zlib
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
+from app.core.config import settings
+
 # 1. Определяем путь к файлу базы данных
 # Мы вычисляем абсолютный путь, чтобы файл создавался точно в папке data, 
-# откуда бы мы ни запускали скрипт.
+# откуда бы мы ни запускали скрипт. Можно переопределить: REGISTRY_DB_PATH.
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-DB_PATH = os.path.join(BASE_DIR, "data", "registry.db")
+DB_PATH = settings.db_path or os.path.join(BASE_DIR, "data", "registry.db")
 
 # Строки подключения (Connection Strings)
 # Для API (асинхронно): используем драйвер aiosqlite
@@ -16,38 +19,214 @@ DATABASE_URL_ASYNC = f"sqlite+aiosqlite:///{DB_PATH}"
 # Для Импортера (синхронно): стандартный драйвер sqlite
 DATABASE_URL_SYNC = f"sqlite:///{DB_PATH}"
 
-# --- 2. ASYNC НАСТРОЙКИ (Для FastAPI) ---
+# --- 2. НАСТРОЙКА СОЕДИНЕНИЙ SQLITE ---
+# PRAGMA применяются к каждому новому соединению (событие connect).
+# Профили: api — чтение/запись из API, read — только чтение (пул для запросов API),
+# importer — долгие записи импортера (кэш побольше).
+def sqlite_pragmas(profile):
+    pragmas = {
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "mmap_size": settings.sqlite_mmap_mb * 1024 * 1024,
+        # Отрицательное значение — размер в КиБ, а не в страницах
+        "cache_size": -settings.sqlite_cache_mb * 1024,
+        "temp_store": "MEMORY",
+    }
+    if profile != "read":
+        # Режим журнала хранится в самом файле БД; переключают его пишущие соединения
+        pragmas["journal_mode"] = settings.sqlite_journal_mode
+    if settings.sqlite_journal_mode.lower() == "wal":
+        # В WAL NORMAL не нарушает целостность, при сбое питания теряются лишь последние транзакции
+        pragmas["synchronous"] = "NORMAL"
+    if profile == "read":
+        # Защита от случайной записи через пул чтения
+        pragmas["query_only"] = "ON"
+    if profile == "importer":
+        pragmas["cache_size"] = -settings.import_sqlite_cache_mb * 1024
+    return pragmas
+
+
+def _apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        try:
+            cursor.execute(f"PRAGMA {name} = {value}")
+        except Exception as e:
+            # Например, переход в WAL невозможен, пока БД держит другое соединение
+            print(f"⚠️ [DB] PRAGMA {name} = {value} не применена: {e}")
+    cursor.close()
+
+
+def configure_sqlite(engine, profile):
+    """Подписывает движок на установку PRAGMA профиля при каждом новом соединении."""
+    pragmas = sqlite_pragmas(profile)
+    target = engine.sync_engine if hasattr(engine, "sync_engine") else engine
+
+    @event.listens_for(target, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, pragmas)
+
+
+def checkpoint_wal(engine):
+    """Переносит WAL в основной файл и обрезает его (после большого импорта)."""
+    if settings.sqlite_journal_mode.lower() != "wal":
+        return
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+# --- 3. ASYNC НАСТРОЙКИ (Для FastAPI) ---
 async_engine = create_async_engine(
     DATABASE_URL_ASYNC,
     echo=False,  # Если True, в консоль будут выводиться все SQL-запросы (удобно для отладки)
     connect_args={"check_same_thread": False}  # Только для SQLite
 )
+configure_sqlite(async_engine, "api")
+
+# Отдельный пул только для чтения: поиск и выдача данных.
+# В WAL читатели не ждут друг друга и импортер, поэтому пул можно держать широким
+async_read_engine = create_async_engine(
+    DATABASE_URL_ASYNC,
+    echo=False,
+    pool_size=settings.sqlite_read_pool_size,
+    max_overflow=settings.sqlite_read_pool_size,
+    connect_args={"check_same_thread": False}
+)
+configure_sqlite(async_read_engine, "read")
 
-# Фабрика сессий для API
+# Фабрика сессий для API (запись: настройки, служебные операции)
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
 
-# --- 3. SYNC НАСТРОЙКИ (Для Pandas/Импортера) ---
+# Фабрика сессий только для чтения
+ReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+# Драйвер sqlite3 сам открывает транзакцию только перед INSERT/UPDATE/DELETE,
+# поэтому DDL (RENAME при переключении поколений, create_all) выполнялся бы вне
+# транзакции. Отключаем его логику и открываем транзакцию явно.
+def explicit_transactions(engine):
+    """
+    Транзакции движка открываются явным BEGIN. Соединение с
+    execution_options(sqlite_begin="IMMEDIATE") берёт блокировку записи сразу при BEGIN.
+    """
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        mode = conn.get_execution_options().get("sqlite_begin")
+        conn.exec_driver_sql(f"BEGIN {mode}" if mode else "BEGIN")
+
+
+# --- 4. SYNC НАСТРОЙКИ (Для Pandas/Импортера) ---
 sync_engine = create_engine(
     DATABASE_URL_SYNC,
     echo=False,
     connect_args={"check_same_thread": False}
 )
+configure_sqlite(sync_engine, "importer")
+
+explicit_transactions(sync_engine)
+
 # Фабрика сессий для синхронного кода (если понадобится)
 SyncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
 
-# --- 4. БАЗОВАЯ МОДЕЛЬ (Declarative Base) ---
+# --- 4a. БАЗА ЗАДАНИЙ ИМПОРТА ---
+# Отдельный файл рядом с основной БД: импортер держит запись в registry.db
+# всю сборку поколения, а прогресс и отмену заданий нужно писать в это время.
+JOBS_DB_PATH = os.path.join(os.path.dirname(DB_PATH), "jobs.db")
+jobs_engine = create_engine(
+    f"sqlite:///{JOBS_DB_PATH}",
+    echo=False,
+    connect_args={"check_same_thread": False}
+)
+configure_sqlite(jobs_engine, "api")
+explicit_transactions(jobs_engine)
+JobsSessionLocal = sessionmaker(autoflush=False, expire_on_commit=False, bind=jobs_engine)
+
+# --- 5. БАЗОВАЯ МОДЕЛЬ (Declarative Base) ---
 # От этого класса мы будем наследовать все наши модели (таблицы)
 class Base(DeclarativeBase):
     pass
 
-# --- 5. ЗАВИСИМОСТЬ (Dependency) ---
+# Модели базы заданий (jobs.db)
+class JobsBase(DeclarativeBase):
+    pass
+
+# create_all не меняет уже существующие таблицы, поэтому новые nullable-колонки
+# моделей добавляем сами (ALTER TABLE ADD COLUMN). Вызывается при старте.
+def add_missing_columns(connection):
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.exec_driver_sql(
+                f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+            )
+
+# --- 5a. ВЕРСИЯ СХЕМЫ ---
+# create_all и сверка колонок на каждом старте каждого воркера — десятки запросов
+# к sqlite_master. Вместо этого в PRAGMA user_version хранится отпечаток схемы
+# моделей: совпал — старт без DDL, нет (новая БД, изменились модели) — обновляем.
+def schema_version(metadata, extra=()):
+    """Отпечаток схемы: таблицы, колонки, типы, индексы (+ extra) -> 31-битное число."""
+    parts = list(extra)
+    for table in metadata.sorted_tables:
+        parts.append(table.name)
+        parts.extend(f"{c.name}:{c.type}:{c.nullable}:{c.primary_key}" for c in table.columns)
+        parts.extend(sorted(ix.name for ix in table.indexes))
+    return zlib.crc32("\n".join(parts).encode("utf-8")) & 0x7FFFFFFF
+
+
+def ensure_schema(engine, metadata, migrate=None, extra=()):
+    """
+    Создаёт недостающие таблицы, только если отпечаток схемы в БД устарел.
+    migrate(connection) — дополнительные шаги в той же транзакции (новые колонки,
+    записи по умолчанию); extra — что ещё входит в отпечаток (например, их ключи).
+    Возвращает True, если схема обновлялась.
+    """
+    version = schema_version(metadata, extra)
+    with engine.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA user_version").scalar() == version:
+            return False
+    # Перепроверка и DDL — под блокировкой записи: иначе воркеры, стартовавшие
+    # одновременно, увидят старую версию и начнут обновлять схему параллельно
+    with engine.connect() as conn:
+        conn.execution_options(sqlite_begin="IMMEDIATE")
+        with conn.begin():
+            # Другой воркер мог обновить схему, пока мы ждали блокировку
+            if conn.exec_driver_sql("PRAGMA user_version").scalar() == version:
+                return False
+            metadata.create_all(conn)
+            if migrate is not None:
+                migrate(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+    return True
+
+# --- 6. ЗАВИСИМОСТЬ (Dependency) ---
 # Эту функцию мы будем использовать в FastAPI endpoints: Depends(get_db)
 async def get_db():
     async with AsyncSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+# Для ручек, которые только читают данные: Depends(get_read_db)
+async def get_read_db():
+    async with ReadSessionLocal() as session:
         try:
             yield session
         finally:
@@ -0,0 +1,53 @@
+# company-registry-lt/app/core/dictionaries.py
+"""
+Справочники правовых форм и статусов в памяти процесса API.
+
+Таблица companies хранит только коды (form_kodas, stat_kodas), названия —
+в таблицах legal_forms и statuses. Это десятки строк, поэтому API держит их
+картой {код: название} и подставляет названия в ответ без JOIN: модели
+Company и CompanyHistory отдают legal_form_name / status_name через
+CodeNamesMixin. Карта перечитывается при смене поколения (импортер дополняет
+справочники до публикации) и заменяется целиком — читатели не видят её
+наполовину обновлённой.
+"""
+from sqlalchemy import text
+
+
+class CodeNames:
+    def __init__(self):
+        # (правовые формы, статусы)
+        self._maps = ({}, {})
+
+    def load(self, engine):
+        """Перечитывает справочники из БД. Таблиц ещё нет — карты пустые."""
+        maps = []
+        with engine.connect() as conn:
+            for table in ("legal_forms", "statuses"):
+                try:
+                    maps.append(dict(conn.execute(text(f"SELECT code, name FROM {table}")).all()))
+                except Exception as e:
+                    print(f"⚠️ [DB] Справочник {table} не прочитан: {e}")
+                    maps.append({})
+        self._maps = tuple(maps)
+        return {"legal_forms": len(maps[0]), "statuses": len(maps[1])}
+
+    def legal_form(self, code):
+        return self._maps[0].get(code)
+
+    def status(self, code):
+        return self._maps[1].get(code)
+
+
+code_names = CodeNames()
+
+
+class CodeNamesMixin:
+    """Названия правовой формы и статуса по кодам строки (из справочников в памяти)."""
+
+    @property
+    def legal_form_name(self):
+        return code_names.legal_form(self.legal_form_code)
+
+    @property
+    def status_name(self):
+        return code_names.status(self.status_code)
@@ -0,0 +1,120 @@
+# company-registry-lt/app/core/http_cache.py
+"""
+HTTP-кэширование ответов (ETag, Last-Modified, 304) по поколению данных.
+
+ETag ответа — "gen-<поколение>-<хэш тела>", Last-Modified — время публикации
+поколения. Данные внутри поколения не меняются, поэтому проверка условного
+запроса идёт в два шага:
+    1. not_modified() — до обращения к БД: ETag клиента выдан в текущем поколении
+       (или If-Modified-Since не раньше его публикации) — сразу 304;
+    2. cacheable() — по готовому телу: поколение сменилось, а содержимое нет
+       (хэш совпал) — тоже 304, тело не передаётся.
+Cache-Control: public, max-age=REGISTRY_HTTP_CACHE_MAX_AGE — ответы можно держать
+в обратном прокси и у клиентов (1С), повторная проверка — дешёвый 304.
+"""
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+
+class GenerationValidators:
+    """Поколение и время его публикации — основа ETag и Last-Modified."""
+
+    def __init__(self):
+        # (поколение, Last-Modified в формате HTTP, время публикации UTC) — заменяется целиком
+        self._state = (None, None, None)
+
+    def set_generation(self, generation, published_at=None):
+        """Слушатель смены поколения; published_at — naive локальное время из data_generations."""
+        modified = None
+        if generation is not None and published_at is not None:
+            modified = published_at.astimezone(timezone.utc).replace(microsecond=0)
+        self._state = (
+            generation,
+            format_datetime(modified, usegmt=True) if modified else None,
+            modified,
+        )
+
+    def current(self):
+        return self._state
+
+
+validators = GenerationValidators()
+
+
+def _etag_prefix(generation, variant):
+    return f'"gen-{generation}-{variant}-' if variant else f'"gen-{generation}-'
+
+
+def _client_etags(request):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    # Слабое сравнение (RFC 9110): W/ не учитывается
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+def _headers(etag, last_modified, private=False, vary=None):
+    headers = {}
+    if etag:
+        headers["ETag"] = etag
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    max_age = settings.http_cache_max_age
+    scope = "private" if private else "public"
+    headers["Cache-Control"] = f"{scope}, max-age={max_age}" if max_age > 0 else f"{scope}, no-cache"
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def not_modified(request: Request, variant="", vary=None):
+    """
+    Ответ 304 без обращения к БД, если копия клиента выдана в текущем поколении.
+    variant — от чего ещё, кроме URL, зависит ответ (например, язык страницы).
+    None — проверить не удалось, запрос обрабатывается как обычно.
+    """
+    generation, last_modified, modified = validators.current()
+    if generation is None:
+        return None
+    tags = _client_etags(request)
+    if tags is not None:
+        # If-None-Match важнее If-Modified-Since
+        prefix = _etag_prefix(generation, variant)
+        for tag in tags:
+            if tag.startswith(prefix):
+                return Response(status_code=304, headers=_headers(tag, last_modified, vary=vary))
+        return None
+    since = request.headers.get("if-modified-since")
+    # По дате нельзя отличить вариант ответа (язык) — только по ETag
+    if since and modified is not None and not variant:
+        try:
+            if modified <= parsedate_to_datetime(since):
+                return Response(status_code=304, headers=_headers(None, last_modified, vary=vary))
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+def cacheable(request: Request, response: Response, variant="", private=False, vary=None):
+    """
+    Ставит ETag/Last-Modified/Cache-Control на ответ 200 с готовым телом (response.body).
+    Если копия клиента совпадает по содержимому (поколение другое) — возвращает 304.
+    private — ответ не для общих кэшей (например, ставит cookie).
+    """
+    generation, last_modified, _ = validators.current()
+    if generation is None or response.status_code != 200:
+        return response
+    digest = hashlib.blake2b(response.body, digest_size=8).hexdigest()
+    etag = f'{_etag_prefix(generation, variant)}{digest}"'
+    headers = _headers(etag, last_modified, private, vary)
+
+    tags = _client_etags(request)
+    if tags and any(tag == "*" or tag.endswith(f'-{digest}"') for tag in tags):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
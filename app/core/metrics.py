@@ -0,0 +1,229 @@
+# company-registry-lt/app/core/metrics.py
+"""
+Метрики в текстовом формате Prometheus (GET /metrics).
+
+Счётчики и гистограммы обновляются на горячем пути: наблюдение — поиск корзины
+(bisect) и два сложения под локом, без аллокаций на запрос. Всё, что дорого
+посчитать (поколение, импорт), собирают коллекторы в момент запроса /metrics.
+"""
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+# Корзины по умолчанию (сек): от попадания в кэш до тяжёлой выгрузки
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, value=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [счётчики по корзинам (последняя — +Inf), сумма]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _labels(self.labelnames, labels, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def family(name, kind, help, samples):
+    """
+    Метрика, вычисленная коллектором: samples — список (dict меток, значение).
+    Значения None пропускаются.
+    """
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        if value is None:
+            continue
+        lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+    return lines
+
+
+# --- Реестр ---
+_metrics = []
+# Функции без аргументов, возвращающие строки метрик (вызываются при каждом /metrics)
+_collectors = []
+
+
+def register(metric):
+    _metrics.append(metric)
+    return metric
+
+
+def add_collector(collector):
+    _collectors.append(collector)
+
+
+def render_metrics():
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            lines.extend(collector())
+        except Exception as e:
+            # Сломанный коллектор не должен отключать остальные метрики
+            print(f"⚠️ [METRICS] Коллектор {getattr(collector, '__name__', collector)} упал: {e}")
+    return "\n".join(lines) + "\n"
+
+
+# --- HTTP и БД ---
+HTTP_DURATION = register(Histogram(
+    "registry_http_request_duration_seconds",
+    "Длительность HTTP-запросов по маршруту.",
+    ("method", "route", "status"),
+))
+DB_QUERIES = register(Histogram(
+    "registry_db_queries_per_request",
+    "Число SQL-запросов на один HTTP-запрос.",
+    ("route",), QUERY_COUNT_BUCKETS,
+))
+DB_DURATION = register(Histogram(
+    "registry_db_query_duration_seconds_per_request",
+    "Суммарное время SQL-запросов на один HTTP-запрос.",
+    ("route",),
+))
+
+
+class RequestStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Статистика SQL текущего HTTP-запроса (None вне запроса: старт, планировщик)
+_request_stats = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(engine):
+    """Считает SQL-запросы и их время в статистику текущего HTTP-запроса."""
+    target = engine.sync_engine if hasattr(engine, "sync_engine") else engine
+
+    @event.listens_for(target, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _request_stats.get() is not None:
+            conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(target, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = _request_stats.get()
+        starts = conn.info.get("metrics_query_start")
+        if stats is None or not starts:
+            return
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - starts.pop()
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: длительность запроса и SQL-статистика по шаблону маршрута
+    (/api/v1/company/{code}, а не конкретный код — иначе метки не ограничены).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            # Маршрут FastAPI кладёт в scope при разборе пути; статика и 404 — без маршрута
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            HTTP_DURATION.observe(elapsed, scope["method"], route, str(status))
+            DB_QUERIES.observe(stats.queries, route)
+            DB_DURATION.observe(stats.seconds, route)
+
+
+def cache_metrics(cache, name="company"):
+    """Коллектор для ResponseCache (app.core.cache)."""
+    stats = cache.stats()
+    labels = {"cache": name}
+    lines = []
+    for key in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        lines += family(f"registry_cache_{key}_total", "counter", f"Кэш ответов: {key}.", [(labels, stats[key])])
+    lines += family("registry_cache_entries", "gauge", "Записей в кэше ответов.", [(labels, stats["size"])])
+    lines += family("registry_cache_hit_ratio", "gauge", "Доля попаданий в кэш с запуска.", [(labels, stats["hit_ratio"])])
+    return lines
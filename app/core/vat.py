@@ -0,0 +1,47 @@
+# company-registry-lt/app/core/vat.py
+"""
+Коды НДС (PVM) Литвы.
+
+В реестре и на счетах код записывается по-разному: 'LT100012345611',
+'lt 1000 1234 5611', '100012345611'. Для поиска храним и сравниваем
+нормализованную форму — только цифры, без префикса LT.
+"""
+import re
+
+_NON_ALNUM_RE = re.compile(r"[^0-9A-Z]")
+
+
+def normalize_pvm(value):
+    """'lt 1000 1234 5611' -> '100012345611'. Пустое значение -> None."""
+    if not value:
+        return None
+    value = _NON_ALNUM_RE.sub("", str(value).upper())
+    if value.startswith("LT"):
+        value = value[2:]
+    return value or None
+
+
+def _check_digit(digits):
+    check = sum((1 + i % 9) * int(d) for i, d in enumerate(digits)) % 11
+    if check == 10:
+        check = sum((1 + (i + 2) % 9) * int(d) for i, d in enumerate(digits))
+    return check % 11 % 10
+
+
+def validate_lt_vat(value):
+    """
+    Проверка формата литовского кода НДС (без обращения к реестру).
+    Возвращает (нормализованный код, ошибка или None).
+    Юридические лица — 9 цифр (8-я равна 1), временные плательщики — 12 цифр (11-я равна 1);
+    последняя цифра — контрольная (взвешенная сумма по модулю 11).
+    """
+    number = normalize_pvm(value)
+    if not number or not number.isdigit():
+        return number, "код НДС должен состоять из цифр (с префиксом LT или без)"
+    if len(number) not in (9, 12):
+        return number, "код НДС должен содержать 9 или 12 цифр"
+    if number[-2] != "1":
+        return number, "неверный формат кода НДС"
+    if _check_digit(number[:-1]) != int(number[-1]):
+        return number, "неверная контрольная цифра"
+    return number, None
@@ -1,103 +1,220 @@
 import uvicorn
-from fastapi import FastAPI, BackgroundTasks
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from apscheduler.schedulers.background import BackgroundScheduler
 from sqlalchemy import select
 
-from app.core.db import async_engine, Base
-# Импортируем модели, чтобы они зарегистрировались в Base metadata
-from app.models import company
-from app.models.settings import Setting
+from app.core.config import settings
+from app.core.db import async_engine, async_read_engine, sync_engine
+from app.services.schema import init_schema
 from app.api.v1.endpoints import router as api_router
+from app.api.v1.imports import router as imports_router
 from app.web.views import router as web_router
-from app.services.registry_importer import run_full_import
-
-# Дефолтные настройки
-DEFAULT_SETTINGS = [
-    {
-        "key": "jar_url", 
-        "value": "https://www.registrucentras.lt/aduomenys/?byla=JAR_IREGISTRUOTI.csv",
-        "description": "Ссылка на файл реестра (JAR)"
-    },
-    {
-        "key": "pvm_url", 
-        # ОБНОВЛЕНО: Вставили рабочую ссылку data.gov.lt
-        "value": "https://get.data.gov.lt/datasets/gov/vmi/pvm_moketojai/Moketoja_duomenys_pvm_moketojai.csv",
-        "description": "Ссылка на плательщиков НДС (VMI)"
-    },
-    {
-        "key": "capital_url", 
-        "value": "https://www.registrucentras.lt/aduomenys/?byla=JAR_KAPITALAS.csv",
-        "description": "Ссылка на уставной капитал (JAR Kapitalas)"
-    }
-]
+from app.services.generations import (
+    rollback_generation, get_active_generation, add_generation_listener,
+    notify_generation_changed, generation_metrics,
+)
+from app.services.import_jobs import start_import_job, ImportJobBusy, job_metrics
+from app.services.leader import LeaderLease
+from app.core.cache import company_cache
+from app.core.http_cache import validators as http_validators
+from app.core.dictionaries import code_names
+from app.services.code_index import code_index
+from app.core.metrics import (
+    MetricsMiddleware, instrument_engine, add_collector, cache_metrics, render_metrics, family,
+)
 
 # --- НАСТРОЙКА ПЛАНИРОВЩИКА ---
+# Планировщик есть в каждом воркере uvicorn (опрос поколения, аренда роли),
+# а ночной импорт планирует только ведущий — держатель аренды "scheduler"
 scheduler = BackgroundScheduler()
+scheduler_lease = LeaderLease("scheduler", settings.scheduler_lease_sec)
+NIGHTLY_IMPORT_JOB = "nightly_import"
+
+
+def refresh_active_generation(job_id=None):
+    """
+    Импорт идёт в отдельном процессе, его публикация не оповещает этот процесс
+    (как и откат в другом воркере). Сверяем активное поколение и сбрасываем кэши,
+    если оно сменилось: после завершения воркера импорта и периодическим опросом.
+    """
+    active = get_active_generation(sync_engine)
+    generation_id = active.id if active else None
+    if generation_id != company_cache.generation:
+        reason = f"после задания импорта {job_id}" if job_id is not None else "опрос поколения"
+        print(f"🔄 [API] Активно поколение {generation_id} ({reason}).")
+        notify_generation_changed(generation_id)
+
+
+def poll_generation():
+    try:
+        refresh_active_generation()
+    except Exception as e:
+        # Например, БД кратко заблокирована переключением поколения — проверим в следующий раз
+        print(f"⚠️ [API] Не удалось проверить активное поколение: {e}")
+
+
+def coordinate_scheduler():
+    """Продлевает аренду роли; ночной импорт в расписании только у ведущего."""
+    was_leader = scheduler_lease.is_leader
+    try:
+        leader = scheduler_lease.renew()
+    except Exception as e:
+        # jobs.db занята: роль остаётся как есть, пока аренда не истечёт
+        print(f"⚠️ [SCHEDULER] Аренда роли не продлена: {e}")
+        return
+    if leader and not was_leader:
+        scheduler.add_job(
+            scheduled_import, 'cron', hour=4, minute=0, id=NIGHTLY_IMPORT_JOB, replace_existing=True
+        )
+        print(f"👑 [SCHEDULER] Процесс {scheduler_lease.holder} — ведущий: обновление запланировано на 04:00.")
+    elif was_leader and not leader:
+        scheduler.remove_job(NIGHTLY_IMPORT_JOB)
+        print(f"⏰ [SCHEDULER] Процесс {scheduler_lease.holder} больше не ведущий.")
+
+
+def set_http_generation(generation_id):
+    """Слушатель смены поколения для ETag/Last-Modified: нужна ещё дата публикации."""
+    active = get_active_generation(sync_engine)
+    published_at = active.published_at if active is not None and active.id == generation_id else None
+    http_validators.set_generation(generation_id, published_at)
+
+
+def load_code_names(generation_id):
+    """Слушатель смены поколения: импортер мог дополнить справочники форм и статусов."""
+    code_names.load(sync_engine)
+
+
+def scheduled_import():
+    """Ночное обновление: то же задание импорта, что и из API."""
+    # Аренда могла перейти к другому воркеру, пока этот не успел её продлить
+    if not scheduler_lease.renew():
+        print("⏭️ [SCHEDULER] Пропуск: ведущий — другой процесс.")
+        return
+    try:
+        job_id = start_import_job({}, "scheduler", on_finish=refresh_active_generation)
+        print(f"⏰ [SCHEDULER] Запущено задание импорта {job_id}.")
+    except ImportJobBusy as e:
+        print(f"⏭️ [SCHEDULER] Пропуск: {e}.")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 1. ЗАПУСК
     print("🚀 [STARTUP] Инициализация сервиса...")
     
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        
-        # --- ПРОВЕРКА И СОЗДАНИЕ НАСТРОЕК ---
-        from sqlalchemy.orm import Session
-        
-        # Функция для запуска внутри sync-контекста
-        def init_settings(connection):
-            session = Session(bind=connection)
-            for item in DEFAULT_SETTINGS:
-                existing = session.get(Setting, item["key"])
-                if not existing:
-                    print(f"⚙️ [CONFIG] Создаю настройку по умолчанию: {item['key']}")
-                    new_setting = Setting(key=item["key"], value=item["value"], description=item["description"])
-                    session.add(new_setting)
-            session.commit()
-            session.close()
-
-        await conn.run_sync(init_settings)
-        # ------------------------------------
-        
-    print("✅ [DB] Таблицы проверены.")
-
-    # Планируем задачу на 04:00 утра
-    scheduler.add_job(run_full_import, 'cron', hour=4, minute=0)
+    # Схема и настройки по умолчанию: DDL только если схема в БД устарела (PRAGMA user_version)
+    await run_in_threadpool(init_schema)
+
+    # Кэш ответов API живёт в пределах одного поколения данных
+    active = await run_in_threadpool(get_active_generation, sync_engine)
+    company_cache.set_generation(active.id if active else None)
+    add_generation_listener(company_cache.set_generation)
+    # Индекс кодов (mmap) — файл того же поколения
+    await run_in_threadpool(code_index.set_generation, active.id if active else None)
+    add_generation_listener(code_index.set_generation)
+    # ETag и Last-Modified ответов (304 без обращения к БД)
+    http_validators.set_generation(active.id if active else None, active.published_at if active else None)
+    add_generation_listener(set_http_generation)
+    # Названия правовых форм и статусов (в companies только коды)
+    await run_in_threadpool(code_names.load, sync_engine)
+    add_generation_listener(load_code_names)
+
+    # Ночной импорт (04:00) — только у ведущего воркера; остальные следят за поколением
+    await run_in_threadpool(coordinate_scheduler)
+    scheduler.add_job(
+        coordinate_scheduler, 'interval', seconds=max(1, settings.scheduler_lease_sec // 3)
+    )
+    scheduler.add_job(poll_generation, 'interval', seconds=settings.generation_poll_sec)
     scheduler.start()
-    print("⏰ [SCHEDULER] Автоматическое обновление запланировано на 04:00.")
 
     yield
 
     # 2. ОСТАНОВКА
     print("🛑 [SHUTDOWN] Остановка сервиса...")
     scheduler.shutdown()
+    # Роль сразу переходит другому воркеру, не дожидаясь истечения аренды
+    await run_in_threadpool(scheduler_lease.release)
 
 app = FastAPI(title="Company Registry LT", lifespan=lifespan)
 
+# --- МЕТРИКИ (Prometheus) ---
+app.add_middleware(MetricsMiddleware)
+instrument_engine(async_engine)
+instrument_engine(async_read_engine)
+add_collector(lambda: cache_metrics(company_cache))
+add_collector(lambda: family(
+    "registry_code_index_entries", "gauge", "Записей в индексе кодов (mmap) активного поколения.",
+    [({}, code_index.stats()["entries"])],
+))
+add_collector(lambda: generation_metrics(sync_engine))
+add_collector(job_metrics)
+add_collector(lambda: family(
+    "registry_scheduler_leader", "gauge", "1 — этот процесс ведущий (планирует ночной импорт).",
+    [({}, int(scheduler_lease.is_leader))],
+))
+
+@app.get("/metrics", tags=["Admin"])
+async def metrics():
+    """Метрики в текстовом формате Prometheus."""
+    # Коллекторы читают БД синхронно — не в цикле событий
+    body = await run_in_threadpool(render_metrics)
+    return Response(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Статика
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 # Ручка для принудительного обновления
 @app.post("/api/v1/force-update", tags=["Admin"])
 async def force_update_db(
-    background_tasks: BackgroundTasks,
     # Принимаем параметры запроса (Query Parameters)
     dl_jar: bool = True,
     dl_pvm: bool = True,
-    dl_cap: bool = True
+    dl_cap: bool = True,
+    incremental: Optional[bool] = None,
+    force: bool = False
 ):
     """
-    Запускает обновление. Можно отключить скачивание файлов флагами.
+    Запускает обновление в отдельном процессе. Можно отключить скачивание файлов флагами.
+    incremental: только изменившиеся строки (true) или полная сборка поколения (false).
+    force: обработать файлы, даже если источники не изменились.
+    Прогресс: GET /api/v1/import/jobs/{job_id} и /events (SSE). Одновременно — только один импорт.
+    """
+    # Передаем параметры в функцию импорта (через задание воркеру)
+    params = {
+        "download_jar": dl_jar,
+        "download_pvm": dl_pvm,
+        "download_capital": dl_cap,
+        "incremental": incremental,
+        "force": force,
+    }
+    try:
+        job_id = await run_in_threadpool(
+            start_import_job, params, "api", refresh_active_generation
+        )
+    except ImportJobBusy as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Импорт уже выполняется", "job_id": e.job_id},
+        )
+    return {"message": f"Обновление запущено (задание {job_id}).", "job_id": job_id}
+
+# Ручка для отката на предыдущее поколение данных
+@app.post("/api/v1/rollback", tags=["Admin"])
+async def rollback_db():
+    """
+    Возвращает предыдущее сохранённое поколение данных (атомарный RENAME, без перезагрузки).
     """
-    # Передаем параметры в функцию импорта
-    background_tasks.add_task(run_full_import, dl_jar, dl_pvm, dl_cap)
-    return {"message": "Обновление запущено. Проверьте консоль."}
+    generation_id = await run_in_threadpool(rollback_generation, sync_engine)
+    if generation_id is None:
+        raise HTTPException(status_code=409, detail="Нет сохранённого поколения для отката")
+    return {"message": f"Активно поколение {generation_id}."}
     
 # Роутеры
 app.include_router(api_router, prefix="/api/v1", tags=["API"])
+app.include_router(imports_router, prefix="/api/v1", tags=["Admin"])
 app.include_router(web_router, tags=["Web"])
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+# company-registry-lt\app\models\change.py
+from sqlalchemy import Column, String, Integer, Index
+from app.core.db import Base
+
+class CompanyChange(Base):
+    """
+    Лента изменений: какие компании добавлены, изменены или удалены в поколении данных
+    (GET /api/v1/changes?since=<поколение>). Пишется импортером в одной транзакции
+    со сверкой истории (app.services.changes). id растёт вместе с поколениями —
+    это и курсор пагинации.
+    """
+    __tablename__ = "company_changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    generation_id = Column(Integer, nullable=False)
+    code = Column(String, nullable=False)
+    # added / modified / removed
+    change = Column(String, nullable=False)
+    # Изменённые поля через запятую (только для modified)
+    fields = Column(String, nullable=True)
+
+    __table_args__ = (
+        # Начало ленты после поколения since
+        Index("ix_company_changes_generation", "generation_id"),
+    )
+
+    def __repr__(self):
+        return f"<CompanyChange(generation={self.generation_id}, code='{self.code}', {self.change})>"
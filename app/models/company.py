@@ -1,12 +1,15 @@
 # company-registry-lt\app\models\company.py
 from sqlalchemy import Column, String, Integer, Date, Text
 from app.core.db import Base
+from app.core.dictionaries import CodeNamesMixin
 from sqlalchemy import Numeric # Добавляем Numeric для денег
 
-class Company(Base):
+class Company(Base, CodeNamesMixin):
     """
     Модель таблицы компаний.
     Отражает структуру файла JAR + данные об НДС (PVM).
+    Названия правовой формы и статуса — в справочниках legal_forms / statuses,
+    у объекта они доступны как legal_form_name / status_name (CodeNamesMixin).
     """
     __tablename__ = "companies"
 
@@ -17,28 +20,27 @@ class Company(Base):
     # ja_pavadinimas (Наименование)
     name = Column(String, index=True, nullable=False)
     
+    # Ключ поиска: без регистра, диакритики, кавычек и правовой формы (app.services.search)
+    name_norm = Column(String, nullable=True, index=True)
+
     # --- Адрес ---
     # adresas (Адрес регистрации)
     address = Column(Text, nullable=True)
+    # Ключ поиска по адресу (как name_norm, правовая форма не убирается)
+    address_norm = Column(Text, nullable=True)
     
     # --- Даты ---
     # ja_reg_data (Дата регистрации компании)
     registration_date = Column(Date, nullable=True)
     
     # --- Правовая форма (UAB, MB, AB...) ---
-    # form_kodas
+    # form_kodas (form_pavadinimas — в справочнике legal_forms)
     legal_form_code = Column(Integer, nullable=True)
     
-    # form_pavadinimas
-    legal_form_name = Column(String, nullable=True)
-    
     # --- Статус (Действует, Банкрот...) ---
-    # stat_kodas
+    # stat_kodas (stat_pavadinimas — в справочнике statuses)
     status_code = Column(Integer, index=True, nullable=True)
     
-    # stat_pavadinimas
-    status_name = Column(String, nullable=True)
-    
     # stat_data_nuo
     status_date_from = Column(Date, nullable=True)
     
@@ -47,13 +49,19 @@ class Company(Base):
     data_updated_at = Column(Date, nullable=True)
 
     # --- НОВЫЕ ПОЛЯ (НДС / PVM) ---
-    # Код PVM (например LT100012345611)
-    pvm_code = Column(String, nullable=True, index=True) 
+    # Код PVM (например LT100012345611), как в источнике
+    pvm_code = Column(String, nullable=True)
+    # Нормализованный код PVM для поиска: только цифры, без LT (100012345611)
+    pvm_code_norm = Column(String, nullable=True, index=True)
     # С какого числа является плательщиком
     pvm_date = Column(Date, nullable=True)
     # --- НОВЫЕ ПОЛЯ (Капитал) ---
     authorized_capital = Column(Numeric(12, 2), nullable=True) # Например: 2500.00
     capital_currency = Column(String(3), nullable=True)        # EUR, LTL
 
+    # --- Служебное ---
+    # Хэш исходной строки (JAR + НДС + капитал) для инкрементального импорта
+    row_hash = Column(String(16), nullable=True)
+
     def __repr__(self):
         return f"<Company(code='{self.code}', name='{self.name}', pvm='{self.pvm_code}')>"
\ No newline at end of file
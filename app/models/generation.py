@@ -0,0 +1,44 @@
+# company-registry-lt\app\models\generation.py
+from sqlalchemy import Column, String, Integer, DateTime, Text
+from app.core.db import Base
+
+class DataGeneration(Base):
+    """
+    Поколение данных реестра (результат одного импорта).
+    Физические таблицы поколения называются companies_<storage_id>,
+    пока поколение не активно. Активное поколение живёт под именем companies.
+    """
+    __tablename__ = "data_generations"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Суффикс физических таблиц поколения
+    storage_id = Column(Integer, nullable=True)
+
+    # building -> active -> retired -> dropped (или failed);
+    # superseded — активное поколение, поверх которого применён инкрементальный импорт
+    status = Column(String, nullable=False, index=True)
+
+    # full — полная сборка, incremental — изменения применены к таблицам
+    # предыдущего поколения (тот же storage_id), legacy — таблица, найденная до введения поколений
+    mode = Column(String, nullable=False, default="full")
+
+    row_count = Column(Integer, nullable=True)
+
+    # Счётчики изменённых строк (для инкрементального импорта)
+    rows_inserted = Column(Integer, nullable=True)
+    rows_updated = Column(Integer, nullable=True)
+    rows_deleted = Column(Integer, nullable=True)
+
+    # Лента изменений (company_changes) этого поколения записана относительно
+    # состояния поколения changes_base (0 — пустого реестра); NULL — не записана
+    changes_base = Column(Integer, nullable=True)
+
+    # Тайминги стадий импорта (JSON: стадия -> start/end/seconds)
+    stage_timings = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, nullable=False)
+    published_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<DataGeneration(id={self.id}, status='{self.status}', rows={self.row_count})>"
@@ -0,0 +1,45 @@
+# company-registry-lt\app\models\history.py
+from sqlalchemy import Column, String, Integer, Date, Text, Index, Numeric, text
+from app.core.db import Base
+from app.core.dictionaries import CodeNamesMixin
+
+class CompanyHistory(Base, CodeNamesMixin):
+    """
+    История компании: версии строки с интервалом действия [valid_from, valid_to).
+    Новая версия пишется, только когда у компании изменились отслеживаемые поля
+    (см. app.services.history), поэтому объём растёт с числом изменений,
+    а не с размером реестра × число импортов.
+    valid_to IS NULL — текущая версия; закрытая версия без преемника — компания
+    исчезла из реестра.
+    """
+    __tablename__ = "company_history"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    code = Column(String, nullable=False)
+
+    # Дата импорта, на котором версия появилась / перестала быть актуальной
+    valid_from = Column(Date, nullable=False)
+    valid_to = Column(Date, nullable=True)
+
+    # Поля компании на момент версии (как в таблице companies; названия — из справочников)
+    name = Column(String, nullable=False)
+    address = Column(Text, nullable=True)
+    registration_date = Column(Date, nullable=True)
+    legal_form_code = Column(Integer, nullable=True)
+    status_code = Column(Integer, nullable=True)
+    status_date_from = Column(Date, nullable=True)
+    data_updated_at = Column(Date, nullable=True)
+    pvm_code = Column(String, nullable=True)
+    pvm_date = Column(Date, nullable=True)
+    authorized_capital = Column(Numeric(12, 2), nullable=True)
+    capital_currency = Column(String(3), nullable=True)
+
+    __table_args__ = (
+        # История и as_of: последняя версия с valid_from <= даты — поиск по индексу
+        Index("ix_company_history_code_from", "code", "valid_from"),
+        # Текущая версия кода (сравнение с новым импортом)
+        Index("ix_company_history_open", "code", unique=True, sqlite_where=text("valid_to IS NULL")),
+    )
+
+    def __repr__(self):
+        return f"<CompanyHistory(code='{self.code}', {self.valid_from}..{self.valid_to})>"
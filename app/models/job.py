@@ -0,0 +1,41 @@
+# company-registry-lt\app\models\job.py
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Boolean
+from app.core.db import JobsBase
+
+class ImportJob(JobsBase):
+    """
+    Задание импорта. Выполняется отдельным процессом (app.services.import_worker),
+    API и планировщик только создают задание и следят за ним через эту таблицу.
+    Хранится в отдельной БД заданий (jobs.db), см. app.core.db.
+    """
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # queued -> running -> succeeded / skipped / failed / cancelled
+    status = Column(String, nullable=False, index=True)
+
+    # Блокировка «одно задание за раз»: 1, пока задание queued/running, иначе NULL.
+    # UNIQUE не даёт двум заданиям занять её одновременно (NULL не участвует)
+    lock = Column(Integer, unique=True, nullable=True)
+
+    trigger = Column(String, nullable=True)     # api, scheduler
+    params = Column(Text, nullable=True)        # Аргументы run_full_import (JSON)
+    pid = Column(Integer, nullable=True)        # Процесс воркера
+
+    # Прогресс
+    stage = Column(String, nullable=True)
+    rows_processed = Column(Integer, nullable=True)
+    rows_per_sec = Column(Float, nullable=True)
+
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    generation_id = Column(Integer, nullable=True)   # Опубликованное поколение
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<ImportJob(id={self.id}, status='{self.status}', stage='{self.stage}')>"
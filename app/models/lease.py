@@ -0,0 +1,18 @@
+# company-registry-lt\app\models\lease.py
+from sqlalchemy import Column, String, DateTime
+from app.core.db import JobsBase
+
+class Lease(JobsBase):
+    """
+    Аренда роли (выбор ведущего процесса среди воркеров uvicorn).
+    Роль у holder до expires_at; держатель продлевает аренду, остальные
+    забирают её только после истечения. Хранится в БД заданий (jobs.db).
+    """
+    __tablename__ = "leases"
+
+    name = Column(String, primary_key=True)       # Роль, например scheduler
+    holder = Column(String, nullable=False)       # хост:pid:случайный суффикс
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<Lease(name='{self.name}', holder='{self.holder}', expires_at={self.expires_at})>"
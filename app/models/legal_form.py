@@ -0,0 +1,19 @@
+# company-registry-lt\app\models\legal_form.py
+from sqlalchemy import Column, String, Integer
+from app.core.db import Base
+
+class LegalForm(Base):
+    """
+    Справочник правовых форм (form_kodas -> form_pavadinimas).
+    В companies хранится только код; название берётся отсюда
+    (в API — из карты в памяти, app.core.dictionaries).
+    Импортер дополняет справочник, поколения его не переключают:
+    коды стабильны, а откат на старое поколение не теряет названий.
+    """
+    __tablename__ = "legal_forms"
+
+    code = Column(Integer, primary_key=True, autoincrement=False)  # form_kodas
+    name = Column(String, nullable=False)                           # form_pavadinimas
+
+    def __repr__(self):
+        return f"<LegalForm(code={self.code}, name='{self.name}')>"
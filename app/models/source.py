@@ -0,0 +1,25 @@
+# company-registry-lt\app\models\source.py
+from sqlalchemy import Column, String, Integer, DateTime
+from app.core.db import Base
+
+class ImportSource(Base):
+    """
+    Состояние скачанного файла-источника (JAR, PVM, капитал).
+    Нужно для условных запросов (If-None-Match / If-Modified-Since)
+    и для пропуска обработки, если ни один файл не изменился.
+    """
+    __tablename__ = "import_sources"
+
+    key = Column(String, primary_key=True)          # jar, pvm, capital
+    url = Column(String, nullable=True)             # С какой ссылки скачан файл
+
+    # Валидаторы HTTP из последнего ответа 200
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+
+    # Контроль содержимого локального файла
+    size = Column(Integer, nullable=True)
+    sha256 = Column(String(64), nullable=True)
+
+    checked_at = Column(DateTime, nullable=True)    # Последняя проверка источника
+    changed_at = Column(DateTime, nullable=True)    # Последнее изменение содержимого
@@ -0,0 +1,26 @@
+# company-registry-lt\app\models\stats.py
+from sqlalchemy import Column, String, Integer
+from app.core.db import Base
+
+class CompanyStats(Base):
+    """
+    Сводка реестра: число компаний в каждой комбинации измерений
+    (правовая форма × статус × год регистрации × диапазон капитала).
+    Считается импортером и переключается вместе с поколением данных,
+    поэтому GET /api/v1/stats не сканирует таблицу companies.
+    Пустое измерение (нет данных) — NULL. Названия формы и статуса — из справочников.
+    """
+    __tablename__ = "company_stats"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    legal_form_code = Column(Integer, nullable=True)
+    status_code = Column(Integer, nullable=True)
+    registration_year = Column(Integer, nullable=True)
+    # Диапазон уставного капитала: "<1k", "1k-10k", ... (app.services.stats.CAPITAL_BRACKETS)
+    capital_bracket = Column(String, nullable=True)
+
+    companies = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<CompanyStats(form={self.legal_form_code}, status={self.status_code}, year={self.registration_year}, capital='{self.capital_bracket}': {self.companies})>"
@@ -0,0 +1,16 @@
+# company-registry-lt\app\models\status.py
+from sqlalchemy import Column, String, Integer
+from app.core.db import Base
+
+class Status(Base):
+    """
+    Справочник статусов компаний (stat_kodas -> stat_pavadinimas).
+    Устроен так же, как справочник правовых форм (app.models.legal_form).
+    """
+    __tablename__ = "statuses"
+
+    code = Column(Integer, primary_key=True, autoincrement=False)  # stat_kodas
+    name = Column(String, nullable=False)                           # stat_pavadinimas
+
+    def __repr__(self):
+        return f"<Status(code={self.code}, name='{self.name}')>"
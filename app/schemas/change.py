@@ -0,0 +1,27 @@
+# company-registry-lt/app/schemas/change.py
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class CompanyChangeItem(BaseModel):
+    """
+    Изменение компании в поколении данных: added, modified (fields — какие поля) или removed.
+    Сами данные — GET /api/v1/company/{code} или POST /api/v1/companies/batch.
+    """
+    id: int
+    generation_id: int
+    code: str
+    change: str
+    fields: Optional[List[str]] = None
+
+
+class ChangesPage(BaseModel):
+    """
+    Страница ленты изменений после поколения since. next_cursor передаётся
+    в следующий запрос (?cursor=...); None — изменений больше нет, и тогда
+    until (поколение, по которое выдана лента) — since для следующей синхронизации.
+    """
+    since: int
+    until: int
+    items: List[CompanyChangeItem]
+    next_cursor: Optional[int] = None
@@ -1,6 +1,6 @@
 #  company-registry-lt/app/schemas/company.py
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 
 class CompanyResponse(BaseModel):
@@ -22,5 +22,77 @@ class CompanyResponse(BaseModel):
     
     data_updated_at: Optional[date] = None
 
+    # НДС (PVM)
+    pvm_code: Optional[str] = None
+    pvm_date: Optional[date] = None
+
+    # Уставной капитал
+    authorized_capital: Optional[float] = None
+    capital_currency: Optional[str] = None
+
     # Эта настройка позволяет Pydantic читать данные прямо из SQLAlchemy моделей
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class CompanyVersion(CompanyResponse):
+    """
+    Версия данных компании: действовала с valid_from (включительно)
+    по valid_to (не включая); valid_to = None — текущая версия.
+    """
+    valid_from: date
+    valid_to: Optional[date] = None
+
+
+class CompanyHistoryResponse(BaseModel):
+    """
+    История компании (от старой версии к новой).
+    """
+    code: str
+    versions: List[CompanyVersion]
+
+
+class CompanyBatchRequest(BaseModel):
+    """
+    Пакетный запрос (сверка контрагентов 1C): коды предприятий и/или коды НДС.
+    """
+    codes: List[str] = []
+    pvm_codes: List[str] = []
+
+
+class CompanyBatchResponse(BaseModel):
+    """
+    Найденные компании и коды, по которым ничего не найдено.
+    """
+    found: List[CompanyResponse]
+    missing: List[str]
+    missing_pvm: List[str] = []
+
+
+class PvmBatchRequest(BaseModel):
+    """
+    Пакетный поиск только по кодам НДС (в любом написании: LT123..., 'lt 123 ...', 123...).
+    """
+    pvm_codes: List[str]
+
+
+class VatValidationResponse(BaseModel):
+    """
+    Результат проверки кода НДС: формат/контрольная цифра и наличие в реестре.
+    """
+    pvm_code: str
+    normalized: Optional[str] = None
+    valid: bool
+    error: Optional[str] = None
+    # None — не проверялось (код невалиден)
+    registered: Optional[bool] = None
+    company_code: Optional[str] = None
+
+
+class CompanyPage(BaseModel):
+    """
+    Страница списка компаний. next_cursor передаётся в следующий запрос (?cursor=...);
+    None — страниц больше нет. total_exact=false: total — нижняя граница.
+    """
+    items: List[CompanyResponse]
+    next_cursor: Optional[str] = None
+    total: int
+    total_exact: bool
@@ -0,0 +1,35 @@
+#  company-registry-lt/app/schemas/job.py
+import json
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import Optional
+from datetime import datetime
+
+class ImportJobResponse(BaseModel):
+    """
+    Состояние задания импорта (для опроса и SSE-потока прогресса).
+    """
+    id: int
+    status: str
+    trigger: Optional[str] = None
+    params: Optional[dict] = None
+
+    stage: Optional[str] = None
+    rows_processed: Optional[int] = None
+    rows_per_sec: Optional[float] = None
+
+    cancel_requested: bool = False
+    generation_id: Optional[int] = None
+    error: Optional[str] = None
+
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("params", mode="before")
+    @classmethod
+    def parse_params(cls, value):
+        # В БД параметры хранятся строкой JSON
+        return json.loads(value) if isinstance(value, str) else value
@@ -0,0 +1,42 @@
+# company-registry-lt/app/schemas/reconcile.py
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class ReconcileItem(BaseModel):
+    """
+    Название контрагента (как в таблице бухгалтерии) и, если есть, его адрес.
+    id — ссылка клиента на строку (например, номер строки), возвращается как есть.
+    """
+    id: Optional[str] = None
+    name: str = Field(..., max_length=500)
+    address: Optional[str] = Field(None, max_length=500)
+
+
+class ReconcileRequest(BaseModel):
+    """
+    Пакет названий для сверки с реестром.
+    limit — сколько кандидатов вернуть на название; min_score — отсечь кандидатов хуже.
+    """
+    items: List[ReconcileItem]
+    limit: int = Field(3, ge=1, le=20)
+    min_score: float = Field(0.3, ge=0.0, le=1.0)
+
+
+class ReconcileCandidate(BaseModel):
+    """Компания-кандидат; score — сходство от 0 до 1 (1 — совпадение нормализованного названия)."""
+    code: str
+    name: str
+    address: Optional[str] = None
+    score: float
+
+
+class ReconcileResult(BaseModel):
+    id: Optional[str] = None
+    name: str
+    candidates: List[ReconcileCandidate]
+
+
+class ReconcileResponse(BaseModel):
+    """Результаты в порядке запроса."""
+    results: List[ReconcileResult]
@@ -0,0 +1,20 @@
+# company-registry-lt/app/schemas/stats.py
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class StatsGroup(BaseModel):
+    """Одна группа сводки: заполнены только измерения из group_by."""
+    legal_form_code: Optional[int] = None
+    legal_form_name: Optional[str] = None
+    status_code: Optional[int] = None
+    status_name: Optional[str] = None
+    registration_year: Optional[int] = None
+    capital_bracket: Optional[str] = None
+    companies: int
+
+
+class StatsResponse(BaseModel):
+    group_by: List[str]
+    total: int
+    groups: List[StatsGroup]
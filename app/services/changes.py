@@ -0,0 +1,146 @@
+# company-registry-lt/app/services/changes.py
+"""
+Лента изменений для синхронизации клиентов (GET /api/v1/changes?since=<поколение>).
+
+Импортер после публикации поколения сверяет таблицу companies с текущими
+версиями истории (app.services.history) — это состояние, которое видели
+клиенты до импорта. Перед сверкой истории в той же транзакции record_changes
+пишет в company_changes, какие коды добавлены, удалены и какие поля изменились.
+Сбой сверки не теряет изменений: следующий импорт сравнит с той же историей
+и запишет их под своим поколением.
+
+Клиент хранит until последнего ответа и передаёт его как since в следующий раз;
+объём ответа зависит от числа изменений, а не от размера реестра.
+until — последнее поколение, для которого лента уже записана (опубликованное,
+но ещё не сверенное поколение в ленту не попадает, пока его изменения не записаны).
+"""
+from sqlalchemy import select, func, text, bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.change import CompanyChange
+from app.models.generation import DataGeneration
+from app.services.history import TRACKED_COLUMNS, HISTORY_BATCH
+
+
+class ChangesUnavailable(Exception):
+    """Ленты за запрошенный период нет (since раньше начала ленты) — нужна полная синхронизация."""
+
+
+def _changed_fields():
+    # Список изменённых полей через запятую: 'name,status_code'
+    parts = " || ".join(
+        f"CASE WHEN c.{col} IS NOT company_history.{col} THEN '{col},' ELSE '' END"
+        for col in TRACKED_COLUMNS
+    )
+    return f"rtrim({parts}, ',')"
+
+
+def record_changes(conn, generation_id, codes=None):
+    """
+    Записывает изменения поколения generation_id относительно текущих версий истории.
+    Вызывать в транзакции conn до record_history (она эти версии закрывает).
+    codes — только эти коды (инкрементальный импорт). Возвращает {тип: число}.
+    """
+    base = _changes_base(conn, generation_id)
+    open_version = "company_history.valid_to IS NULL"
+    fields = _changed_fields()
+    differs = " OR ".join(f"c.{col} IS NOT company_history.{col}" for col in TRACKED_COLUMNS)
+    statements = {
+        "added": (
+            "INSERT INTO company_changes (generation_id, code, change) "
+            "SELECT :generation, c.code, 'added' FROM companies c WHERE NOT EXISTS ("
+            f"SELECT 1 FROM company_history WHERE company_history.code = c.code AND {open_version})",
+            "c.code",
+        ),
+        "modified": (
+            "INSERT INTO company_changes (generation_id, code, change, fields) "
+            f"SELECT :generation, c.code, 'modified', {fields} FROM company_history "
+            f"JOIN companies c ON c.code = company_history.code WHERE {open_version} AND ({differs})",
+            "c.code",
+        ),
+        "removed": (
+            "INSERT INTO company_changes (generation_id, code, change) "
+            "SELECT :generation, company_history.code, 'removed' FROM company_history "
+            f"WHERE {open_version} AND NOT EXISTS (SELECT 1 FROM companies c WHERE c.code = company_history.code)",
+            "company_history.code",
+        ),
+    }
+
+    if codes is None:
+        batches = [None]
+    else:
+        codes = list(codes)
+        batches = [codes[i:i + HISTORY_BATCH] for i in range(0, len(codes), HISTORY_BATCH)]
+    codes_param = bindparam("codes", expanding=True)
+
+    counts = {}
+    for change, (sql, code_column) in statements.items():
+        stmt = text(sql) if codes is None else text(f"{sql} AND {code_column} IN :codes").bindparams(codes_param)
+        counts[change] = 0
+        for batch in batches:
+            params = {"generation": generation_id} if batch is None else {"generation": generation_id, "codes": batch}
+            counts[change] += conn.execute(stmt, params).rowcount
+
+    conn.execute(
+        update(DataGeneration).where(DataGeneration.id == generation_id).values(changes_base=base)
+    )
+    return counts
+
+
+def _changes_base(conn, generation_id):
+    """Поколение, состояние которого отражает история сейчас (0 — история пуста)."""
+    last = conn.execute(
+        select(func.max(DataGeneration.id))
+        .where(DataGeneration.changes_base.is_not(None), DataGeneration.id < generation_id)
+    ).scalar()
+    if last is not None:
+        return last
+    if conn.execute(text("SELECT 1 FROM company_history LIMIT 1")).first() is None:
+        return 0
+    # Лента начинается с этого импорта; история — от предыдущего опубликованного поколения
+    previous = conn.execute(
+        select(func.max(DataGeneration.id))
+        .where(DataGeneration.id < generation_id, DataGeneration.published_at.is_not(None))
+    ).scalar()
+    return previous or 0
+
+
+# --- Чтение (API) ---
+
+async def changes_range(db: AsyncSession, since):
+    """
+    (первый id ленты после since, until) для запроса since.
+    until — последнее поколение с записанной лентой; ChangesUnavailable — since раньше начала ленты.
+    """
+    start, until = (await db.execute(
+        select(func.min(DataGeneration.changes_base), func.max(DataGeneration.id))
+        .where(DataGeneration.changes_base.is_not(None))
+    )).one()
+    if until is None:
+        raise ChangesUnavailable("лента изменений ещё не записана ни одним импортом")
+    if since < start:
+        raise ChangesUnavailable(f"лента изменений ведётся с поколения {start}")
+    first_id = (await db.execute(
+        select(func.min(CompanyChange.id)).where(CompanyChange.generation_id > since)
+    )).scalar()
+    return first_id, until
+
+
+def changes_select(first_id, until, cursor=None):
+    """Изменения поколений (since, until] по возрастанию id (курсор — id последней записи)."""
+    after = max(first_id - 1, cursor or 0)
+    return (
+        select(CompanyChange)
+        .where(CompanyChange.id > after, CompanyChange.generation_id <= until)
+        .order_by(CompanyChange.id)
+    )
+
+
+def change_dict(change):
+    return {
+        "id": change.id,
+        "generation_id": change.generation_id,
+        "code": change.code,
+        "change": change.change,
+        "fields": change.fields.split(",") if change.fields else None,
+    }
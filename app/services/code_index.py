@@ -0,0 +1,235 @@
+# company-registry-lt/app/services/code_index.py
+"""
+Индекс кодов компаний в файле, отображённом в память (mmap).
+
+Импортер после публикации поколения пишет data/index/codes_<поколение>.bin:
+    заголовок (64 байта) — сигнатура, версия, число записей, поколение, смещения частей;
+    коды     — int64 по возрастанию;
+    смещения — uint64, начало каждой записи в блоке записей (n + 1 значение);
+    записи   — готовый JSON ответа GET /api/v1/company/{code} (CompanyResponse).
+
+API отображает файл активного поколения в память и ищет код бинарным поиском —
+без SQLite, ORM и перехода в поток aiosqlite. Файл только читается, его страницы
+лежат в page cache ОС и общие для всех воркеров uvicorn.
+В индекс попадают коды в каноничной числовой записи (цифры, без ведущего нуля);
+остальные запросы, как и работа без файла, идут в БД.
+"""
+import os
+import mmap
+import time
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from sqlalchemy import select, text
+
+from app.core.db import BASE_DIR
+from app.models.generation import DataGeneration
+from app.schemas.company import CompanyResponse
+from app.services.dictionaries import NAMES_JOIN, company_columns_sql
+
+INDEX_DIR = os.path.join(BASE_DIR, "data", "index")
+
+MAGIC = b"RGCODES\0"
+VERSION = 1
+# сигнатура, версия, резерв, число записей, поколение, смещения: коды, смещения записей, записи
+HEADER = struct.Struct("<8sIIQQQQQ")
+HEADER_SIZE = 64
+
+# Больше 18 цифр в int64 не помещается гарантированно
+MAX_CODE_DIGITS = 18
+# Как часто повторять попытку открыть файл, если его ещё нет (сек)
+REOPEN_INTERVAL = 5.0
+
+
+def index_path(generation_id):
+    return os.path.join(INDEX_DIR, f"codes_{generation_id}.bin")
+
+
+def company_json(company):
+    """Тело ответа по одной компании (ORM-объект или строка с теми же полями)."""
+    return CompanyResponse.model_validate(company).model_dump_json().encode()
+
+
+def canonical_code(code):
+    """Код как число, если он в каноничной записи, иначе None."""
+    if (code and code.isascii() and code.isdigit()
+            and code[0] != "0" and len(code) <= MAX_CODE_DIGITS):
+        return int(code)
+    return None
+
+
+# --- Запись (импортер) ---
+
+def write_code_index(engine, generation_id):
+    """
+    Пишет индекс активной таблицы companies (через временный файл и os.replace).
+    Записи идут потоком в порядке кодов; в памяти — только массивы кодов и смещений.
+    Возвращает путь или None (ошибка — импорт от этого не страдает, API читает из БД).
+    """
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    path = index_path(generation_id)
+    tmp_path = path + ".tmp"
+    # Каноничные числовые коды; сортировка — как у чисел
+    where = (
+        "companies.code GLOB '[1-9]*' AND companies.code NOT GLOB '*[^0-9]*' "
+        f"AND length(companies.code) <= {MAX_CODE_DIGITS}"
+    )
+    columns = list(CompanyResponse.model_fields)
+    try:
+        with engine.connect() as conn, open(tmp_path, "wb") as f:
+            # Одна транзакция чтения: число записей и сами записи из одного снимка
+            with conn.begin():
+                count = conn.execute(text(f"SELECT COUNT(*) FROM companies WHERE {where}")).scalar()
+                codes_offset = HEADER_SIZE
+                offsets_offset = codes_offset + 8 * count
+                blob_offset = offsets_offset + 8 * (count + 1)
+
+                codes = array("q")
+                offsets = array("Q", [0])
+                f.seek(blob_offset)
+                # Названия формы и статуса — из справочников
+                result = conn.execution_options(yield_per=20000).execute(text(
+                    f"SELECT {company_columns_sql(columns)} FROM companies {NAMES_JOIN} "
+                    f"WHERE {where} ORDER BY CAST(companies.code AS INTEGER)"
+                ))
+                position = 0
+                for rows in result.partitions():
+                    parts = []
+                    for row in rows:
+                        body = company_json(row)
+                        codes.append(int(row.code))
+                        position += len(body)
+                        offsets.append(position)
+                        parts.append(body)
+                    f.write(b"".join(parts))
+
+            if len(codes) != count:
+                raise RuntimeError(f"ожидалось {count} записей, прочитано {len(codes)}")
+            f.seek(0)
+            f.write(HEADER.pack(
+                MAGIC, VERSION, 0, count, generation_id, codes_offset, offsets_offset, blob_offset,
+            ).ljust(HEADER_SIZE, b"\0"))
+            f.write(codes.tobytes())
+            f.write(offsets.tobytes())
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ [INDEX] Ошибка записи индекса кодов: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    print(f"🗂️ [INDEX] Индекс кодов поколения {generation_id}: {count} записей, {os.path.getsize(path) // 1024} КБ.")
+    prune_code_indexes(engine)
+    return path
+
+
+def prune_code_indexes(engine):
+    """Оставляет индексы только тех поколений, которые активны или доступны для отката."""
+    if not os.path.isdir(INDEX_DIR):
+        return
+    with engine.connect() as conn:
+        keep = set(conn.execute(
+            select(DataGeneration.id).where(DataGeneration.status.in_(["active", "retired"]))
+        ).scalars())
+    for name in os.listdir(INDEX_DIR):
+        if not (name.startswith("codes_") and name.endswith(".bin")):
+            continue
+        generation_id = name[len("codes_"):-len(".bin")]
+        if generation_id.isdigit() and int(generation_id) not in keep:
+            try:
+                os.remove(os.path.join(INDEX_DIR, name))
+            except OSError as e:
+                # Windows не даёт удалить файл, пока его держит mmap в процессе API
+                print(f"⚠️ [INDEX] Не удалось удалить {name}: {e}")
+
+
+# --- Чтение (API) ---
+
+class _MappedIndex:
+    """Открытый файл индекса: mmap и представления его частей без копирования."""
+
+    def __init__(self, path, generation_id):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, generation, codes_offset, offsets_offset, blob_offset = \
+            HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION or generation != generation_id:
+            self.mm.close()
+            raise ValueError(f"файл {path} не является индексом кодов поколения {generation_id}")
+        view = memoryview(self.mm)
+        self.codes = view[codes_offset:offsets_offset].cast("q")
+        self.offsets = view[offsets_offset:blob_offset].cast("Q")
+        self.blob = view[blob_offset:]
+        self.count = count
+
+
+class CodeIndex:
+    """
+    Индекс кодов активного поколения. Переключение — set_generation (слушатель
+    смены поколения): новый файл открывается, старый закрывается, когда его
+    перестанут читать (на него больше не ссылаются).
+    """
+
+    def __init__(self):
+        self.generation = None
+        self._index = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def set_generation(self, generation):
+        with self._lock:
+            self.generation = generation
+            self._index = None
+            self._open()
+
+    def _open(self):
+        self._checked_at = time.monotonic()
+        if self.generation is None:
+            return
+        path = index_path(self.generation)
+        if not os.path.exists(path):
+            return
+        try:
+            self._index = _MappedIndex(path, self.generation)
+            print(f"🗂️ [INDEX] Индекс кодов поколения {self.generation}: {self._index.count} записей.")
+        except (OSError, ValueError, struct.error) as e:
+            print(f"⚠️ [INDEX] Индекс кодов не открыт: {e}")
+
+    def _current(self):
+        index = self._index
+        if index is None and time.monotonic() - self._checked_at > REOPEN_INTERVAL:
+            # Поколение опубликовано раньше, чем импортер дописал файл
+            with self._lock:
+                if self._index is None:
+                    self._open()
+                index = self._index
+        return index
+
+    def find(self, code):
+        """
+        (True, JSON-байты) — компания найдена; (True, None) — такой компании нет;
+        (False, None) — индекс ответить не может (нет файла, нечисловой код), спросите БД.
+        """
+        key = canonical_code(code)
+        if key is None:
+            return False, None
+        index = self._current()
+        if index is None:
+            return False, None
+        i = bisect_left(index.codes, key)
+        if i < index.count and index.codes[i] == key:
+            return True, bytes(index.blob[index.offsets[i]:index.offsets[i + 1]])
+        return True, None
+
+    def stats(self):
+        index = self._index
+        return {
+            "generation": self.generation,
+            "loaded": index is not None,
+            "entries": index.count if index is not None else None,
+        }
+
+
+# Индекс для GET /api/v1/company/{code} и пакетного поиска
+code_index = CodeIndex()
@@ -0,0 +1,119 @@
+# company-registry-lt/app/services/dictionaries.py
+"""
+Справочники правовых форм и статусов (таблицы legal_forms, statuses).
+
+Импортер собирает пары (код, название) из кусков JAR (колонки читаются
+как pandas category — повторяющиеся строки не копируются в каждую запись)
+и дополняет справочники до публикации поколения. В companies остаются только коды.
+Процессы без карты в памяти (выгрузка, индекс кодов в импортере) получают
+названия JOIN-ом: NAMES_JOIN и NAME_COLUMNS.
+"""
+import re
+
+from sqlalchemy import inspect
+
+from app.models.legal_form import LegalForm
+from app.models.status import Status
+
+# Справочник: (таблица, колонка кода в JAR-куске, колонка названия в JAR-куске)
+DICTIONARIES = [
+    ("legal_forms", "legal_form_code", "legal_form_name"),
+    ("statuses", "status_code", "status_name"),
+]
+# Колонки названий, которых нет в companies
+NAME_COLUMNS = {
+    "legal_form_name": "legal_forms.name",
+    "status_name": "statuses.name",
+}
+NAMES_JOIN = (
+    "LEFT JOIN legal_forms ON legal_forms.code = companies.legal_form_code "
+    "LEFT JOIN statuses ON statuses.code = companies.status_code"
+)
+
+
+class DictionaryCollector:
+    """Пары (код, название) из кусков JAR; при повторе кода побеждает последнее название."""
+
+    def __init__(self):
+        self.names = {table: {} for table, _, _ in DICTIONARIES}
+
+    def add(self, chunk):
+        for table, code_column, name_column in DICTIONARIES:
+            pairs = chunk[[code_column, name_column]].dropna().drop_duplicates()
+            for code, name in pairs.itertuples(index=False, name=None):
+                try:
+                    self.names[table][int(code)] = name
+                except ValueError:
+                    # Нечисловой код в колонку Integer не попадёт — и в справочник тоже
+                    continue
+
+
+def save_dictionaries(conn, collector):
+    """Дополняет справочники в транзакции conn (название по коду обновляется). Возвращает число строк."""
+    saved = 0
+    for table, _, _ in DICTIONARIES:
+        rows = list(collector.names[table].items())
+        if rows:
+            conn.exec_driver_sql(
+                f"INSERT INTO {table} (code, name) VALUES (?, ?) "
+                "ON CONFLICT(code) DO UPDATE SET name = excluded.name",
+                rows,
+            )
+            saved += len(rows)
+    return saved
+
+
+# Таблицы, где до справочников хранились названия: живая, поколения для отката, история
+_NAMED_TABLES = re.compile(r"companies(_\d+)?|company_history")
+
+
+def fill_dictionaries_from_companies(conn):
+    """
+    Миграция базы, где названия хранились в каждой строке (legal_form_name,
+    status_name): справочники заполняются из этих колонок, чтобы API до первого
+    импорта не остался без названий. Существующие записи справочников не меняются.
+    Возвращает число добавленных строк.
+    """
+    inspector = inspect(conn)
+    # Живая таблица первой: её названия самые свежие
+    tables = sorted(
+        (t for t in inspector.get_table_names() if _NAMED_TABLES.fullmatch(t)),
+        key=lambda t: t != "companies",
+    )
+    added = 0
+    for table in tables:
+        columns = {c["name"] for c in inspector.get_columns(table)}
+        for dictionary, code_column, name_column in DICTIONARIES:
+            if code_column not in columns or name_column not in columns:
+                continue
+            added += conn.exec_driver_sql(
+                f'INSERT INTO {dictionary} (code, name) '
+                f'SELECT {code_column}, MAX({name_column}) FROM "{table}" '
+                f"WHERE {code_column} IS NOT NULL AND {name_column} IS NOT NULL AND {name_column} != '' "
+                f"GROUP BY {code_column} "
+                "ON CONFLICT(code) DO NOTHING"
+            ).rowcount
+    return added
+
+
+def company_columns_sql(columns):
+    """Список колонок SELECT по companies (+ NAMES_JOIN): названия — из справочников."""
+    return ", ".join(
+        f"{NAME_COLUMNS[c]} AS {c}" if c in NAME_COLUMNS else f"companies.{c}" for c in columns
+    )
+
+
+def name_columns():
+    """Колонки названий для запросов SQLAlchemy (с outerjoin по legal_forms и statuses)."""
+    return {
+        "legal_form_name": LegalForm.name.label("legal_form_name"),
+        "status_name": Status.name.label("status_name"),
+    }
+
+
+def join_names(stmt, company_model):
+    """Добавляет к запросу по company_model LEFT JOIN справочников."""
+    return (
+        stmt.outerjoin(LegalForm, LegalForm.code == company_model.legal_form_code)
+        .outerjoin(Status, Status.code == company_model.status_code)
+    )
@@ -0,0 +1,153 @@
+# company-registry-lt/app/services/export.py
+"""
+Выгрузка всего реестра.
+
+1. Потоковая выгрузка (CSV / NDJSON, gzip) — строки читаются курсором
+   на стороне сервера частями и сразу сжимаются, память не зависит от размера таблицы.
+2. Parquet-снимок активного поколения — пишется импортером после публикации
+   поколения, отдаётся как файл (ETag, Range). Нужен pyarrow (необязательная зависимость).
+"""
+import os
+import io
+import csv
+import json
+import zlib
+from sqlalchemy import select, Float, type_coerce
+
+from app.core.db import ReadSessionLocal, BASE_DIR
+from app.models.company import Company
+from app.models.generation import DataGeneration
+from app.schemas.company import CompanyResponse
+from app.services.dictionaries import name_columns, join_names
+
+EXPORT_DIR = os.path.join(BASE_DIR, "data", "export")
+
+# Колонки выгрузки — те же, что в ответе API
+EXPORT_COLUMNS = list(CompanyResponse.model_fields)
+
+# Строк за одно чтение из курсора
+EXPORT_BATCH_ROWS = 5000
+
+
+def export_select(conditions=()):
+    names = name_columns()
+    columns = [
+        type_coerce(Company.authorized_capital, Float).label("authorized_capital")
+        if name == "authorized_capital" else names[name] if name in names else getattr(Company, name)
+        for name in EXPORT_COLUMNS
+    ]
+    # Названия формы и статуса — из справочников (выгрузку пишет и импортер, без карты в памяти)
+    stmt = join_names(select(*columns).select_from(Company), Company)
+    return stmt.where(*conditions).order_by(Company.code)
+
+
+def _csv_lines(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _ndjson_lines(rows):
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False, default=str) + "\n"
+        for row in rows
+    )
+
+
+async def stream_export(conditions, fmt="csv"):
+    """
+    Отдаёт gzip-поток выгрузки. Все части читаются в одной транзакции,
+    поэтому выгрузка согласована, даже если импортер переключит поколение посередине.
+    """
+    # wbits=31: формат gzip (заголовок + CRC), а не голый deflate
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    if fmt == "csv":
+        yield compressor.compress(_csv_lines([], header=True).encode("utf-8"))
+
+    # Своя сессия: ответ отдаётся уже после выхода из обработчика
+    async with ReadSessionLocal() as db:
+        result = await db.stream(
+            export_select(conditions).execution_options(yield_per=EXPORT_BATCH_ROWS)
+        )
+        async for rows in result.partitions():
+            text = _csv_lines(rows) if fmt == "csv" else _ndjson_lines(rows)
+            chunk = compressor.compress(text.encode("utf-8"))
+            if chunk:
+                yield chunk
+
+    yield compressor.flush()
+
+
+# --- Parquet-снимок ---
+
+def snapshot_path(generation_id):
+    return os.path.join(EXPORT_DIR, f"companies_{generation_id}.parquet")
+
+
+def _parquet_schema(pa):
+    types = {
+        "legal_form_code": pa.int32(),
+        "status_code": pa.int32(),
+        "registration_date": pa.date32(),
+        "status_date_from": pa.date32(),
+        "data_updated_at": pa.date32(),
+        "pvm_date": pa.date32(),
+        "authorized_capital": pa.float64(),
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name in EXPORT_COLUMNS])
+
+
+def write_parquet_snapshot(engine, generation_id):
+    """
+    Пишет снимок активной таблицы companies (частями, через временный файл).
+    Возвращает путь или None (нет pyarrow / ошибка — импорт от этого не страдает).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("⚠️ [EXPORT] pyarrow не установлен — Parquet-снимок не создаётся.")
+        return None
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = snapshot_path(generation_id)
+    tmp_path = path + ".tmp"
+    schema = _parquet_schema(pa)
+    try:
+        with engine.connect() as conn, pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            result = conn.execution_options(yield_per=50000).execute(export_select())
+            for rows in result.partitions():
+                columns = list(zip(*rows))
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema,
+                ))
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ [EXPORT] Ошибка записи Parquet-снимка: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    print(f"📦 [EXPORT] Parquet-снимок поколения {generation_id}: {os.path.getsize(path) // 1024} КБ.")
+    prune_snapshots(engine)
+    return path
+
+
+def prune_snapshots(engine):
+    """Оставляет снимки только тех поколений, которые активны или доступны для отката."""
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    with engine.connect() as conn:
+        keep = set(conn.execute(
+            select(DataGeneration.id).where(DataGeneration.status.in_(["active", "retired"]))
+        ).scalars())
+    for name in os.listdir(EXPORT_DIR):
+        if not (name.startswith("companies_") and name.endswith(".parquet")):
+            continue
+        generation_id = name[len("companies_"):-len(".parquet")]
+        if generation_id.isdigit() and int(generation_id) not in keep:
+            os.remove(os.path.join(EXPORT_DIR, name))
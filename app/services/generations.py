@@ -0,0 +1,305 @@
+# company-registry-lt/app/services/generations.py
+"""
+Поколения данных: теневая сборка и атомарное переключение таблиц.
+
+Новое поколение собирается в таблицах companies_<N>, пока живая таблица
+companies продолжает обслуживать API. Переключение — одна транзакция
+из RENAME: живая таблица уходит под суффикс своего поколения, новая
+занимает её имя. Старые поколения хранятся для отката до лимита
+settings.generation_retention.
+"""
+import json
+from datetime import datetime
+from sqlalchemy import inspect, insert, select, update, text
+
+from app.core.config import settings
+from app.core.metrics import family
+from app.models.generation import DataGeneration
+
+# Таблицы, которые собираются рядом и переключаются вместе
+GENERATION_TABLES = ["companies", "companies_fts", "companies_trgm", "company_stats"]
+
+
+class GenerationError(Exception):
+    """Поколение не прошло проверку и не может быть включено."""
+
+
+# Подписчики на смену активного поколения (кэши API в этом же процессе)
+_listeners = []
+
+
+def add_generation_listener(callback):
+    """Регистрирует callback(generation_id), вызываемый после смены активного поколения."""
+    _listeners.append(callback)
+
+
+def notify_generation_changed(generation_id):
+    """Оповещает подписчиков. Вызывать только после фиксации транзакции переключения."""
+    for callback in _listeners:
+        try:
+            callback(generation_id)
+        except Exception as e:
+            print(f"⚠️ [GENERATIONS] Ошибка обработчика смены поколения: {e}")
+
+
+def shadow_name(base, storage_id):
+    """Имя физической таблицы поколения: companies -> companies_<storage_id>."""
+    return f"{base}_{storage_id}"
+
+
+def _has_table(conn, name):
+    return inspect(conn).has_table(name)
+
+
+def _rename(conn, old, new):
+    conn.exec_driver_sql(f'ALTER TABLE "{old}" RENAME TO "{new}"')
+
+
+def _active(conn):
+    return conn.execute(
+        select(DataGeneration).where(DataGeneration.status == "active")
+    ).first()
+
+
+def get_active_generation(engine):
+    """Возвращает активное поколение (строку) или None."""
+    with engine.connect() as conn:
+        return _active(conn)
+
+
+def start_generation(engine):
+    """
+    Регистрирует новое поколение в статусе building и возвращает его id.
+    Живая таблица companies без записи о поколении (база до введения поколений)
+    сначала регистрируется как активное legacy-поколение, чтобы её можно было откатить.
+    Пустая таблица (её создаёт init_schema в новой базе) не регистрируется:
+    откатываться на неё незачем, при публикации она просто удаляется.
+    """
+    with engine.begin() as conn:
+        now = datetime.now()
+        rows = 0
+        if _active(conn) is None and _has_table(conn, "companies"):
+            rows = conn.execute(text("SELECT COUNT(*) FROM companies")).scalar()
+        if rows > 0:
+            legacy_id = conn.execute(
+                insert(DataGeneration).values(
+                    status="active", mode="legacy", row_count=rows,
+                    created_at=now, published_at=now,
+                )
+            ).inserted_primary_key[0]
+            conn.execute(
+                update(DataGeneration)
+                .where(DataGeneration.id == legacy_id)
+                .values(storage_id=legacy_id)
+            )
+
+        generation_id = conn.execute(
+            insert(DataGeneration).values(status="building", mode="full", created_at=now)
+        ).inserted_primary_key[0]
+        conn.execute(
+            update(DataGeneration)
+            .where(DataGeneration.id == generation_id)
+            .values(storage_id=generation_id)
+        )
+    return generation_id
+
+
+def validate_generation(engine, generation_id, expected_rows):
+    """Проверяет теневую таблицу перед переключением. Возвращает число строк."""
+    table = shadow_name("companies", generation_id)
+    with engine.connect() as conn:
+        rows = conn.execute(text(f'SELECT COUNT(*) FROM "{table}"')).scalar()
+        active = _active(conn)
+
+    if rows == 0:
+        raise GenerationError("новое поколение пустое")
+    if rows != expected_rows:
+        raise GenerationError(f"записано {rows} строк, ожидалось {expected_rows}")
+    if active is not None and active.row_count:
+        min_rows = int(active.row_count * settings.generation_min_row_ratio)
+        if rows < min_rows:
+            raise GenerationError(
+                f"{rows} строк против {active.row_count} в активном поколении (минимум {min_rows})"
+            )
+    return rows
+
+
+def publish_generation(engine, generation_id, row_count, before_commit=None):
+    """
+    Атомарно включает собранное поколение вместо активного.
+    before_commit(conn) — что записать в той же транзакции, уже по новым таблицам
+    (история, лента изменений): API видит поколение только вместе с ними.
+    """
+    with engine.begin() as conn:
+        active = _active(conn)
+        for base in GENERATION_TABLES:
+            if _has_table(conn, base):
+                if active is not None:
+                    _rename(conn, base, shadow_name(base, active.storage_id))
+                else:
+                    conn.exec_driver_sql(f'DROP TABLE "{base}"')
+            if _has_table(conn, shadow_name(base, generation_id)):
+                _rename(conn, shadow_name(base, generation_id), base)
+
+        if active is not None:
+            conn.execute(
+                update(DataGeneration)
+                .where(DataGeneration.id == active.id)
+                .values(status="retired")
+            )
+        conn.execute(
+            update(DataGeneration)
+            .where(DataGeneration.id == generation_id)
+            .values(status="active", row_count=row_count, published_at=datetime.now())
+        )
+        if before_commit is not None:
+            before_commit(conn)
+    notify_generation_changed(generation_id)
+
+
+def publish_incremental(conn, base_generation, row_count, inserted, updated, deleted):
+    """
+    Регистрирует поколение, полученное применением изменений к таблицам активного.
+    Вызывается внутри той же транзакции, что и сами изменения. Возвращает id поколения.
+    После фиксации транзакции вызывающий должен вызвать notify_generation_changed.
+    """
+    now = datetime.now()
+    generation_id = conn.execute(
+        insert(DataGeneration).values(
+            storage_id=base_generation.storage_id, status="active", mode="incremental",
+            row_count=row_count, rows_inserted=inserted, rows_updated=updated,
+            rows_deleted=deleted, created_at=now, published_at=now,
+        )
+    ).inserted_primary_key[0]
+    conn.execute(
+        update(DataGeneration)
+        .where(DataGeneration.id == base_generation.id)
+        .values(status="superseded")
+    )
+    return generation_id
+
+
+def record_stage_timings(engine, generation_id, timings):
+    """Сохраняет тайминги стадий импорта, который создал поколение."""
+    with engine.begin() as conn:
+        conn.execute(
+            update(DataGeneration)
+            .where(DataGeneration.id == generation_id)
+            .values(stage_timings=json.dumps(timings))
+        )
+
+
+def discard_generation(engine, generation_id):
+    """Удаляет таблицы неудачной сборки и помечает поколение как failed."""
+    with engine.begin() as conn:
+        for base in GENERATION_TABLES:
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{shadow_name(base, generation_id)}"')
+        conn.execute(
+            update(DataGeneration)
+            .where(DataGeneration.id == generation_id)
+            .values(status="failed")
+        )
+
+
+def prune_generations(engine, keep=None):
+    """Удаляет таблицы поколений сверх лимита хранения. Возвращает список удалённых id."""
+    keep = settings.generation_retention if keep is None else keep
+    with engine.begin() as conn:
+        retired = conn.execute(
+            select(DataGeneration)
+            .where(DataGeneration.status == "retired")
+            .order_by(DataGeneration.id.desc())
+        ).all()
+        dropped = []
+        for gen in retired[keep:]:
+            for base in GENERATION_TABLES:
+                conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{shadow_name(base, gen.storage_id)}"')
+            conn.execute(
+                update(DataGeneration)
+                .where(DataGeneration.id == gen.id)
+                .values(status="dropped")
+            )
+            dropped.append(gen.id)
+    return dropped
+
+
+def rollback_generation(engine):
+    """
+    Возвращает в работу последнее сохранённое поколение.
+    Текущее активное уходит в retired (его тоже можно вернуть). Возвращает id или None.
+    Пустое поколение (так раньше регистрировалась пустая таблица новой базы) не выбирается.
+    """
+    with engine.begin() as conn:
+        active = _active(conn)
+        target = conn.execute(
+            select(DataGeneration)
+            .where(DataGeneration.status == "retired", DataGeneration.row_count > 0)
+            .order_by(DataGeneration.id.desc())
+            .limit(1)
+        ).first()
+        if active is None or target is None:
+            return None
+
+        for base in GENERATION_TABLES:
+            if _has_table(conn, base):
+                _rename(conn, base, shadow_name(base, active.storage_id))
+            if _has_table(conn, shadow_name(base, target.storage_id)):
+                _rename(conn, shadow_name(base, target.storage_id), base)
+
+        conn.execute(
+            update(DataGeneration).where(DataGeneration.id == active.id).values(status="retired")
+        )
+        conn.execute(
+            update(DataGeneration)
+            .where(DataGeneration.id == target.id)
+            .values(status="active", published_at=datetime.now())
+        )
+    notify_generation_changed(target.id)
+    return target.id
+
+
+def generation_metrics(engine):
+    """
+    Коллектор /metrics: активное поколение, его возраст и стадии последнего
+    импорта, создавшего поколение (тайминги и строки из stage_timings).
+    """
+    with engine.connect() as conn:
+        active = _active(conn)
+        last = conn.execute(
+            select(DataGeneration.id, DataGeneration.mode, DataGeneration.stage_timings)
+            .where(DataGeneration.stage_timings.is_not(None))
+            .order_by(DataGeneration.id.desc())
+            .limit(1)
+        ).first()
+
+    lines = family(
+        "registry_data_generation_id", "gauge", "Номер активного поколения данных.",
+        [({}, active.id if active else None)],
+    )
+    lines += family(
+        "registry_data_generation_rows", "gauge", "Строк в активном поколении.",
+        [({}, active.row_count if active else None)],
+    )
+    published = active.published_at if active else None
+    lines += family(
+        "registry_data_generation_published_timestamp_seconds", "gauge",
+        "Время публикации активного поколения (unix).",
+        [({}, published.timestamp() if published else None)],
+    )
+    lines += family(
+        "registry_data_generation_age_seconds", "gauge", "Возраст активного поколения.",
+        [({}, round((datetime.now() - published).total_seconds(), 1) if published else None)],
+    )
+
+    timings = json.loads(last.stage_timings) if last else {}
+    labels = {"generation": str(last.id), "mode": last.mode} if last else {}
+    lines += family(
+        "registry_import_stage_seconds", "gauge",
+        "Суммарная длительность стадии последнего импорта с публикацией.",
+        [(dict(labels, stage=name), stage.get("seconds")) for name, stage in timings.items()],
+    )
+    lines += family(
+        "registry_import_stage_rows", "gauge", "Строк обработано на стадии последнего импорта с публикацией.",
+        [(dict(labels, stage=name), stage.get("rows")) for name, stage in timings.items()],
+    )
+    return lines
@@ -0,0 +1,107 @@
+# company-registry-lt/app/services/history.py
+"""
+История компаний: версии с интервалами [valid_from, valid_to).
+
+После каждого импорта живая таблица companies сверяется с текущими версиями
+(valid_to IS NULL): версия, с которой строка больше не совпадает, закрывается
+датой импорта, для новых и изменившихся компаний открывается новая версия.
+Сверка идёт с самой историей, а не с прошлым поколением, поэтому пропущенный
+шаг (сбой, откат) догоняется следующим полным импортом.
+"""
+from datetime import date
+from sqlalchemy import select, text, bindparam, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.history import CompanyHistory
+
+# Поля версии (кроме служебных)
+HISTORY_COLUMNS = [
+    c.name for c in CompanyHistory.__table__.columns
+    if c.name not in ("id", "code", "valid_from", "valid_to")
+]
+# data_updated_at — дата формирования выгрузки, меняется без изменения данных компании
+TRACKED_COLUMNS = [c for c in HISTORY_COLUMNS if c != "data_updated_at"]
+
+# Параметров в одном IN (...) (лимит переменных SQLite)
+HISTORY_BATCH = 500
+
+
+def _same_row(alias):
+    # IS — сравнение с учётом NULL
+    return " AND ".join(f"{alias}.{c} IS company_history.{c}" for c in TRACKED_COLUMNS)
+
+
+def record_history(conn, day=None, codes=None):
+    """
+    Сверяет историю с таблицей companies в транзакции conn.
+    codes — только эти коды (инкрементальный импорт), None — вся таблица.
+    Возвращает (закрыто версий, открыто версий).
+    """
+    day = (day or date.today()).isoformat()
+    unchanged = f"EXISTS (SELECT 1 FROM companies c WHERE c.code = company_history.code AND {_same_row('c')})"
+    # Версия, открытая этим же днём (повторный импорт), не нужна — удаляем, а не закрываем
+    # (>= — на случай, если часы ушли назад: пустой интервал valid_from >= valid_to не пишем)
+    drop_sql = (
+        "DELETE FROM company_history WHERE valid_to IS NULL "
+        f"AND valid_from >= :day AND NOT {unchanged}"
+    )
+    close_sql = f"UPDATE company_history SET valid_to = :day WHERE valid_to IS NULL AND NOT {unchanged}"
+    columns = ", ".join(HISTORY_COLUMNS)
+    open_sql = (
+        f"INSERT INTO company_history (code, valid_from, valid_to, {columns}) "
+        f"SELECT c.code, :day, NULL, {', '.join('c.' + col for col in HISTORY_COLUMNS)} "
+        "FROM companies c WHERE NOT EXISTS ("
+        "SELECT 1 FROM company_history WHERE company_history.code = c.code "
+        "AND company_history.valid_to IS NULL)"
+    )
+
+    if codes is None:
+        batches = [None]
+    else:
+        codes = list(codes)
+        batches = [codes[i:i + HISTORY_BATCH] for i in range(0, len(codes), HISTORY_BATCH)]
+
+    statements = [text(drop_sql), text(close_sql), text(open_sql)]
+    if codes is not None:
+        codes_param = bindparam("codes", expanding=True)
+        statements = [
+            text(drop_sql + " AND company_history.code IN :codes").bindparams(codes_param),
+            text(close_sql + " AND company_history.code IN :codes").bindparams(codes_param),
+            text(open_sql + " AND c.code IN :codes").bindparams(codes_param),
+        ]
+    drop, close, insert = statements
+
+    closed = opened = 0
+    for batch in batches:
+        params = {"day": day} if batch is None else {"day": day, "codes": batch}
+        closed += conn.execute(drop, params).rowcount
+        closed += conn.execute(close, params).rowcount
+        opened += conn.execute(insert, params).rowcount
+    return closed, opened
+
+
+# --- Чтение (API) ---
+
+async def company_history(db: AsyncSession, code):
+    """Все версии компании, от старой к новой."""
+    result = await db.execute(
+        select(CompanyHistory)
+        .where(CompanyHistory.code == code)
+        .order_by(CompanyHistory.valid_from)
+    )
+    return result.scalars().all()
+
+
+def _as_of(day):
+    return (
+        CompanyHistory.valid_from <= day,
+        or_(CompanyHistory.valid_to.is_(None), CompanyHistory.valid_to > day),
+    )
+
+
+async def companies_as_of(db: AsyncSession, codes, day):
+    """Версии компаний, действовавшие на дату day: {код: версия} (нет версии — нет ключа)."""
+    result = await db.execute(
+        select(CompanyHistory).where(CompanyHistory.code.in_(codes), *_as_of(day))
+    )
+    return {version.code: version for version in result.scalars()}
@@ -0,0 +1,248 @@
+# company-registry-lt/app/services/import_jobs.py
+"""
+Задания импорта: создание с блокировкой «одно за раз», запуск отдельного
+процесса-воркера, прогресс и отмена.
+
+Импорт (pandas, сборка индексов) нагружает CPU и держит GIL, поэтому в процессе
+API он не выполняется: API и планировщик создают запись в import_jobs и запускают
+`python -m app.services.import_worker <id>`. Блокировка — UNIQUE-колонка lock:
+второе активное задание просто не вставится, в том числе из другого процесса.
+Задания лежат в отдельной БД (jobs_engine), которую импорт не блокирует.
+
+Живость воркера определяется только по heartbeat_at (как аренда в leases): pid
+из общей jobs.db ничего не значит в другом контейнере или на другом хосте,
+а переиспользованный pid выдал бы умершее задание за живое.
+"""
+import sys
+import json
+import subprocess
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.db import BASE_DIR, jobs_engine, JobsSessionLocal
+from app.core.metrics import family
+from app.models.job import ImportJob
+
+ACTIVE_STATUSES = ("queued", "running")
+FINAL_STATUSES = ("succeeded", "skipped", "failed", "cancelled")
+
+
+class ImportJobBusy(Exception):
+    """Уже выполняется другое задание импорта."""
+
+    def __init__(self, job_id):
+        super().__init__(f"импорт уже выполняется (задание {job_id})")
+        self.job_id = job_id
+
+
+def _release_stale(conn):
+    """Снимает блокировку с заданий, от воркера которых давно нет heartbeat."""
+    deadline = datetime.now() - timedelta(seconds=settings.import_job_stale_sec)
+    conn.execute(
+        update(ImportJob)
+        .where(
+            ImportJob.status.in_(ACTIVE_STATUSES),
+            func.coalesce(ImportJob.heartbeat_at, ImportJob.created_at) < deadline,
+        )
+        .values(
+            status="failed", lock=None, finished_at=datetime.now(),
+            error="воркер импорта перестал отвечать",
+        )
+    )
+
+
+def active_job_id():
+    with jobs_engine.connect() as conn:
+        return conn.execute(
+            select(ImportJob.id).where(ImportJob.status.in_(ACTIVE_STATUSES))
+        ).scalar_one_or_none()
+
+
+def get_job(job_id):
+    with JobsSessionLocal() as session:
+        return session.get(ImportJob, job_id)
+
+
+def list_jobs(limit):
+    """Последние задания (новые сверху)."""
+    with JobsSessionLocal() as session:
+        return session.scalars(select(ImportJob).order_by(ImportJob.id.desc()).limit(limit)).all()
+
+
+def create_job(params, trigger):
+    """Регистрирует задание в статусе queued. Если уже есть активное — ImportJobBusy."""
+    try:
+        with jobs_engine.begin() as conn:
+            _release_stale(conn)
+            return conn.execute(
+                insert(ImportJob).values(
+                    status="queued", lock=1, trigger=trigger, params=json.dumps(params),
+                    cancel_requested=False, created_at=datetime.now(),
+                )
+            ).inserted_primary_key[0]
+    except IntegrityError:
+        raise ImportJobBusy(active_job_id())
+
+
+def spawn_worker(job_id):
+    """Запускает процесс воркера (своя сессия: не получает Ctrl+C/сигналы процесса API)."""
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.services.import_worker", str(job_id)],
+        cwd=BASE_DIR,
+        start_new_session=True,
+    )
+
+
+def start_import_job(params, trigger, on_finish=None):
+    """
+    Создаёт задание и запускает воркер. Возвращает id задания.
+    on_finish(job_id) вызывается в процессе API после завершения воркера.
+    """
+    job_id = create_job(params, trigger)
+    try:
+        process = spawn_worker(job_id)
+    except Exception as e:
+        finish_job(job_id, "failed", error=f"не удалось запустить воркер: {e}")
+        raise
+
+    threading.Thread(
+        target=_watch_worker, args=(job_id, process, on_finish),
+        name=f"import-job-{job_id}", daemon=True,
+    ).start()
+    return job_id
+
+
+def _watch_worker(job_id, process, on_finish):
+    code = process.wait()
+    # Воркер упал, не успев записать итог (kill, нехватка памяти в ОС)
+    with jobs_engine.begin() as conn:
+        conn.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status.in_(ACTIVE_STATUSES))
+            .values(
+                status="failed", lock=None, finished_at=datetime.now(),
+                error=f"воркер завершился с кодом {code}",
+            )
+        )
+    if on_finish is not None:
+        on_finish(job_id)
+
+
+def request_cancel(job_id):
+    """Просит воркер остановиться. Возвращает статус задания или None, если его нет."""
+    with jobs_engine.begin() as conn:
+        job = conn.execute(select(ImportJob).where(ImportJob.id == job_id)).first()
+        if job is None:
+            return None
+        if job.status in ACTIVE_STATUSES:
+            conn.execute(
+                update(ImportJob).where(ImportJob.id == job_id).values(cancel_requested=True)
+            )
+        return job.status
+
+
+# --- Вызовы из воркера ---
+
+def mark_running(job_id, pid):
+    """Переводит задание в running. Возвращает параметры импорта или None (задание отменено/чужое)."""
+    with jobs_engine.begin() as conn:
+        job = conn.execute(select(ImportJob).where(ImportJob.id == job_id)).first()
+        if job is None or job.status != "queued":
+            return None
+        if job.cancel_requested:
+            conn.execute(
+                update(ImportJob).where(ImportJob.id == job_id).values(
+                    status="cancelled", lock=None, finished_at=datetime.now(),
+                )
+            )
+            return None
+        now = datetime.now()
+        conn.execute(
+            update(ImportJob).where(ImportJob.id == job_id).values(
+                status="running", pid=pid, started_at=now, heartbeat_at=now,
+            )
+        )
+        return json.loads(job.params or "{}")
+
+
+def report_progress(job_id, stage, rows_processed, rows_per_sec):
+    """
+    Heartbeat с прогрессом. Возвращает True, если воркеру пора остановиться:
+    запрошена отмена или задание уже снято как зависшее (блокировку мог занять другой импорт).
+    """
+    with jobs_engine.begin() as conn:
+        conn.execute(
+            update(ImportJob).where(ImportJob.id == job_id).values(
+                stage=stage, rows_processed=rows_processed, rows_per_sec=rows_per_sec,
+                heartbeat_at=datetime.now(),
+            )
+        )
+        job = conn.execute(
+            select(ImportJob.status, ImportJob.cancel_requested).where(ImportJob.id == job_id)
+        ).first()
+        return job is None or job.cancel_requested or job.status not in ACTIVE_STATUSES
+
+
+def finish_job(job_id, status, generation_id=None, error=None, **progress):
+    """Итог задания. Задание, уже снятое как зависшее, свой статус (failed) сохраняет."""
+    with jobs_engine.begin() as conn:
+        conn.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status.in_(ACTIVE_STATUSES))
+            .values(
+                status=status, lock=None, generation_id=generation_id, error=error,
+                finished_at=datetime.now(), **progress,
+            )
+        )
+
+
+def job_metrics():
+    """Коллектор /metrics: итоги заданий импорта и прогресс текущего."""
+    with jobs_engine.connect() as conn:
+        by_status = conn.execute(
+            select(ImportJob.status, func.count()).group_by(ImportJob.status)
+        ).all()
+        last_success = conn.execute(
+            select(func.max(ImportJob.finished_at))
+            .where(ImportJob.status.in_(("succeeded", "skipped")))
+        ).scalar()
+        last = conn.execute(
+            select(ImportJob.status, ImportJob.finished_at)
+            .where(ImportJob.status.in_(FINAL_STATUSES))
+            .order_by(ImportJob.id.desc()).limit(1)
+        ).first()
+        running = conn.execute(
+            select(ImportJob).where(ImportJob.status.in_(ACTIVE_STATUSES))
+        ).first()
+
+    lines = family(
+        "registry_import_jobs", "gauge", "Задания импорта в журнале по статусу.",
+        [({"status": status}, count) for status, count in by_status],
+    )
+    lines += family(
+        "registry_import_last_success_timestamp_seconds", "gauge",
+        "Когда последний импорт завершился успешно (unix).",
+        [({}, last_success.timestamp() if last_success else None)],
+    )
+    lines += family(
+        "registry_import_last_success", "gauge", "1, если последнее завершённое задание импорта успешно.",
+        [({}, int(last.status in ("succeeded", "skipped")) if last else None)],
+    )
+    lines += family(
+        "registry_import_running", "gauge", "1, пока выполняется задание импорта.",
+        [({}, int(running is not None))],
+    )
+    if running is not None:
+        labels = {"job": str(running.id), "stage": running.stage or ""}
+        lines += family(
+            "registry_import_running_rows", "gauge", "Строк обработано текущим заданием импорта.",
+            [(labels, running.rows_processed or 0)],
+        )
+        lines += family(
+            "registry_import_running_rows_per_second", "gauge", "Скорость текущего задания импорта.",
+            [(labels, running.rows_per_sec)],
+        )
+    return lines
@@ -0,0 +1,113 @@
+# company-registry-lt/app/services/import_worker.py
+"""
+Процесс-воркер импорта: python -m app.services.import_worker <job_id>
+
+Выполняет run_full_import с параметрами задания, раз в несколько секунд пишет
+в import_jobs стадию, число строк и скорость (heartbeat) и проверяет запрос отмены.
+"""
+import os
+import sys
+import time
+import threading
+
+from app.core.config import settings
+from app.services.import_jobs import mark_running, report_progress, finish_job
+from app.services.pipeline import ImportCancelled
+from app.services.registry_importer import run_full_import
+
+# С этих стадий поколение уже публикуется — отменять поздно
+COMMIT_STAGES = ("publish", "snapshot", "code_index", "checkpoint")
+
+
+class JobProgress:
+    """Получатель прогресса для StageTimer: состояние в памяти, в БД его пишет heartbeat."""
+
+    def __init__(self):
+        self.stage_name = None
+        self.rows_processed = 0
+        # Скорость считаем с первого куска: до него идут скачивание и разбор
+        self.first_rows_at = None
+        self.first_rows = 0
+        self.error = None
+        self.cancel_requested = False
+        self.committing = False
+
+    def stage(self, name):
+        self.stage_name = name
+        if name in COMMIT_STAGES:
+            self.committing = True
+        self._check_cancel()
+
+    def rows(self, count):
+        if self.first_rows_at is None:
+            self.first_rows_at = time.time()
+            self.first_rows = count
+        self.rows_processed += count
+        self._check_cancel()
+
+    def failed(self, error):
+        self.error = str(error)
+
+    def rows_per_sec(self):
+        if self.first_rows_at is None:
+            return None
+        elapsed = time.time() - self.first_rows_at
+        if elapsed <= 0 or self.rows_processed == self.first_rows:
+            return None
+        return round((self.rows_processed - self.first_rows) / elapsed, 1)
+
+    def as_values(self):
+        return {
+            "stage": self.stage_name,
+            "rows_processed": self.rows_processed,
+            "rows_per_sec": self.rows_per_sec(),
+        }
+
+    def _check_cancel(self):
+        if self.cancel_requested and not self.committing:
+            raise ImportCancelled()
+
+
+def _heartbeat(job_id, progress, stop):
+    while not stop.wait(settings.import_job_heartbeat_sec):
+        try:
+            values = progress.as_values()
+            if report_progress(job_id, values["stage"], values["rows_processed"], values["rows_per_sec"]):
+                progress.cancel_requested = True
+        except Exception as e:
+            # Например, БД заданий кратко занята другим процессом — попробуем в следующий раз
+            print(f"⚠️ [WORKER] Heartbeat не записан: {e}")
+
+
+def run_job(job_id):
+    params = mark_running(job_id, os.getpid())
+    if params is None:
+        print(f"⏭️ [WORKER] Задание {job_id} не в очереди (отменено или уже выполняется).")
+        return
+
+    print(f"🚀 [WORKER] Задание импорта {job_id} (pid {os.getpid()}): {params}")
+    progress = JobProgress()
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job_id, progress, stop), daemon=True)
+    heartbeat.start()
+    try:
+        generation_id = run_full_import(**params, progress=progress)
+        if progress.error:
+            status = "failed"
+        else:
+            # None без ошибки: источники не изменились или изменений в данных нет
+            status = "succeeded" if generation_id is not None else "skipped"
+        finish_job(job_id, status, generation_id, progress.error, **progress.as_values())
+    except ImportCancelled:
+        finish_job(job_id, "cancelled", **progress.as_values())
+    except Exception as e:
+        print(f"❌ [WORKER] Задание {job_id} завершилось ошибкой: {e}")
+        finish_job(job_id, "failed", error=str(e), **progress.as_values())
+    finally:
+        stop.set()
+        heartbeat.join()
+    print(f"🏁 [WORKER] Задание импорта {job_id} завершено.")
+
+
+if __name__ == "__main__":
+    run_job(int(sys.argv[1]))
@@ -0,0 +1,51 @@
+# company-registry-lt/app/services/leader.py
+"""
+Выбор ведущего процесса через аренду строки в БД заданий.
+
+При нескольких воркерах uvicorn каждый выполняет lifespan, но ночной импорт
+должен планировать ровно один. Воркеры периодически вызывают renew(): держатель
+продлевает аренду, остальные могут её занять, только когда она истекла
+(держатель упал или завис). Один UPSERT с условием — атомарно и между процессами.
+"""
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert
+
+from app.core.db import jobs_engine
+from app.models.lease import Lease
+
+
+class LeaderLease:
+    def __init__(self, name, ttl):
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+
+    def renew(self):
+        """Занимает или продлевает аренду. Возвращает True, если этот процесс — ведущий."""
+        now = datetime.now()
+        stmt = insert(Lease).values(
+            name=self.name, holder=self.holder, expires_at=now + timedelta(seconds=self.ttl)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Lease.name],
+            set_={"holder": stmt.excluded.holder, "expires_at": stmt.excluded.expires_at},
+            where=(Lease.holder == self.holder) | (Lease.expires_at < now),
+        )
+        with jobs_engine.begin() as conn:
+            conn.execute(stmt)
+            holder = conn.execute(select(Lease.holder).where(Lease.name == self.name)).scalar()
+        self.is_leader = holder == self.holder
+        return self.is_leader
+
+    def release(self):
+        """Отдаёт роль (остановка процесса): другой воркер займёт её при следующем renew."""
+        if not self.is_leader:
+            return
+        with jobs_engine.begin() as conn:
+            conn.execute(delete(Lease).where(Lease.name == self.name, Lease.holder == self.holder))
+        self.is_leader = False
@@ -0,0 +1,132 @@
+# company-registry-lt/app/services/lookup.py
+"""
+Пакетный поиск компаний по кодам предприятий и кодам НДС (PVM).
+Коды разбиваются на куски и ищутся запросами IN (...) в одной сессии,
+чтобы не упираться в лимит параметров SQLite. Коды предприятий сначала
+ищутся в индексе кодов (app.services.code_index), в БД — только остальные.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.vat import normalize_pvm
+from app.models.company import Company
+from app.services.code_index import code_index, company_json
+from app.services.history import companies_as_of
+
+# Параметров в одном IN (...); старые сборки SQLite допускают не больше 999
+LOOKUP_CHUNK_SIZE = 500
+
+
+def normalize_codes(codes):
+    """Убирает пробелы, пустые значения и повторы (порядок сохраняется)."""
+    return list(dict.fromkeys(c.strip() for c in codes if c and c.strip()))
+
+
+def normalize_pvm_codes(pvm_codes):
+    """
+    Коды НДС ищутся по нормализованной форме (см. app.core.vat.normalize_pvm).
+    Возвращает {нормализованный код: код как в запросе}, без повторов и пустых.
+    """
+    normalized = {}
+    for code in pvm_codes:
+        norm = normalize_pvm(code)
+        if norm:
+            normalized.setdefault(norm, code)
+    return normalized
+
+
+def _chunks(items, size=LOOKUP_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def iter_companies_by(db: AsyncSession, column, values):
+    """Отдаёт по кускам values пары (кусок, найденные по нему компании)."""
+    for part in _chunks(values):
+        result = await db.execute(select(Company).where(column.in_(part)))
+        yield part, result.scalars().all()
+
+
+async def iter_company_bodies(db: AsyncSession, codes, as_of=None):
+    """
+    Отдаёт по кускам codes пары (кусок, {код: JSON-байты компании}).
+    Что может — отвечает индекс кодов, по остальным кодам куска — один запрос к БД.
+    as_of — версии на дату из истории (индекс и companies не используются).
+    """
+    for part in _chunks(codes):
+        if as_of is not None:
+            versions = await companies_as_of(db, part, as_of)
+            yield part, {code: company_json(v) for code, v in versions.items()}
+            continue
+        bodies = {}
+        rest = []
+        for code in part:
+            answered, body = code_index.find(code)
+            if not answered:
+                rest.append(code)
+            elif body is not None:
+                bodies[code] = body
+        if rest:
+            result = await db.execute(select(Company).where(Company.code.in_(rest)))
+            bodies.update((c.code, company_json(c)) for c in result.scalars())
+        yield part, bodies
+
+
+async def lookup_company_bodies(db: AsyncSession, codes, pvm_codes=None, as_of=None):
+    """
+    Как lookup_companies, но найденные компании — готовые JSON-байты (как в ответе API).
+    as_of — версии кодов предприятий на дату (см. iter_company_bodies).
+    Возвращает (found, missing_codes, missing_pvm_codes).
+    """
+    pvm_codes = pvm_codes or {}
+
+    found = {}
+    missing_codes = []
+    async for part, bodies in iter_company_bodies(db, codes, as_of):
+        for code in part:
+            if code in bodies:
+                found[code] = bodies[code]
+            else:
+                missing_codes.append(code)
+
+    by_pvm = {}
+    async for _, companies in iter_companies_by(db, Company.pvm_code_norm, list(pvm_codes)):
+        by_pvm.update((c.pvm_code_norm, c) for c in companies)
+    for pvm in pvm_codes:
+        company = by_pvm.get(pvm)
+        if company is not None and company.code not in found:
+            found[company.code] = company_json(company)
+
+    missing_pvm = [original for norm, original in pvm_codes.items() if norm not in by_pvm]
+    return list(found.values()), missing_codes, missing_pvm
+
+
+async def lookup_companies(db: AsyncSession, codes, pvm_codes=None):
+    """
+    codes и pvm_codes — уже нормализованные (normalize_codes / normalize_pvm_codes).
+    Возвращает (found, missing_codes, missing_pvm_codes).
+    found — компании в порядке запроса (сначала по кодам, затем по НДС), без повторов.
+    missing_pvm_codes — в том написании, в каком пришли в запросе.
+    """
+    pvm_codes = pvm_codes or {}
+
+    by_code = {}
+    async for _, companies in iter_companies_by(db, Company.code, codes):
+        by_code.update((c.code, c) for c in companies)
+
+    by_pvm = {}
+    async for _, companies in iter_companies_by(db, Company.pvm_code_norm, list(pvm_codes)):
+        by_pvm.update((c.pvm_code_norm, c) for c in companies)
+
+    found = {}
+    for code in codes:
+        if code in by_code:
+            found[code] = by_code[code]
+    for pvm in pvm_codes:
+        company = by_pvm.get(pvm)
+        if company is not None:
+            found.setdefault(company.code, company)
+
+    missing_codes = [c for c in codes if c not in by_code]
+    missing_pvm = [original for norm, original in pvm_codes.items() if norm not in by_pvm]
+    return list(found.values()), missing_codes, missing_pvm
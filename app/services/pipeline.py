@@ -0,0 +1,142 @@
+# company-registry-lt/app/services/pipeline.py
+"""
+Вспомогательные средства конвейера импорта: тайминги стадий,
+оповещение о прогрессе и фоновая предвыборка кусков данных.
+"""
+import time
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class ImportCancelled(Exception):
+    """Импорт остановлен по запросу (отмена задания)."""
+
+
+class StageTimer:
+    """
+    Тайминги стадий импорта.
+    Для стадии хранится начало и конец (секунды от старта импорта) и суммарная
+    длительность: стадии идут параллельно и повторяются по кускам, поэтому
+    критический путь виден по концам стадий, а не по сумме длительностей.
+
+    listener (необязательно) получает прогресс: stage(name) при входе в стадию,
+    rows(n) после записи/сравнения куска, failed(error) при ошибке импорта.
+    Listener может прервать импорт, выбросив ImportCancelled.
+    """
+
+    def __init__(self, listener=None):
+        self.started = time.time()
+        self.stages = {}
+        # Строк обработано на стадии (для отчёта и метрик)
+        self.stage_rows = {}
+        self.listener = listener
+        # Ошибка импорта (failed): по ней вызывающий узнаёт, что обработка не удалась
+        self.error = None
+        # Стадии отмечаются из потоков скачивания, предвыборки и колбэков пула
+        self._lock = threading.Lock()
+
+    def add(self, name, start, end):
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                self.stages[name] = {
+                    "start": start - self.started,
+                    "end": end - self.started,
+                    "seconds": end - start,
+                }
+            else:
+                stage["end"] = end - self.started
+                stage["seconds"] += end - start
+
+    @contextmanager
+    def stage(self, name):
+        if self.listener is not None:
+            self.listener.stage(name)
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.time())
+
+    def count(self, name, rows):
+        """Добавляет rows строк к счётчику стадии name (без оповещения listener)."""
+        with self._lock:
+            self.stage_rows[name] = self.stage_rows.get(name, 0) + rows
+
+    def rows(self, count, stage=None):
+        """Обработано ещё count строк источника (на стадии stage, если указана)."""
+        if stage is not None:
+            self.count(stage, count)
+        if self.listener is not None:
+            self.listener.rows(count)
+
+    def failed(self, error):
+        self.error = error
+        if self.listener is not None:
+            self.listener.failed(error)
+
+    def as_dict(self):
+        with self._lock:
+            result = {
+                name: {key: round(value, 3) for key, value in stage.items()}
+                for name, stage in self.stages.items()
+            }
+            for name, rows in self.stage_rows.items():
+                if name in result:
+                    result[name]["rows"] = rows
+            return result
+
+    def report(self):
+        print("⏱️ [IMPORTER] Стадии (начало → конец, сек от старта):")
+        for name, stage in sorted(self.stages.items(), key=lambda kv: kv[1]["start"]):
+            rows = self.stage_rows.get(name)
+            print(
+                f"   {name:<20} {stage['start']:8.2f} → {stage['end']:8.2f}"
+                f"   ({stage['seconds']:.2f} с)" + (f"  {rows} строк" if rows is not None else "")
+            )
+
+
+def prefetch(iterable, depth=2):
+    """
+    Выполняет итератор в фоновом потоке, держа наготове не больше depth элементов.
+    Пока потребитель пишет текущий кусок в БД, следующий уже читается и разбирается.
+    Ошибка в фоновом потоке пробрасывается потребителю.
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+    errors = []
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            put(done)
+
+    thread = threading.Thread(target=worker, name="import-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                break
+            yield item
+        if errors:
+            raise errors[0]
+    finally:
+        # Потребитель остановился раньше (ошибка, откат на полную сборку) — отпускаем поток
+        stop.set()
@@ -0,0 +1,154 @@
+# company-registry-lt/app/services/reconcile.py
+"""
+Сверка названий контрагентов с реестром (POST /api/v1/reconcile).
+
+Названия приходят без кодов и с опечатками, поэтому точный поиск и FTS по словам
+не годятся. Кандидаты ищутся по триграммам (блокировка): импортер строит
+триграммный индекс companies_trgm (FTS5, tokenize='trigram') по name_norm
+вместе с поколением данных. Для каждого названия в индексе ищутся только
+самые редкие его триграммы (частоты — из fts5vocab companies_trgm_vocab):
+не больше reconcile_block_terms и в сумме не больше reconcile_block_docs строк,
+поэтому цена запроса ограничена и не растёт с размером реестра, а опечатка
+портит лишь несколько триграмм из многих. Кандидаты — строки с наибольшим
+числом общих редких триграмм (не больше reconcile_candidates); они оцениваются
+коэффициентом Дайса по триграммам названия (и адреса, если он передан).
+"""
+from functools import lru_cache
+from sqlalchemy import text, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.services.search import normalize_text
+
+# Вес адреса в оценке, если клиент передал адрес
+ADDRESS_WEIGHT = 0.2
+
+# Параметров в одном IN (...) (лимит переменных SQLite)
+VOCAB_BATCH = 500
+
+_VOCAB_SQL = text(
+    "SELECT term, doc FROM companies_trgm_vocab WHERE term IN :terms"
+).bindparams(bindparam("terms", expanding=True))
+_EXACT_SQL = text(
+    "SELECT code, name, address, name_norm, address_norm FROM companies WHERE name_norm = :name LIMIT :limit"
+)
+
+
+def build_trigram_index(conn, companies_table, trgm_table):
+    """
+    Создаёт и заполняет триграммный индекс названий для (теневой) таблицы компаний.
+    Бесконтентный, detail='none': нужны только списки строк по триграммам.
+    """
+    conn.exec_driver_sql(
+        f'CREATE VIRTUAL TABLE "{trgm_table}" USING fts5('
+        f"name, content='', tokenize='trigram', detail='none')"
+    )
+    conn.exec_driver_sql(
+        f'INSERT INTO "{trgm_table}"(rowid, name) SELECT rowid, name_norm FROM "{companies_table}"'
+    )
+    conn.exec_driver_sql(f"INSERT INTO \"{trgm_table}\"(\"{trgm_table}\") VALUES('optimize')")
+    # Частоты триграмм; fts5vocab находит таблицу по имени при каждом запросе,
+    # поэтому одна таблица служит любому поколению, ставшему companies_trgm
+    conn.exec_driver_sql(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS companies_trgm_vocab USING fts5vocab(companies_trgm, 'row')"
+    )
+
+
+def index_trigrams(value):
+    """Триграммы строки так, как их хранит индекс (tokenize='trigram')."""
+    return {value[i:i + 3] for i in range(len(value) - 2)} if value else set()
+
+
+def score_trigrams(value):
+    """Триграммы для оценки: с пробелами по краям, чтобы учитывались начало и конец."""
+    return index_trigrams(f" {value} ") if value else set()
+
+
+def dice(a, b):
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+@lru_cache(maxsize=None)
+def _candidates_sql(terms):
+    """Строки с наибольшим числом общих триграмм из terms (подсчёт без bm25 — он дороже)."""
+    hits = " UNION ALL ".join(
+        f"SELECT rowid FROM companies_trgm WHERE companies_trgm MATCH :t{i}" for i in range(terms)
+    )
+    return text(
+        "SELECT c.code, c.name, c.address, c.name_norm, c.address_norm FROM ("
+        f"SELECT rowid, count(*) AS hits FROM ({hits}) GROUP BY rowid ORDER BY hits DESC LIMIT :limit"
+        ") t JOIN companies c ON c.rowid = t.rowid"
+    )
+
+
+def block_terms(grams, frequencies):
+    """
+    Самые редкие триграммы названия для поиска кандидатов: пока их не больше
+    reconcile_block_terms и суммарно они встречаются не чаще reconcile_block_docs раз.
+    Хотя бы одна (самая редкая) берётся всегда. Неизвестные индексу не берутся.
+    """
+    terms = []
+    docs = 0
+    for gram in sorted((g for g in grams if frequencies.get(g)), key=lambda g: (frequencies[g], g)):
+        if terms and (len(terms) >= settings.reconcile_block_terms
+                      or docs + frequencies[gram] > settings.reconcile_block_docs):
+            break
+        terms.append(gram)
+        docs += frequencies[gram]
+    return terms
+
+
+async def _document_frequencies(db: AsyncSession, terms):
+    frequencies = {}
+    terms = sorted(terms)
+    for i in range(0, len(terms), VOCAB_BATCH):
+        result = await db.execute(_VOCAB_SQL, {"terms": terms[i:i + VOCAB_BATCH]})
+        frequencies.update(result.all())
+    return frequencies
+
+
+async def reconcile_names(db: AsyncSession, items, limit=3, min_score=0.0):
+    """
+    items — [(название, адрес или None)]. Возвращает для каждого элемента список
+    кандидатов [{code, name, address, score}] по убыванию score (не больше limit).
+    Одинаковые названия в пакете ищутся один раз.
+    """
+    queries = [
+        (normalize_text(name, strip_legal_form=True) or "", normalize_text(address) if address else None)
+        for name, address in items
+    ]
+    frequencies = await _document_frequencies(
+        db, set().union(*(index_trigrams(name) for name, _ in queries))
+    )
+
+    candidates_by_name = {}
+    results = []
+    for name, address in queries:
+        if name not in candidates_by_name:
+            terms = block_terms(index_trigrams(name), frequencies)
+            if terms:
+                params = {f"t{i}": f'"{term}"' for i, term in enumerate(terms)}
+                result = await db.execute(
+                    _candidates_sql(len(terms)), dict(params, limit=settings.reconcile_candidates)
+                )
+            elif name:
+                # Короче трёх символов (или ни одной известной триграммы) — только точное совпадение
+                result = await db.execute(_EXACT_SQL, {"name": name, "limit": settings.reconcile_candidates})
+            else:
+                result = None
+            candidates_by_name[name] = result.all() if result is not None else []
+
+        name_grams = score_trigrams(name)
+        address_grams = score_trigrams(address)
+        scored = []
+        for row in candidates_by_name[name]:
+            score = dice(name_grams, score_trigrams(row.name_norm))
+            if address_grams:
+                score = (1 - ADDRESS_WEIGHT) * score + ADDRESS_WEIGHT * dice(address_grams, score_trigrams(row.address_norm))
+            if score >= min_score:
+                scored.append({"code": row.code, "name": row.name, "address": row.address, "score": round(score, 4)})
+        scored.sort(key=lambda c: (-c["score"], c["code"]))
+        results.append(scored[:limit])
+    return results
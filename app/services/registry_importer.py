@@ -1,19 +1,78 @@
 # company-registry-lt/app/services/registry_importer.py
 import os
+import json
+import time
+import hashlib
+import multiprocessing
 import requests
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
 import pandas as pd
-from sqlalchemy import text
+from sqlalchemy import text, bindparam, inspect, MetaData, Table, Column
 from sqlalchemy.orm import Session
-from app.core.db import sync_engine
+from app.core.config import settings
+from app.core.db import sync_engine, checkpoint_wal
+from app.core.vat import normalize_pvm
+from app.models.company import Company
+from app.models.stats import CompanyStats
 from app.models.settings import Setting
+from app.models.source import ImportSource
+from app.services.generations import (
+    start_generation, shadow_name, validate_generation, get_active_generation,
+    publish_generation, publish_incremental, discard_generation, prune_generations,
+    record_stage_timings, notify_generation_changed,
+)
+from app.services.pipeline import StageTimer, ImportCancelled, prefetch
+from app.services.search import build_search_index, normalize_series
+from app.services.reconcile import build_trigram_index
+from app.services.export import write_parquet_snapshot
+from app.services.code_index import write_code_index
+from app.services.history import record_history
+from app.services.changes import record_changes
+from app.services.dictionaries import DictionaryCollector, save_dictionaries
+from app.services.stats import (
+    StatsAccumulator, SOURCE_COLUMNS as STATS_COLUMNS, write_stats, rebuild_stats,
+    stats_for_codes, apply_stats_delta,
+)
 
 # Пути к файлам
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-TEMP_DIR = os.path.join(BASE_DIR, "data", "temp")
+TEMP_DIR = settings.import_dir or os.path.join(BASE_DIR, "data", "temp")
 JAR_PATH = os.path.join(TEMP_DIR, "JAR.csv")
 PVM_PATH = os.path.join(TEMP_DIR, "PVM.csv")
 CAPITAL_PATH = os.path.join(TEMP_DIR, "CAPITAL.csv")
 
+# Индексы таблицы компаний: (суффикс имени, колонки)
+COMPANY_INDEXES = [
+    ("name", "name"),
+    # Точное совпадение нормализованного названия (поиск)
+    ("name_norm", "name_norm"),
+    ("pvm", "pvm_code_norm"),
+    # Список /api/v1/companies: равенство по статусу/форме + keyset по code.
+    # Остальные колонки фильтров входят в индекс, чтобы отсеивать строки без чтения таблицы
+    ("list_status", "status_code, code, legal_form_code, registration_date, authorized_capital"),
+    ("list_form", "legal_form_code, code, status_code, registration_date, authorized_capital"),
+    ("list_code", "code, status_code, legal_form_code, registration_date, authorized_capital"),
+]
+
+
+def company_index_name(storage_id, suffix):
+    # Имена включают номер поколения: в SQLite они глобальны и переживают RENAME
+    return f"ix_companies_{storage_id}_{suffix}"
+
+# Порядок колонок таблицы companies (для executemany)
+COMPANY_COLUMNS = [c.name for c in Company.__table__.columns]
+# Колонки, по которым считается хэш строки
+HASH_COLUMNS = [c for c in COMPANY_COLUMNS if c != "row_hash"]
+
+def shadow_table(model, name):
+    """Таблица с колонками модели под другим именем (для теневой сборки)."""
+    columns = [
+        Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable)
+        for c in model.__table__.columns
+    ]
+    return Table(name, MetaData(), *columns)
+
 def get_url_from_db(key_name):
     """Получает URL из базы данных синхронно."""
     with Session(sync_engine) as session:
@@ -22,212 +81,887 @@ def get_url_from_db(key_name):
             return setting.value
     return None
 
-def download_file(url, path, name="FILE"):
+# Состояние источника: то, что хранится в import_sources (кроме key и дат)
+SOURCE_STATE_FIELDS = ("url", "etag", "last_modified", "size", "sha256")
+
+
+def load_source_state(key):
+    """Сохранённые метаданные источника (dict) или None."""
+    with Session(sync_engine) as session:
+        source = session.get(ImportSource, key)
+        if source is None:
+            return None
+        return {field: getattr(source, field) for field in SOURCE_STATE_FIELDS}
+
+
+def save_source_state(key, state, changed):
+    with Session(sync_engine) as session:
+        source = session.get(ImportSource, key) or ImportSource(key=key)
+        for field in SOURCE_STATE_FIELDS:
+            setattr(source, field, state.get(field))
+        now = datetime.now()
+        source.checked_at = now
+        if changed:
+            source.changed_at = now
+        session.add(source)
+        session.commit()
+
+
+def _file_sha256(path, hasher=None):
+    hasher = hasher or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(block)
+    return hasher
+
+
+def download_file(url, path, name="FILE", state=None):
+    """
+    Скачивает файл с условным запросом и докачкой.
+
+    state — метаданные прошлого скачивания (url, etag, last_modified, size, sha256) или None.
+    Если локальный файл совпадает с ними, отправляются If-None-Match / If-Modified-Since.
+    Файл пишется в <path>.part и атомарно переименовывается в path только целиком;
+    оборванная закачка продолжается со следующего запуска через Range + If-Range.
+
+    Возвращает (result, new_state): result — "changed", "unchanged" или None (ошибка).
+    """
     if not url:
         print(f"⚠️ [IMPORTER] URL для {name} не задан в настройках!")
-        return False
+        return None, state
         
     print(f"⬇️ [IMPORTER] Скачиваю {name}: {url}")
-    os.makedirs(TEMP_DIR, exist_ok=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    part_path = path + ".part"
+    # Валидатор ответа, с которого начата недокачанная часть
+    part_meta_path = part_path + ".json"
+
     try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
-        with requests.get(url, headers=headers, stream=True, timeout=120) as r:
+        # Без сжатия: Range и размеры должны относиться к самому файлу
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
+            'Accept-Encoding': 'identity',
+        }
+
+        resume_from = 0
+        part_meta = None
+        if os.path.exists(part_path) and os.path.exists(part_meta_path):
+            with open(part_meta_path, encoding='utf-8') as f:
+                part_meta = json.load(f)
+            validator = part_meta.get("etag") or part_meta.get("last_modified")
+            if part_meta.get("url") == url and validator and os.path.getsize(part_path) > 0:
+                resume_from = os.path.getsize(part_path)
+                headers['Range'] = f"bytes={resume_from}-"
+                headers['If-Range'] = validator
+
+        if (not resume_from and state and state.get("url") == url
+                and os.path.exists(path) and os.path.getsize(path) == state.get("size")):
+            if state.get("etag"):
+                headers['If-None-Match'] = state["etag"]
+            if state.get("last_modified"):
+                headers['If-Modified-Since'] = state["last_modified"]
+
+        with requests.get(url, headers=headers, stream=True, timeout=settings.download_timeout) as r:
+            if r.status_code == 304:
+                print(f"✅ [IMPORTER] {name} не изменился (304 Not Modified).")
+                return "unchanged", state
             if r.status_code == 404:
                  print(f"❌ [IMPORTER] Ошибка 404. Ссылка устарела: {url}")
-                 return False
+                 return None, state
             r.raise_for_status()
-            
-            with open(path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
+
+            if r.status_code == 206 and resume_from:
+                print(f"⏯️ [IMPORTER] Докачка {name} с {resume_from} байт.")
+                mode = 'ab'
+                hasher = _file_sha256(part_path)
+            else:
+                # Сервер прислал файл целиком (или файл изменился) — начинаем заново
+                resume_from = 0
+                mode = 'wb'
+                hasher = hashlib.sha256()
+                part_meta = {
+                    "url": url,
+                    "etag": r.headers.get('ETag'),
+                    "last_modified": r.headers.get('Last-Modified'),
+                }
+                with open(part_meta_path, 'w', encoding='utf-8') as f:
+                    json.dump(part_meta, f)
+
+            expected = r.headers.get('Content-Length')
+            expected = resume_from + int(expected) if expected is not None else None
+
+            with open(part_path, mode) as f:
+                for chunk in r.iter_content(chunk_size=settings.download_chunk_kb * 1024):
                     f.write(chunk)
-                    
+                    hasher.update(chunk)
+
+        size = os.path.getsize(part_path)
+        if expected is not None and size != expected:
+            # .part остаётся — следующий запуск докачает
+            print(f"❌ [IMPORTER] {name} скачан не полностью ({size} из {expected} байт).")
+            return None, state
+
+        os.replace(part_path, path)
+        os.remove(part_meta_path)
+
+        new_state = {
+            "url": url,
+            "etag": part_meta.get("etag"),
+            "last_modified": part_meta.get("last_modified"),
+            "size": size,
+            "sha256": hasher.hexdigest(),
+        }
+        if state and state.get("sha256") == new_state["sha256"]:
+            print(f"✅ [IMPORTER] {name} скачан, содержимое не изменилось.")
+            return "unchanged", new_state
+
         print(f"✅ [IMPORTER] {name} скачан.")
-        return True
+        return "changed", new_state
     except Exception as e:
         print(f"❌ [IMPORTER] Ошибка скачивания {name}: {e}")
-        return False
+        return None, state
+
+
+def download_source(key, url, path, name):
+    """
+    Скачивает источник с учётом сохранённого состояния. Возвращает (result, new_state).
+    Новое состояние не сохраняется: его сохраняет run_full_import после успешной обработки.
+    """
+    state = load_source_state(key)
+    return download_file(url, path, name, state)
+
+
+def save_source_states(downloads):
+    """Сохраняет состояние скачанных источников: downloads — {key: (result, state)}."""
+    for key, (result, state) in downloads.items():
+        if result in ("changed", "unchanged"):
+            save_source_state(key, state, changed=(result == "changed"))
         
-def process_and_save():
-    print("🔄 [IMPORTER] Обработка данных (Merge)...")
-    
-    if not os.path.exists(JAR_PATH):
-        print("❌ [IMPORTER] Файл реестра JAR не найден. Пропуск.")
+# Колонки JAR и их имена в таблице companies
+JAR_COLUMNS = {
+    "ja_kodas": "code",
+    "ja_pavadinimas": "name",
+    "adresas": "address",
+    "ja_reg_data": "registration_date",
+    "form_kodas": "legal_form_code",
+    "form_pavadinimas": "legal_form_name",
+    "stat_kodas": "status_code",
+    "stat_pavadinimas": "status_name",
+    "stat_data_nuo": "status_date_from",
+    "formavimo_data": "data_updated_at",
+}
+JAR_DATE_COLUMNS = ["registration_date", "status_date_from", "data_updated_at"]
+# Колонки с малым числом различных значений (правовая форма, статус) — pandas category:
+# в куске хранятся коды категорий, а не строка на каждую запись.
+# Названия уходят в справочники (app.services.dictionaries), в companies — только коды
+JAR_CATEGORY_COLUMNS = ["form_kodas", "form_pavadinimas", "stat_kodas", "stat_pavadinimas"]
+# Колонки, которые берутся из словарей НДС и капитала (порядок — как в кортежах словарей)
+PVM_COLUMNS = ["pvm_code", "pvm_code_norm", "pvm_date"]
+CAPITAL_COLUMNS = ["authorized_capital", "capital_currency"]
+
+
+class ImportMemoryError(Exception):
+    """Импортер превысил потолок памяти settings.import_memory_limit_mb."""
+
+
+def current_rss_mb():
+    """Текущий RSS процесса в МБ (None, если узнать нельзя)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Пиковое значение (ru_maxrss в КБ на Linux) — оценка сверху
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+
+def check_memory_limit():
+    limit = settings.import_memory_limit_mb
+    if not limit:
         return
+    rss = current_rss_mb()
+    if rss is not None and rss > limit:
+        raise ImportMemoryError(
+            f"RSS {rss:.0f} МБ превышает лимит {limit} МБ "
+            f"(уменьшите REGISTRY_IMPORT_CHUNK_ROWS)"
+        )
 
+
+def load_pvm_map(path):
+    """
+    Читает файл НДС (VMI) в компактный словарь code -> (pvm_code, pvm_code_norm, pvm_date).
+    Нормализованный код (цифры без LT) считается здесь, один раз на импорт.
+    Пустой словарь, если файла нет или колонки не распознаны.
+    """
+    if not (os.path.exists(path) and os.path.getsize(path) > 100):
+        print("⚠️ [IMPORTER] Файл PVM пуст или слишком мал. Грузим только JAR.")
+        return {}
+
+    print("🔄 [IMPORTER] Читаю файл НДС...")
     try:
-        # 1. Читаем Компании (JAR)
-        jar_cols = [
-            "ja_kodas", "ja_pavadinimas", "adresas", "ja_reg_data", 
-            "form_kodas", "form_pavadinimas", 
-            "stat_kodas", "stat_pavadinimas", "stat_data_nuo", "formavimo_data"
-        ]
-        df_jar = pd.read_csv(JAR_PATH, sep='|', quotechar='"', dtype=str, usecols=lambda c: c in jar_cols)
-        
-        df_jar = df_jar.rename(columns={
-            "ja_kodas": "code",
-            "ja_pavadinimas": "name",
-            "adresas": "address",
-            "ja_reg_data": "registration_date",
-            "form_kodas": "legal_form_code",
-            "form_pavadinimas": "legal_form_name",
-            "stat_kodas": "status_code",
-            "stat_pavadinimas": "status_name",
-            "stat_data_nuo": "status_date_from",
-            "formavimo_data": "data_updated_at"
-        })
-
-        # 2. Читаем НДС (VMI)
-        df_final = df_jar
-        
-        if os.path.exists(PVM_PATH) and os.path.getsize(PVM_PATH) > 100:
-            print("🔄 [IMPORTER] Читаю файл НДС...")
-            try:
-                try:
-                    df_pvm = pd.read_csv(PVM_PATH, sep=',', dtype=str, on_bad_lines='skip')
-                    if len(df_pvm.columns) < 2:
-                        df_pvm = pd.read_csv(PVM_PATH, sep=';', dtype=str, on_bad_lines='skip')
-                except:
-                    df_pvm = pd.read_csv(PVM_PATH, sep=';', dtype=str, on_bad_lines='skip')
-                
-                df_pvm.columns = [str(c).lower().strip() for c in df_pvm.columns]
-
-                possible_code_cols = ['mokescio_moketojo_identifikacinis_numeris', 'kodas', 'ja_kodas', 'code']
-                possible_pvm_cols = ['pvm_moketojo_kodas', 'pvm_kodas', 'pvm', 'pvm_code']
-
-                found_code = next((c for c in possible_code_cols if c in df_pvm.columns), None)
-                found_pvm = next((c for c in possible_pvm_cols if c in df_pvm.columns), None)
-
-                if found_code and found_pvm:
-                    df_pvm = df_pvm[[found_code, found_pvm]]
-                    df_pvm.columns = ['code', 'pvm_code']
-                    
-                    df_pvm = df_pvm.dropna(subset=['pvm_code'])
-                    df_pvm = df_pvm.drop_duplicates(subset=['code'], keep='last')
-                    
-                    print(f"📊 [IMPORTER] Найдено {len(df_pvm)} записей с НДС.")
-                    
-                    # Безопасное слияние
-                    df_final = pd.merge(df_jar, df_pvm, on='code', how='left')
-                else:
-                    print(f"⚠️ [IMPORTER] Не найдены нужные колонки в PVM. Использую только JAR.")
-            except Exception as e:
-                print(f"⚠️ [IMPORTER] Ошибка чтения PVM файла: {e}. Грузим только JAR.")
+        try:
+            df_pvm = pd.read_csv(path, sep=',', dtype=str, on_bad_lines='skip')
+            if len(df_pvm.columns) < 2:
+                df_pvm = pd.read_csv(path, sep=';', dtype=str, on_bad_lines='skip')
+        except:
+            df_pvm = pd.read_csv(path, sep=';', dtype=str, on_bad_lines='skip')
+
+        df_pvm.columns = [str(c).lower().strip() for c in df_pvm.columns]
+
+        possible_code_cols = ['mokescio_moketojo_identifikacinis_numeris', 'kodas', 'ja_kodas', 'code']
+        possible_pvm_cols = ['pvm_moketojo_kodas', 'pvm_kodas', 'pvm', 'pvm_code']
+        possible_date_cols = ['iregistravimo_data', 'pvm_iregistravimo_data', 'registravimo_data', 'pvm_date']
+
+        found_code = next((c for c in possible_code_cols if c in df_pvm.columns), None)
+        found_pvm = next((c for c in possible_pvm_cols if c in df_pvm.columns), None)
+
+        if not (found_code and found_pvm):
+            print(f"⚠️ [IMPORTER] Не найдены нужные колонки в PVM. Использую только JAR.")
+            return {}
+
+        found_date = next((c for c in possible_date_cols if c in df_pvm.columns), None)
+
+        df_pvm = df_pvm.dropna(subset=[found_code, found_pvm])
+        norms = df_pvm[found_pvm].map(normalize_pvm)
+        if found_date:
+            dates = pd.to_datetime(df_pvm[found_date], errors='coerce').dt.strftime('%Y-%m-%d')
+            dates = dates.astype(object).where(dates.notna(), None)
         else:
-            print("⚠️ [IMPORTER] Файл PVM пуст или слишком мал. Грузим только JAR.")
+            dates = pd.Series(None, index=df_pvm.index, dtype=object)
+        # При повторах кода побеждает последняя запись (как drop_duplicates(keep='last'))
+        pvm_map = dict(zip(df_pvm[found_code], zip(df_pvm[found_pvm], norms, dates)))
+        print(f"📊 [IMPORTER] Найдено {len(pvm_map)} записей с НДС.")
+        return pvm_map
+    except Exception as e:
+        print(f"⚠️ [IMPORTER] Ошибка чтения PVM файла: {e}. Грузим только JAR.")
+        return {}
+
+
+def load_capital_map(path):
+    """
+    Читает файл капитала в компактный словарь code -> (сумма, валюта).
+    Пустой словарь, если файла нет или колонки не распознаны.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    print("🔄 [IMPORTER] Читаю файл Капитала...")
+    try:
+        # Пробуем стандартный пайп |
+        df_cap = pd.read_csv(path, sep='|', quotechar='"', dtype=str, on_bad_lines='skip')
+
+        if len(df_cap.columns) < 2:
+             df_cap = pd.read_csv(path, sep=',', quotechar='"', dtype=str, on_bad_lines='skip')
+
+        df_cap.columns = [c.strip().lower() for c in df_cap.columns]
+
+        # Варианты названий (ДОБАВИЛИ ist_kapitalas)
+        cap_code_cols = ['ja_kodas', 'kodas', 'code']
+        cap_val_cols = ['ist_kapitalas', 'kapitalo_dydis', 'capital', 'amount']
+
+        found_code = next((c for c in cap_code_cols if c in df_cap.columns), None)
+        found_val = next((c for c in cap_val_cols if c in df_cap.columns), None)
+
+        if not (found_code and found_val):
+            print(f"⚠️ [IMPORTER] Колонки Капитала не распознаны. Найдены: {list(df_cap.columns)}")
+            return {}
+
+        found_curr = next((c for c in ['valiuta', 'currency'] if c in df_cap.columns), None)
+
+        # 1. Меняем запятую на точку  2. ПРЕВРАЩАЕМ В ЧИСЛО (Float)
+        amounts = pd.to_numeric(
+            df_cap[found_val].astype(str).str.replace(',', '.', regex=False), errors='coerce'
+        )
+        amounts = amounts.astype(object).where(amounts.notna(), None)
+        currencies = df_cap[found_curr] if found_curr else pd.Series("EUR", index=df_cap.index)
+        currencies = currencies.astype(object).where(currencies.notna(), None)
+
+        capital_map = dict(zip(df_cap[found_code], zip(amounts, currencies)))
+        print(f"💰 [IMPORTER] Найдено {len(capital_map)} записей о капитале.")
+        return capital_map
+    except Exception as e:
+        print(f"⚠️ [IMPORTER] Ошибка чтения файла капитала: {e}")
+        return {}
+
+
+def read_jar_chunks(path, chunk_rows):
+    """Читает JAR кусками по chunk_rows строк (колонки уже переименованы)."""
+    dtype = {c: "category" if c in JAR_CATEGORY_COLUMNS else str for c in JAR_COLUMNS}
+    reader = pd.read_csv(
+        path, sep='|', quotechar='"', dtype=dtype,
+        usecols=lambda c: c in JAR_COLUMNS, chunksize=chunk_rows,
+    )
+    for chunk in reader:
+        yield chunk.rename(columns=JAR_COLUMNS)
+
+
+def enrich_chunk(chunk, pvm_map, capital_map):
+    """
+    Дополняет кусок JAR данными НДС и капитала и приводит его к колонкам таблицы companies.
+    Пустые значения -> None, даты -> 'YYYY-MM-DD'.
+    """
+    # Дубликаты кода внутри куска (берём последнюю запись)
+    chunk = chunk.drop_duplicates(subset=['code'], keep='last')
+
+    chunk[PVM_COLUMNS] = map_columns(chunk["code"], pvm_map, PVM_COLUMNS)
+    chunk[CAPITAL_COLUMNS] = map_columns(chunk["code"], capital_map, CAPITAL_COLUMNS)
+
+    # pvm_date уже в ISO-формате (из load_pvm_map)
+    for col in JAR_DATE_COLUMNS:
+        if col in chunk.columns:
+            chunk[col] = pd.to_datetime(chunk[col], errors='coerce').dt.strftime('%Y-%m-%d')
+
+    # Ключи поиска — векторно на весь кусок (по строке в Python на запросе было бы слишком дорого)
+    chunk["name_norm"] = normalize_series(chunk["name"], strip_legal_form=True)
+    if "address" in chunk.columns:
+        chunk["address_norm"] = normalize_series(chunk["address"])
 
+    chunk = chunk.reindex(columns=COMPANY_COLUMNS)
+    # Очистка NaN (через object, иначе в числовых колонках None снова станет NaN)
+    chunk = chunk.astype(object)
+    chunk = chunk.where(chunk.notna(), None)
+    chunk["row_hash"] = row_hashes(chunk)
+    return chunk
 
-        # 3. Читаем Капитал
-        if os.path.exists(CAPITAL_PATH):
-            print("🔄 [IMPORTER] Читаю файл Капитала...")
+
+def map_columns(codes, mapping, columns):
+    """Раскладывает значения-кортежи словаря по колонкам (кода нет в словаре -> None)."""
+    empty = (None,) * len(columns)
+    return pd.DataFrame(
+        [mapping.get(code, empty) for code in codes], index=codes.index, columns=columns
+    )
+
+
+def row_hashes(chunk):
+    """
+    Стабильный хэш каждой строки по всем колонкам-источникам (JAR + НДС + капитал).
+    blake2b (64 бита, hex) не зависит от версии pandas и запуска процесса.
+    """
+    return [
+        hashlib.blake2b(
+            "\x1f".join("" if v is None else str(v) for v in row).encode("utf-8"),
+            digest_size=8,
+        ).hexdigest()
+        for row in chunk[HASH_COLUMNS].itertuples(index=False, name=None)
+    ]
+
+
+def make_parse_pool():
+    """Пул процессов для разбора CSV (None — разбирать в текущем процессе)."""
+    if settings.import_parse_workers <= 0:
+        return None
+    # spawn: процесс API многопоточный (uvicorn, планировщик), fork в таком состоянии небезопасен
+    return ProcessPoolExecutor(
+        max_workers=settings.import_parse_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+class SideTables:
+    """
+    Словари НДС и капитала. Файлы разбираются параллельно (в пуле процессов),
+    сразу как только скачаны; обогащение JAR ждёт их только перед первым куском.
+    """
+
+    def __init__(self, timer, pool=None):
+        self.timer = timer
+        self.pool = pool
+        self._futures = {}
+        self._maps = None
+
+    def submit(self, key, loader, path):
+        start = time.time()
+        try:
+            if self.pool is None:
+                future = Future()
+                future.set_result(loader(path))
+            else:
+                future = self.pool.submit(loader, path)
+        except Exception as e:
+            # submit вызывается из done-callback скачивания, где исключение потерялось бы:
+            # ошибка остаётся в future, и maps() поднимет именно её
+            future = Future()
+            future.set_exception(e)
+        future.add_done_callback(lambda f: self._parsed(key, start, f))
+        self._futures[key] = future
+
+    def _parsed(self, key, start, future):
+        self.timer.add(f"parse_{key}", start, time.time())
+        if future.exception() is None:
+            self.timer.count(f"parse_{key}", len(future.result()))
+
+    def submit_all(self):
+        self.submit("pvm", load_pvm_map, PVM_PATH)
+        self.submit("capital", load_capital_map, CAPITAL_PATH)
+
+    def maps(self):
+        """(pvm_map, capital_map); при первом вызове ждёт окончания разбора."""
+        if self._maps is None:
+            with self.timer.stage("wait_side_tables"):
+                self._maps = (self._futures["pvm"].result(), self._futures["capital"].result())
+        return self._maps
+
+
+def enriched_chunks(side, timer, dictionaries):
+    """
+    Куски JAR, обогащённые НДС и капиталом. Чтение и обогащение идут в фоновом
+    потоке (prefetch), пока основной пишет предыдущий кусок в БД.
+    Названия правовых форм и статусов собираются в dictionaries (DictionaryCollector).
+    """
+    def produce():
+        reader = read_jar_chunks(JAR_PATH, settings.import_chunk_rows)
+        while True:
+            with timer.stage("parse_jar"):
+                chunk = next(reader, None)
+            if chunk is None:
+                return
+            timer.count("parse_jar", len(chunk))
+            pvm_map, capital_map = side.maps()
+            with timer.stage("enrich"):
+                dictionaries.add(chunk)
+                chunk = enrich_chunk(chunk, pvm_map, capital_map)
+            timer.count("enrich", len(chunk))
+            yield chunk
+
+    return prefetch(produce(), depth=settings.import_prefetch_chunks)
+
+
+def build_generation(side, timer):
+    """Полная сборка нового поколения в теневой таблице и атомарное переключение."""
+    generation_id = start_generation(sync_engine)
+    table_name = shadow_name("companies", generation_id)
+    stats_name = shadow_name("company_stats", generation_id)
+    print(f"💾 [IMPORTER] Сохранение в БД (поколение {generation_id}, таблица {table_name})...")
+
+    columns = ", ".join(COMPANY_COLUMNS)
+    placeholders = ", ".join("?" for _ in COMPANY_COLUMNS)
+    # OR REPLACE: повторы кода между кусками — побеждает последняя запись
+    insert_sql = f'INSERT OR REPLACE INTO "{table_name}" ({columns}) VALUES ({placeholders})'
+
+    try:
+        with sync_engine.connect() as conn:
+            # Кэш и temp_store задаёт профиль importer (app.core.db). Здесь — только то,
+            # что допустимо лишь для теневой сборки: таблица не видна читателям
+            # до переключения, поэтому fsync на каждом куске не нужен.
+            # PRAGMA synchronous нельзя менять внутри транзакции — идём мимо SQLAlchemy.
+            raw = conn.connection.driver_connection
+            saved_pragmas = {
+                p: raw.execute(f"PRAGMA {p}").fetchone()[0]
+                for p in ("synchronous",)
+            }
+            raw.execute("PRAGMA synchronous=OFF")
             try:
-                # Пробуем стандартный пайп |
-                df_cap = pd.read_csv(CAPITAL_PATH, sep='|', quotechar='"', dtype=str, on_bad_lines='skip')
-                
-                if len(df_cap.columns) < 2:
-                     df_cap = pd.read_csv(CAPITAL_PATH, sep=',', quotechar='"', dtype=str, on_bad_lines='skip')
-                
-                df_cap.columns = [c.strip().lower() for c in df_cap.columns]
-
-                # Варианты названий (ДОБАВИЛИ ist_kapitalas)
-                cap_code_cols = ['ja_kodas', 'kodas', 'code']
-                cap_val_cols = ['ist_kapitalas', 'kapitalo_dydis', 'capital', 'amount']
-                
-                found_code = next((c for c in cap_code_cols if c in df_cap.columns), None)
-                found_val = next((c for c in cap_val_cols if c in df_cap.columns), None)
-
-                if found_code and found_val:
-                    rename_map = {found_code: "code", found_val: "authorized_capital"}
-                    
-                    found_curr = next((c for c in ['valiuta', 'currency'] if c in df_cap.columns), None)
-                    if found_curr:
-                        rename_map[found_curr] = "capital_currency"
-                    
-                    df_cap = df_cap.rename(columns=rename_map)
-                    
-                    cols = ["code", "authorized_capital"]
-                    if "capital_currency" in df_cap.columns:
-                        cols.append("capital_currency")
-                    
-                    df_cap = df_cap[cols]
-
-                    if "capital_currency" not in df_cap.columns:
-                        df_cap["capital_currency"] = "EUR"
-                    
-                    if "authorized_capital" in df_cap.columns:
-                        # 1. Меняем запятую на точку
-                        df_cap["authorized_capital"] = df_cap["authorized_capital"].astype(str).str.replace(',', '.', regex=False)
-                        # 2. ПРЕВРАЩАЕМ В ЧИСЛО (Float)
-                        df_cap["authorized_capital"] = pd.to_numeric(df_cap["authorized_capital"], errors='coerce')                    
-                    df_cap = df_cap.drop_duplicates(subset=['code'], keep='last')
-                    
-                    print(f"💰 [IMPORTER] Найдено {len(df_cap)} записей о капитале.")
-                    
-                    # ПРИСОЕДИНЯЕМ К ОБЩЕЙ ТАБЛИЦЕ
-                    df_final = pd.merge(df_final, df_cap, on='code', how='left')
-                    
-                else:
-                    print(f"⚠️ [IMPORTER] Колонки Капитала не распознаны. Найдены: {list(df_cap.columns)}")
-            except Exception as e:
-                print(f"⚠️ [IMPORTER] Ошибка чтения файла капитала: {e}")
+                with conn.begin():
+                    shadow_table(Company, table_name).create(conn)
+                    shadow_table(CompanyStats, stats_name).create(conn)
 
+                # JAR читаем кусками: обогащаем и пишем каждый кусок отдельной транзакцией
+                codes = set()
+                stats = StatsAccumulator()
+                dictionaries = DictionaryCollector()
+                for chunk in enriched_chunks(side, timer, dictionaries):
+                    codes.update(chunk["code"])
+                    with timer.stage("write"), conn.begin():
+                        conn.exec_driver_sql(
+                            insert_sql, list(chunk.itertuples(index=False, name=None))
+                        )
+                    timer.rows(len(chunk), stage="write")
+                    # Сводная статистика — по тому же куску, пока он в памяти
+                    with timer.stage("stats"):
+                        stats.add(chunk[STATS_COLUMNS])
+                    del chunk
+                    check_memory_limit()
+                print(f"📊 [IMPORTER] Записано {len(codes)} компаний.")
 
-        # 4. ЗАЩИТА ОТ ОШИБОК SQL
-        required_cols = ['pvm_code', 'pvm_date', 'authorized_capital', 'capital_currency']
-        for col in required_cols:
-            if col not in df_final.columns:
-                df_final[col] = None
+                with timer.stage("index"), conn.begin():
+                    for suffix, columns in COMPANY_INDEXES:
+                        conn.execute(text(
+                            f'CREATE INDEX "{company_index_name(generation_id, suffix)}" '
+                            f'ON "{table_name}" ({columns})'
+                        ))
 
-        # 5. Обработка дат
-        date_cols = ["registration_date", "status_date_from", "data_updated_at"]
-        for col in date_cols:
-            if col in df_final.columns:
-                df_final[col] = pd.to_datetime(df_final[col], errors='coerce').dt.date
+                    # Полнотекстовый индекс для поиска по названию/адресу
+                    build_search_index(conn, table_name, shadow_name("companies_fts", generation_id))
+                    # Триграммный индекс названий — сверка названий без кодов (app.services.reconcile)
+                    build_trigram_index(conn, table_name, shadow_name("companies_trgm", generation_id))
+                timer.count("index", len(codes))
 
-        # Очистка NaN
-        df_final = df_final.where(pd.notnull(df_final), None)
-        
-        # 6. Сохранение
-        print("💾 [IMPORTER] Сохранение в БД...")
-        with sync_engine.begin() as conn:
-            conn.execute(text("DROP TABLE IF EXISTS companies"))
-            
-            df_final.to_sql("companies", conn, if_exists='replace', index=False, chunksize=2000)
-            
-            # Индексы
-            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_companies_code ON companies (code)"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_companies_name ON companies (name)"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_companies_pvm ON companies (pvm_code)"))
-
-        print("✅ [IMPORTER] Импорт завершен!")
+                with timer.stage("stats"), conn.begin():
+                    if stats.total == len(codes):
+                        write_stats(conn, stats_name, stats.rows())
+                    else:
+                        # Повторы кода между кусками (OR REPLACE) — считаем по итоговой таблице
+                        rebuild_stats(conn, table_name, stats_name)
+                timer.count("stats", len(codes))
+
+                # Справочники — до публикации: API перечитывает их при смене поколения
+                with conn.begin():
+                    save_dictionaries(conn, dictionaries)
+            finally:
+                for pragma, value in saved_pragmas.items():
+                    raw.execute(f"PRAGMA {pragma}={value}")
+
+        # Проверка и переключение
+        with timer.stage("publish"):
+            row_count = validate_generation(sync_engine, generation_id, len(codes))
+            # История и лента — в транзакции переключения: иначе ответы нового поколения
+            # (ETag "gen-N-...") успели бы закэшироваться без его изменений
+            publish_generation(
+                sync_engine, generation_id, row_count,
+                before_commit=lambda conn: update_history(conn, generation_id, timer),
+            )
+    except Exception:
+        discard_generation(sync_engine, generation_id)
+        raise
+
+    dropped = prune_generations(sync_engine)
+    if dropped:
+        print(f"🧹 [IMPORTER] Удалены старые поколения: {dropped}")
+
+    print(f"✅ [IMPORTER] Импорт завершен! Активно поколение {generation_id} ({row_count} записей).")
+    return generation_id
+
+
+def update_history(conn, generation_id, timer):
+    """
+    Полная сверка истории с уже переключённой таблицей companies и лента изменений
+    поколения generation_id — в транзакции публикации conn, под точкой сохранения:
+    ошибка откатывает только историю и не отменяет импорт.
+    """
+    try:
+        with timer.stage("history"), conn.begin_nested():
+            changes = record_changes(conn, generation_id)
+            closed, opened = record_history(conn)
+        print(f"📜 [IMPORTER] История: закрыто версий {closed}, открыто {opened}; изменения: {changes}.")
+    except Exception as e:
+        # Следующий импорт сверит историю заново
+        print(f"⚠️ [IMPORTER] История не обновлена: {e}")
+
+
+def _batched(items, size=500):
+    """Делит список на пачки (для IN (...) в пределах лимита переменных SQLite)."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def apply_incremental(side, timer):
+    """
+    Инкрементальный импорт: сравнивает хэши строк источника с хэшами активного
+    поколения и применяет только INSERT/UPDATE/DELETE для отличающихся строк
+    (вместе с FTS- и триграммным индексами) одной короткой транзакцией.
+    Возвращает (handled, generation_id): handled=False — нужна полная сборка;
+    generation_id=None — изменений нет, новое поколение не создано.
+    """
+    active = get_active_generation(sync_engine)
+    if active is None or active.mode == "legacy":
+        print("ℹ️ [IMPORTER] Нет поколения с хэшами строк — инкрементальный импорт невозможен.")
+        return False, None
+
+    with sync_engine.connect() as conn:
+        if not inspect(conn).has_table("companies_fts") or not inspect(conn).has_table("companies_trgm"):
+            print("ℹ️ [IMPORTER] Нет FTS- или триграммного индекса в активном поколении — нужна полная сборка.")
+            return False, None
+        indexes = {ix["name"] for ix in inspect(conn).get_indexes("companies")}
+        if any(company_index_name(active.storage_id, suffix) not in indexes
+               for suffix, _ in COMPANY_INDEXES):
+            print("ℹ️ [IMPORTER] Набор индексов активного поколения устарел — нужна полная сборка.")
+            return False, None
+        old_hashes = dict(conn.execute(text("SELECT code, row_hash FROM companies")).all())
+
+    if not old_hashes or None in old_hashes.values():
+        print("ℹ️ [IMPORTER] В активном поколении нет хэшей строк — нужна полная сборка.")
+        return False, None
+
+    max_changes = int(len(old_hashes) * settings.incremental_max_change_ratio)
+    code_idx = COMPANY_COLUMNS.index("code")
+
+    # 1. Ищем новые и изменённые строки (в памяти держим только их)
+    print("🔍 [IMPORTER] Сравнение с активным поколением по хэшам строк...")
+    changed = {}
+    seen = set()
+    dictionaries = DictionaryCollector()
+    for chunk in enriched_chunks(side, timer, dictionaries):
+        with timer.stage("diff"):
+            seen.update(chunk["code"])
+            mask = chunk["code"].map(old_hashes) != chunk["row_hash"]
+            # Код может повториться в следующем куске: как и в полной сборке
+            # (INSERT OR REPLACE), действует последняя строка
+            if changed:
+                for code in chunk.loc[~mask & chunk["code"].isin(list(changed)), "code"]:
+                    del changed[code]
+            for row in chunk[mask].itertuples(index=False, name=None):
+                changed[row[code_idx]] = row
+        timer.rows(len(chunk), stage="diff")
+        del chunk
+        if len(changed) > max_changes:
+            print(f"ℹ️ [IMPORTER] Изменено больше {max_changes} строк — выгоднее полная сборка.")
+            return False, None
+        check_memory_limit()
+
+    deleted = [code for code in old_hashes if code not in seen]
+    inserted = [row for code, row in changed.items() if code not in old_hashes]
+    updated = [row for code, row in changed.items() if code in old_hashes]
+
+    if len(changed) + len(deleted) > max_changes:
+        print(f"ℹ️ [IMPORTER] Изменено больше {max_changes} строк — выгоднее полная сборка.")
+        return False, None
+    if not changed and not deleted:
+        print(f"✅ [IMPORTER] Изменений нет. Активно поколение {active.id}.")
+        return True, None
+
+    # 2. Применяем изменения к живой таблице одной транзакцией
+    print(f"💾 [IMPORTER] Изменения: +{len(inserted)} / ~{len(updated)} / -{len(deleted)}")
+    set_columns = [c for c in COMPANY_COLUMNS if c != "code"]
+    update_sql = (
+        "UPDATE companies SET " + ", ".join(f"{c} = ?" for c in set_columns) + " WHERE code = ?"
+    )
+    insert_sql = (
+        f"INSERT INTO companies ({', '.join(COMPANY_COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in COMPANY_COLUMNS)})"
+    )
+    codes_param = bindparam("codes", expanding=True)
+    # Индекс бесконтентный: удалять из него можно только со старыми значениями колонок
+    fts_delete = text(
+        "INSERT INTO companies_fts(companies_fts, rowid, name, address) "
+        "SELECT 'delete', rowid, name_norm, address_norm FROM companies WHERE code IN :codes"
+    ).bindparams(codes_param)
+    fts_insert = text(
+        "INSERT INTO companies_fts(rowid, name, address) "
+        "SELECT rowid, name_norm, address_norm FROM companies WHERE code IN :codes"
+    ).bindparams(codes_param)
+    trgm_delete = text(
+        "INSERT INTO companies_trgm(companies_trgm, rowid, name) "
+        "SELECT 'delete', rowid, name_norm FROM companies WHERE code IN :codes"
+    ).bindparams(codes_param)
+    trgm_insert = text(
+        "INSERT INTO companies_trgm(rowid, name) "
+        "SELECT rowid, name_norm FROM companies WHERE code IN :codes"
+    ).bindparams(codes_param)
+    delete_rows = text("DELETE FROM companies WHERE code IN :codes").bindparams(codes_param)
+
+    touched = [row[code_idx] for row in updated]
+    added = [row[code_idx] for row in inserted]
+    with timer.stage("write"), sync_engine.begin() as conn:
+        save_dictionaries(conn, dictionaries)
+        # Сводка затронутых компаний до изменений (вычитается из company_stats)
+        with timer.stage("stats"):
+            stats_before = stats_for_codes(conn, touched + deleted)
+        for batch in _batched(touched + deleted):
+            conn.execute(fts_delete, {"codes": batch})
+            conn.execute(trgm_delete, {"codes": batch})
+        for batch in _batched(deleted):
+            conn.execute(delete_rows, {"codes": batch})
+        if updated:
+            # UPDATE (а не REPLACE) сохраняет rowid, на который ссылается FTS-индекс
+            set_idx = [COMPANY_COLUMNS.index(c) for c in set_columns]
+            conn.exec_driver_sql(
+                update_sql,
+                [tuple(row[i] for i in set_idx) + (row[code_idx],) for row in updated],
+            )
+        if inserted:
+            conn.exec_driver_sql(insert_sql, inserted)
+        for batch in _batched(touched + added):
+            conn.execute(fts_insert, {"codes": batch})
+            conn.execute(trgm_insert, {"codes": batch})
+
+        # Сводка — в той же транзакции: читатели не видят её рассогласованной с companies.
+        # Только разница по затронутым компаниям, без пересчёта по всей таблице
+        with timer.stage("stats"):
+            apply_stats_delta(conn, stats_before, stats_for_codes(conn, touched + added))
+
+        row_count = conn.execute(text("SELECT COUNT(*) FROM companies")).scalar()
+        generation_id = publish_incremental(
+            conn, active, row_count,
+            inserted=len(inserted), updated=len(updated), deleted=len(deleted),
+        )
+
+        # Лента изменений и история — в той же транзакции, только по затронутым кодам
+        codes = touched + deleted + added
+        changes = record_changes(conn, generation_id, codes=codes)
+        closed, opened = record_history(conn, codes=codes)
+    timer.count("write", len(changed) + len(deleted))
+    notify_generation_changed(generation_id)
+
+    print(f"📜 [IMPORTER] История: закрыто версий {closed}, открыто {opened}; изменения: {changes}.")
+    print(f"✅ [IMPORTER] Инкрементальный импорт завершен! Активно поколение {generation_id} ({row_count} записей).")
+    return True, generation_id
+
+
+def process_and_save(incremental: bool = False, side=None, timer=None):
+    """
+    Обрабатывает скачанные файлы и публикует новое поколение данных.
+    side — уже запущенный разбор НДС/капитала (из run_full_import), иначе запускается здесь.
+    Возвращает id опубликованного поколения или None.
+    """
+    print("🔄 [IMPORTER] Обработка данных (потоковый режим)...")
+    
+    timer = timer or StageTimer()
+    if not os.path.exists(JAR_PATH):
+        print("❌ [IMPORTER] Файл реестра JAR не найден. Пропуск.")
+        timer.failed("файл реестра JAR не найден")
+        return None
+
+    pool = None
+    try:
+        # 1. Маленькие таблицы (НДС, капитал) — в словари по коду, параллельно с чтением JAR
+        if side is None:
+            pool = make_parse_pool()
+            side = SideTables(timer, pool)
+            side.submit_all()
 
+        # 2. Только изменения (если возможно), иначе полная сборка нового поколения
+        handled, generation_id = False, None
+        if incremental:
+            handled, generation_id = apply_incremental(side, timer)
+            if not handled:
+                print("↪️ [IMPORTER] Выполняю полную сборку поколения.")
+        if not handled:
+            generation_id = build_generation(side, timer)
+
+        # 3. Снимок для выгрузки (/api/v1/export/snapshot.parquet) и индекс кодов для API
+        if generation_id is not None:
+            with timer.stage("snapshot"):
+                write_parquet_snapshot(sync_engine, generation_id)
+            with timer.stage("code_index"):
+                write_code_index(sync_engine, generation_id)
+            # WAL после сборки поколения занимает сотни МБ — переносим в основной файл
+            with timer.stage("checkpoint"):
+                checkpoint_wal(sync_engine)
+        return generation_id
+
+    except ImportCancelled:
+        print("🛑 [IMPORTER] Импорт отменён.")
+        raise
     except Exception as e:
         print(f"❌ [IMPORTER] Критическая ошибка обработки: {e}")
+        timer.failed(e)
+        return None
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
-def run_full_import(download_jar: bool = True, download_pvm: bool = True, download_capital: bool = True):
+def run_full_import(
+    download_jar: bool = True,
+    download_pvm: bool = True,
+    download_capital: bool = True,
+    incremental: bool = None,
+    force: bool = False,
+    progress=None,
+):
     """
     Запускает процесс импорта.
     Аргументы позволяют пропустить скачивание определенных файлов (для отладки).
+    incremental: применять только изменившиеся строки (None — по настройке import_incremental).
+    force: обработать файлы, даже если ни один источник не изменился.
+    progress: получатель прогресса (см. StageTimer), например задание импорта в воркере.
     """
+    if incremental is None:
+        incremental = settings.import_incremental
+
     # 1. Получаем ссылки из БД
     jar_url = get_url_from_db("jar_url")
     pvm_url = get_url_from_db("pvm_url")
     capital_url = get_url_from_db("capital_url")
 
-    # 2. Качаем (только если попросили)
-    if download_jar:
-        download_file(jar_url, JAR_PATH, "JAR Registry")
-    else:
-        print("⏭️ [IMPORTER] Скачивание JAR пропущено (используем локальный файл).")
-
-    if download_pvm:
-        download_file(pvm_url, PVM_PATH, "VMI PVM Data")
-    else:
-        print("⏭️ [IMPORTER] Скачивание PVM пропущено (используем локальный файл).")
-
-    if download_capital:
-        download_file(capital_url, CAPITAL_PATH, "JAR Capital") 
-    else:
-        print("⏭️ [IMPORTER] Скачивание Capital пропущено (используем локальный файл).")
-    
-    # 3. Обрабатываем (берет файлы с диска, даже если не качали сейчас)
-    process_and_save()
\ No newline at end of file
+    timer = StageTimer(listener=progress)
+    pool = make_parse_pool()
+    side = SideTables(timer, pool)
+    try:
+        # 2. Качаем параллельно (только если попросили). НДС и капитал начинают
+        #    разбираться сразу после скачивания, пока JAR ещё качается
+        sources = [
+            ("jar", jar_url, JAR_PATH, "JAR Registry", download_jar, None),
+            ("pvm", pvm_url, PVM_PATH, "VMI PVM Data", download_pvm, load_pvm_map),
+            ("capital", capital_url, CAPITAL_PATH, "JAR Capital", download_capital, load_capital_map),
+        ]
+        futures = {}
+        with ThreadPoolExecutor(max_workers=len(sources)) as download_pool:
+            for key, url, path, name, enabled, loader in sources:
+                if enabled:
+                    future = download_pool.submit(_download_stage, timer, key, url, path, name)
+                else:
+                    print(f"⏭️ [IMPORTER] Скачивание {name} пропущено (используем локальный файл).")
+                    future = Future()
+                    future.set_result(("skipped", None))
+                if loader is not None:
+                    future.add_done_callback(
+                        lambda f, key=key, loader=loader, path=path: side.submit(key, loader, path)
+                    )
+                futures[key] = future
+        downloads = {key: f.result() for key, f in futures.items()}
+
+        # Все три источника проверены и не изменились — данные в БД уже актуальны
+        if (not force and all(result == "unchanged" for result, _ in downloads.values())
+                and get_active_generation(sync_engine) is not None):
+            print("⏭️ [IMPORTER] Источники не изменились — обработка пропущена.")
+            save_source_states(downloads)
+            return None
+
+        # 3. Обрабатываем (берет файлы с диска, даже если не качали сейчас)
+        generation_id = process_and_save(incremental=incremental, side=side, timer=timer)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    timer.report()
+    # Состояние источников — только после успешной обработки. Иначе следующий запуск
+    # получит 304 (или тот же хэш) и навсегда пропустит так и не опубликованные файлы
+    if timer.error is None:
+        save_source_states(downloads)
+    if generation_id is not None:
+        record_stage_timings(sync_engine, generation_id, timer.as_dict())
+    return generation_id
+
+
+def _download_stage(timer, key, url, path, name):
+    with timer.stage(f"download_{key}"):
+        return download_source(key, url, path, name)
+
+
+def main():
+    """
+    CLI импорта без API: python -m app.services.registry_importer [--full] [--no-download] ...
+    Запущенный сервис об этом импорте не узнает до следующего своего задания —
+    для работающего сервиса используйте POST /api/v1/import.
+    """
+    import argparse
+    from app.services.schema import init_schema
+
+    parser = argparse.ArgumentParser(description="Импорт реестра JAR + НДС + капитал в БД.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--full", action="store_true", help="Полная сборка нового поколения")
+    mode.add_argument("--incremental", action="store_true", help="Только изменившиеся строки")
+    parser.add_argument("--no-download", action="store_true", help="Не скачивать, взять файлы из каталога импорта")
+    parser.add_argument(
+        "--skip", default="", help="Не скачивать эти источники (через запятую: jar,pvm,capital)"
+    )
+    parser.add_argument("--force", action="store_true", help="Обработать, даже если источники не изменились")
+    args = parser.parse_args()
+
+    skip = {name.strip() for name in args.skip.split(",") if name.strip()}
+    if args.no_download:
+        skip = {"jar", "pvm", "capital"}
+    incremental = None  # по настройке import_incremental
+    if args.full:
+        incremental = False
+    elif args.incremental:
+        incremental = True
+
+    init_schema()
+    generation_id = run_full_import(
+        download_jar="jar" not in skip,
+        download_pvm="pvm" not in skip,
+        download_capital="capital" not in skip,
+        incremental=incremental,
+        force=args.force,
+    )
+    print(f"🏁 [IMPORTER] Активно поколение: {generation_id if generation_id is not None else 'без изменений'}.")
+
+
+if __name__ == "__main__":
+    main()
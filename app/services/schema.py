@@ -0,0 +1,64 @@
+# company-registry-lt/app/services/schema.py
+"""
+Схема БД и настройки по умолчанию — общие для API и CLI импортера.
+
+init_schema() дешёвая, если схема актуальна: одно чтение PRAGMA user_version
+на каждую БД (см. app.core.db.ensure_schema).
+"""
+from sqlalchemy.orm import Session
+
+from app.core.db import Base, JobsBase, sync_engine, jobs_engine, add_missing_columns, ensure_schema
+# Импортируем модели, чтобы они зарегистрировались в Base metadata
+from app.models import company, generation, source, job, lease, history, stats, legal_form, status, change  # noqa: F401
+from app.models.settings import Setting
+from app.services.dictionaries import fill_dictionaries_from_companies
+
+# Дефолтные настройки
+DEFAULT_SETTINGS = [
+    {
+        "key": "jar_url",
+        "value": "https://www.registrucentras.lt/aduomenys/?byla=JAR_IREGISTRUOTI.csv",
+        "description": "Ссылка на файл реестра (JAR)"
+    },
+    {
+        "key": "pvm_url",
+        # ОБНОВЛЕНО: Вставили рабочую ссылку data.gov.lt
+        "value": "https://get.data.gov.lt/datasets/gov/vmi/pvm_moketojai/Moketoja_duomenys_pvm_moketojai.csv",
+        "description": "Ссылка на плательщиков НДС (VMI)"
+    },
+    {
+        "key": "capital_url",
+        "value": "https://www.registrucentras.lt/aduomenys/?byla=JAR_KAPITALAS.csv",
+        "description": "Ссылка на уставной капитал (JAR Kapitalas)"
+    }
+]
+
+
+def _init_settings(connection):
+    session = Session(bind=connection)
+    for item in DEFAULT_SETTINGS:
+        existing = session.get(Setting, item["key"])
+        if not existing:
+            print(f"⚙️ [CONFIG] Создаю настройку по умолчанию: {item['key']}")
+            session.add(Setting(key=item["key"], value=item["value"], description=item["description"]))
+    session.flush()
+    session.close()
+
+
+def _migrate(connection):
+    add_missing_columns(connection)
+    _init_settings(connection)
+    # Названия форм и статусов из строк компаний (база до справочников)
+    fill_dictionaries_from_companies(connection)
+
+
+def init_schema():
+    """Создаёт/дополняет схему основной БД и БД заданий, если она устарела."""
+    ensure_schema(jobs_engine, JobsBase.metadata)
+    # Ключи настроек по умолчанию входят в отпечаток: новая настройка — повод пройти миграцию
+    updated = ensure_schema(
+        sync_engine, Base.metadata, migrate=_migrate,
+        extra=[item["key"] for item in DEFAULT_SETTINGS],
+    )
+    print("✅ [DB] Схема обновлена." if updated else "✅ [DB] Схема актуальна.")
+    return updated
@@ -0,0 +1,263 @@
+# company-registry-lt/app/services/search.py
+"""
+Полнотекстовый поиск по названию и адресу (SQLite FTS5).
+
+Индекс companies_fts собирается импортером вместе с поколением данных
+и переключается вместе с таблицей companies. Индекс бесконтентный:
+rowid совпадает с rowid в companies, сами тексты хранятся только там.
+
+Индексируются не исходные тексты, а нормализованные колонки name_norm /
+address_norm (считаются импортером): регистр и диакритика свёрнуты (в том числе
+Ł, Ø, которых unicode61 не сворачивает), кавычки и знаки — пробелы, правовая
+форма (UAB, MB, AB...) в начале и конце названия убрана. Запрос приводится
+той же функцией, поэтому «zalgiris», «Žalgiris» и «UAB ŽALGIRIS» ищут одно и то же.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from sqlalchemy import select, or_, text, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company import Company
+from app.models.generation import DataGeneration
+
+# Вес названия в bm25 выше, чем у адреса
+FTS_RANK = "bm25(10.0, 1.0)"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# --- Нормализация текста для поиска ---
+# Буквы без разложения в NFKD (диакритику не снять) -> латиница; ß -> ss делает casefold
+_LETTERS = {"ł": "l", "ø": "o", "đ": "d", "ħ": "h", "ı": "i", "ŧ": "t", "æ": "ae", "œ": "oe", "þ": "th"}
+# Правовые формы (уже свёрнутые): UAB, AB, MB, VšĮ, IĮ, TŪB, KŪB, ŽŪB
+_LEGAL_FORMS = "uab|ab|mb|vsi|ii|tub|kub|zub"
+# Только ASCII-шаблоны: строки pandas на pyarrow ищут регулярками RE2, где \w — лишь ASCII
+_SPACES_RE = " +"
+_LEGAL_FORM_RE = rf"^(?:(?:{_LEGAL_FORMS}) )+|(?: (?:{_LEGAL_FORMS}))+$"
+_SPACES = re.compile(_SPACES_RE)
+_LEGAL_FORM = re.compile(_LEGAL_FORM_RE)
+_LEGAL_FORM_ONLY = re.compile(rf"(?:(?:{_LEGAL_FORMS}) ?)+")
+
+
+@lru_cache(maxsize=None)
+def _fold_table():
+    """
+    Таблица str.translate: комбинируемые знаки (после NFKD) убираются, особые буквы
+    заменяются, знаки препинания, символы, пробелы и управляющие (BMP) -> пробел.
+    """
+    table = {}
+    for c in range(0x10000):
+        category = unicodedata.category(chr(c))
+        if category == "Mn":
+            table[c] = None
+        elif category[0] in "PSZC":
+            table[c] = " "
+    table.update(str.maketrans(_LETTERS))
+    return table
+
+
+def normalize_text(value, strip_legal_form=False):
+    """Ключ поиска для строки: 'UAB „Žalgiris-Łódź“' -> 'zalgiris lodz'."""
+    if value is None:
+        return None
+    value = unicodedata.normalize("NFKD", value.casefold()).translate(_fold_table())
+    value = _SPACES.sub(" ", value).strip()
+    if strip_legal_form:
+        value = _LEGAL_FORM.sub("", value).strip()
+    return value
+
+
+def normalize_series(values, strip_legal_form=False):
+    """
+    То же, что normalize_text, для колонки pandas (векторно, строковыми методами .str).
+    Пустые значения остаются пустыми.
+    """
+    values = (
+        values.str.casefold().str.normalize("NFKD").str.translate(_fold_table())
+        .str.replace(_SPACES_RE, " ", regex=True).str.strip()
+    )
+    if strip_legal_form:
+        values = values.str.replace(_LEGAL_FORM_RE, "", regex=True).str.strip()
+    return values
+
+
+def build_search_index(conn, companies_table, fts_table):
+    """Создаёт и заполняет FTS-индекс (по нормализованным колонкам) для (теневой) таблицы компаний."""
+    conn.exec_driver_sql(
+        f'CREATE VIRTUAL TABLE "{fts_table}" USING fts5('
+        f"name, address, content='', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    conn.exec_driver_sql(
+        f'INSERT INTO "{fts_table}"(rowid, name, address) '
+        f'SELECT rowid, name_norm, address_norm FROM "{companies_table}"'
+    )
+    conn.exec_driver_sql(f"INSERT INTO \"{fts_table}\"(\"{fts_table}\", rank) VALUES('rank', '{FTS_RANK}')")
+    conn.exec_driver_sql(f"INSERT INTO \"{fts_table}\"(\"{fts_table}\") VALUES('optimize')")
+
+
+def legal_form_only(q: str) -> bool:
+    """
+    Запрос из одних правовых форм ('UAB', 'VšĮ', 'UAB AB'). В индексе названия
+    хранятся без правовой формы, поэтому такие запросы ищутся по исходному названию.
+    """
+    return _LEGAL_FORM_ONLY.fullmatch(normalize_text(q)) is not None
+
+
+def build_match_query(q: str) -> str:
+    """
+    Строка запроса FTS5 по нормализованному запросу: каждое слово ищется по префиксу,
+    слова объединяются через AND. 'UAB Žalg vilni' -> '"zalg"* "vilni"*'
+    """
+    return " ".join(f'"{token}"*' for token in _TOKEN_RE.findall(normalize_text(q, strip_legal_form=True)))
+
+
+async def search_companies(db: AsyncSession, q: str, limit: int = 50):
+    """
+    Ранжированный поиск компаний: сначала точные совпадения нормализованного
+    названия (индекс name_norm), затем FTS по префиксам слов.
+    Без FTS-индекса (старая база) и для запросов из одной правовой формы — поиск через LIKE.
+    """
+    match = None if legal_form_only(q) else build_match_query(q)
+    if match == "":
+        return []
+
+    if match:
+        try:
+            return await _rank_companies(db, q, match, limit)
+        except OperationalError:
+            # Индекс ещё не построен (база до первого импорта с FTS)
+            await db.rollback()
+
+    stmt = select(Company).where(
+        or_(
+            Company.name.ilike(f"%{q}%"),
+            Company.address.ilike(f"%{q}%")
+        )
+    ).limit(limit)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+async def _rank_companies(db, q, match, limit):
+    stmt = select(Company).from_statement(
+        text(
+            "SELECT companies.* FROM companies_fts "
+            "JOIN companies ON companies.rowid = companies_fts.rowid "
+            "WHERE companies_fts MATCH :match ORDER BY rank LIMIT :limit"
+        ).bindparams(match=match, limit=limit)
+    )
+    exact = (await db.execute(
+        select(Company)
+        .where(Company.name_norm == normalize_text(q, strip_legal_form=True))
+        .order_by(Company.code).limit(limit)
+    )).scalars().all()
+    seen = {c.code for c in exact}
+    result = await db.execute(stmt)
+    ranked = [c for c in result.scalars() if c.code not in seen]
+    return (exact + ranked)[:limit]
+
+
+async def fts_available(db: AsyncSession):
+    """Есть ли FTS-индекс (в базе до первого импорта с FTS его нет)."""
+    result = await db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'companies_fts'")
+    )
+    return result.first() is not None
+
+
+def company_conditions(
+    q=None, status_code=None, legal_form_code=None,
+    registered_from=None, registered_to=None, capital_min=None, capital_max=None,
+    use_fts=True,
+):
+    """
+    Условия WHERE для списка компаний. Текст ищется через FTS-индекс
+    (rowid IN ...), без индекса и для запроса из одной правовой формы — через LIKE по названию.
+    """
+    conditions = []
+    if status_code is not None:
+        conditions.append(Company.status_code == status_code)
+    if legal_form_code is not None:
+        conditions.append(Company.legal_form_code == legal_form_code)
+    if registered_from is not None:
+        conditions.append(Company.registration_date >= registered_from)
+    if registered_to is not None:
+        conditions.append(Company.registration_date <= registered_to)
+    if capital_min is not None:
+        conditions.append(Company.authorized_capital >= capital_min)
+    if capital_max is not None:
+        conditions.append(Company.authorized_capital <= capital_max)
+    if q:
+        if use_fts and not legal_form_only(q):
+            conditions.append(
+                text("companies.rowid IN (SELECT rowid FROM companies_fts WHERE companies_fts MATCH :match)")
+                .bindparams(match=build_match_query(q) or '""')
+            )
+        else:
+            conditions.append(Company.name.ilike(f"%{q}%"))
+    return conditions
+
+
+async def list_companies(db: AsyncSession, filters: dict, cursor=None, limit=50, count_cap=10000):
+    """
+    Страница списка компаний с keyset-пагинацией по code: WHERE code > cursor ORDER BY code.
+    Глубина страницы не влияет на цену запроса (нет OFFSET).
+    Возвращает (компании, следующий курсор или None, total, total_exact).
+    """
+    try:
+        return await _list_companies(db, company_conditions(**filters), cursor, limit, count_cap)
+    except OperationalError:
+        if not filters.get("q"):
+            raise
+        # Индекс ещё не построен (база до первого импорта с FTS)
+        await db.rollback()
+        conditions = company_conditions(**filters, use_fts=False)
+        return await _list_companies(db, conditions, cursor, limit, count_cap)
+
+
+async def _list_companies(db, conditions, cursor, limit, count_cap):
+    # 1. Коды страницы: запрос только по колонкам составных индексов (list_*),
+    #    SQLite читает один индекс и не ходит в таблицу за отброшенными строками
+    stmt = select(Company.code).where(*conditions)
+    if cursor:
+        stmt = stmt.where(Company.code > cursor)
+    stmt = stmt.order_by(Company.code).limit(limit + 1)
+    codes = (await db.execute(stmt)).scalars().all()
+
+    next_cursor = None
+    if len(codes) > limit:
+        codes = codes[:limit]
+        next_cursor = codes[-1]
+
+    # 2. Сами строки — только для кодов страницы
+    companies = []
+    if codes:
+        result = await db.execute(
+            select(Company).where(Company.code.in_(codes)).order_by(Company.code)
+        )
+        companies = result.scalars().all()
+
+    total, total_exact = await _approximate_count(db, conditions, count_cap)
+    return companies, next_cursor, total, total_exact
+
+
+async def _approximate_count(db, conditions, count_cap):
+    """
+    Без фильтров — число строк активного поколения (записано импортером).
+    С фильтрами — подсчёт с потолком count_cap: дальше потолка не сканируем,
+    total_exact=False означает «не меньше total».
+    """
+    if not conditions:
+        row_count = (await db.execute(
+            select(DataGeneration.row_count).where(DataGeneration.status == "active")
+        )).scalar_one_or_none()
+        if row_count is not None:
+            return row_count, True
+
+    capped = select(Company.code).where(*conditions).limit(count_cap + 1).subquery()
+    total = (await db.execute(select(func.count()).select_from(capped))).scalar_one()
+    if total > count_cap:
+        return count_cap, False
+    return total, True
@@ -0,0 +1,209 @@
+# company-registry-lt/app/services/stats.py
+"""
+Сводная статистика реестра (таблица company_stats).
+
+Импортер считает её по кускам, которые и так проходят через pandas при записи:
+groupby по измерениям на каждом куске, в конце — сумма частичных сводок.
+Сводка собирается рядом с companies_<N> и переключается вместе с поколением.
+Инкрементальный импорт не пересчитывает её целиком: тем же кодом считаются
+сводки затронутых компаний до и после изменений, и в company_stats вносится
+их разница. API группирует уже готовую сводку (тысячи строк,
+сколько бы компаний ни было в реестре).
+pandas импортируется внутри функций: процессу API он не нужен.
+"""
+from sqlalchemy import select, func, text, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dictionaries import code_names
+from app.models.stats import CompanyStats
+
+# Измерения сводки (порядок — как в таблице)
+STATS_DIMENSIONS = ["legal_form_code", "status_code", "registration_year", "capital_bracket"]
+# Колонки companies, из которых считаются измерения
+SOURCE_COLUMNS = ["legal_form_code", "status_code", "registration_date", "authorized_capital"]
+# Группировки API -> колонки сводки
+GROUPINGS = {
+    "legal_form": "legal_form_code",
+    "status": "status_code",
+    "registration_year": "registration_year",
+    "capital_bracket": "capital_bracket",
+}
+# Диапазоны уставного капитала: [от, до) в валюте компании
+CAPITAL_BRACKETS = [
+    (0, 1000, "<1k"),
+    (1000, 10000, "1k-10k"),
+    (10000, 100000, "10k-100k"),
+    (100000, 1000000, "100k-1M"),
+    (1000000, float("inf"), "1M+"),
+]
+
+STATS_CHUNK_ROWS = 50000
+# Кодов в одном IN (...) — в пределах лимита переменных SQLite
+STATS_CODES_BATCH = 500
+
+
+class StatsAccumulator:
+    """Частичные сводки по кускам (pandas groupby) и их сумма."""
+
+    def __init__(self):
+        self._parts = []
+
+    def add(self, chunk):
+        """chunk — DataFrame с колонками SOURCE_COLUMNS (кусок импорта или таблицы)."""
+        import pandas as pd
+
+        capital = pd.to_numeric(chunk["authorized_capital"], errors="coerce")
+        frame = pd.DataFrame({
+            "legal_form_code": pd.to_numeric(chunk["legal_form_code"], errors="coerce"),
+            "status_code": pd.to_numeric(chunk["status_code"], errors="coerce"),
+            "registration_year": pd.to_datetime(chunk["registration_date"], errors="coerce").dt.year,
+            "capital_bracket": pd.cut(
+                capital,
+                bins=[low for low, _, _ in CAPITAL_BRACKETS] + [float("inf")],
+                labels=[label for _, _, label in CAPITAL_BRACKETS],
+                right=False,
+            ).astype(object),
+        })
+        self._parts.append(frame.groupby(STATS_DIMENSIONS, dropna=False).size())
+
+    @property
+    def total(self):
+        """Сколько строк учтено (для сверки с числом записанных компаний)."""
+        return int(sum(part.sum() for part in self._parts))
+
+    def rows(self):
+        """Строки сводки: кортежи (измерения..., число компаний); NaN -> None."""
+        import pandas as pd
+
+        if not self._parts:
+            return []
+        total = pd.concat(self._parts)
+        total = total.groupby(level=list(range(len(STATS_DIMENSIONS))), dropna=False).sum()
+        rows = []
+        for key, count in total.items():
+            form, status, year, bracket = (None if pd.isna(v) else v for v in key)
+            rows.append((
+                None if form is None else int(form),
+                None if status is None else int(status),
+                None if year is None else int(year),
+                bracket,
+                int(count),
+            ))
+        return rows
+
+
+def write_stats(conn, table_name, rows):
+    """Записывает строки сводки (StatsAccumulator.rows) в таблицу table_name."""
+    if not rows:
+        return
+    columns = STATS_DIMENSIONS + ["companies"]
+    conn.exec_driver_sql(
+        f'INSERT INTO "{table_name}" ({", ".join(columns)}) VALUES ({", ".join("?" for _ in columns)})',
+        rows,
+    )
+
+
+def rebuild_stats(conn, source="companies", target="company_stats"):
+    """
+    Пересчёт сводки target по таблице компаний source — в транзакции conn,
+    тем же кодом, что и при подсчёте по кускам импорта. Возвращает число строк сводки.
+    """
+    import pandas as pd
+
+    stats = StatsAccumulator()
+    for chunk in pd.read_sql(
+        text(f'SELECT {", ".join(SOURCE_COLUMNS)} FROM "{source}"'), conn, chunksize=STATS_CHUNK_ROWS
+    ):
+        stats.add(chunk)
+    rows = stats.rows()
+    conn.exec_driver_sql(f'DELETE FROM "{target}"')
+    write_stats(conn, target, rows)
+    return len(rows)
+
+
+def stats_for_codes(conn, codes, source="companies"):
+    """Сводка (StatsAccumulator) только по компаниям с кодами codes из таблицы source."""
+    import pandas as pd
+
+    stats = StatsAccumulator()
+    query = text(
+        f'SELECT {", ".join(SOURCE_COLUMNS)} FROM "{source}" WHERE code IN :codes'
+    ).bindparams(bindparam("codes", expanding=True))
+    for i in range(0, len(codes), STATS_CODES_BATCH):
+        rows = conn.execute(query, {"codes": codes[i:i + STATS_CODES_BATCH]}).all()
+        if rows:
+            stats.add(pd.DataFrame(rows, columns=SOURCE_COLUMNS))
+    return stats
+
+
+def apply_stats_delta(conn, before, after, target="company_stats"):
+    """
+    Вносит в сводку target разницу after - before: сводки затронутых компаний
+    до и после изменений (stats_for_codes). Сама сводка мала и читается целиком,
+    таблица компаний не сканируется. Возвращает число изменённых строк сводки.
+    """
+    delta = {}
+    for sign, stats in ((1, after), (-1, before)):
+        for *key, count in stats.rows():
+            delta[tuple(key)] = delta.get(tuple(key), 0) + sign * count
+
+    existing = {}
+    for row_id, *key, companies in conn.exec_driver_sql(
+        f'SELECT id, {", ".join(STATS_DIMENSIONS)}, companies FROM "{target}"'
+    ):
+        existing.setdefault(tuple(key), (row_id, companies))
+
+    updates, deletes, inserts = [], [], []
+    for key, diff in delta.items():
+        if diff == 0:
+            continue
+        row_id, companies = existing.get(key, (None, 0))
+        if row_id is None:
+            inserts.append(key + (diff,))
+        elif companies + diff > 0:
+            updates.append((companies + diff, row_id))
+        else:
+            deletes.append((row_id,))
+    if updates:
+        conn.exec_driver_sql(f'UPDATE "{target}" SET companies = ? WHERE id = ?', updates)
+    if deletes:
+        conn.exec_driver_sql(f'DELETE FROM "{target}" WHERE id = ?', deletes)
+    write_stats(conn, target, inserts)
+    return len(updates) + len(deletes) + len(inserts)
+
+
+# --- Чтение (API) ---
+
+async def query_stats(db: AsyncSession, group_by, filters):
+    """
+    Сводка по группам group_by (ключи GROUPINGS) с фильтрами по измерениям.
+    filters: legal_form_code, status_code, year_from, year_to, capital_bracket (None — без фильтра).
+    Возвращает (total, [dict группы с companies]) — крупные группы первыми;
+    к кодам формы и статуса добавляются названия из справочников.
+    """
+    columns = [getattr(CompanyStats, GROUPINGS[g]) for g in group_by]
+    conditions = []
+    if filters.get("legal_form_code") is not None:
+        conditions.append(CompanyStats.legal_form_code == filters["legal_form_code"])
+    if filters.get("status_code") is not None:
+        conditions.append(CompanyStats.status_code == filters["status_code"])
+    if filters.get("year_from") is not None:
+        conditions.append(CompanyStats.registration_year >= filters["year_from"])
+    if filters.get("year_to") is not None:
+        conditions.append(CompanyStats.registration_year <= filters["year_to"])
+    if filters.get("capital_bracket") is not None:
+        conditions.append(CompanyStats.capital_bracket == filters["capital_bracket"])
+
+    companies = func.sum(CompanyStats.companies).label("companies")
+    result = await db.execute(
+        select(*columns, companies).where(*conditions).group_by(*columns).order_by(companies.desc())
+    )
+    groups = []
+    for row in result:
+        group = dict(row._mapping)
+        if "legal_form_code" in group:
+            group["legal_form_name"] = code_names.legal_form(group["legal_form_code"])
+        if "status_code" in group:
+            group["status_name"] = code_names.status(group["status_code"])
+        groups.append(group)
+    return sum(g["companies"] for g in groups), groups
@@ -3,12 +3,14 @@ import os
 from fastapi import APIRouter, Request, Depends, Response, Form
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
+from sqlalchemy import select
 
-from app.core.db import get_db
+from app.core.db import get_db, get_read_db
 from app.models.company import Company
 from app.models.settings import Setting
 from app.core.translations import TRANSLATIONS
+from app.services.search import search_companies
+from app.core.http_cache import not_modified, cacheable
 
 router = APIRouter()
 
@@ -37,11 +39,18 @@ async def index_page(
     response: Response,
     q: str = None, 
     lang: str = None,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     current_lang = get_locale(request, lang)
     tr = TRANSLATIONS[current_lang]
 
+    # Страница зависит от языка (cookie / Accept-Language), он входит в ETag
+    vary = "Cookie, Accept-Language"
+    # ?lang= сохраняет выбор в cookie — такой ответ (и 304 тоже) должен её поставить
+    unchanged = None if lang else not_modified(request, variant=current_lang, vary=vary)
+    if unchanged is not None:
+        return unchanged
+
     companies = [] 
     error = None
     search_query = q 
@@ -50,16 +59,11 @@ async def index_page(
         clean_q = q.strip()
         if clean_q.isdigit():
             stmt = select(Company).where(Company.code == clean_q)
+            result = await db.execute(stmt)
+            companies = result.scalars().all()
         else:
-            stmt = select(Company).where(
-                or_(
-                    Company.name.ilike(f"%{clean_q}%"),
-                    Company.address.ilike(f"%{clean_q}%")
-                )
-            ).limit(50)
-
-        result = await db.execute(stmt)
-        companies = result.scalars().all()
+            # Полнотекстовый поиск (FTS5, ранжирование bm25, поиск по префиксу)
+            companies = await search_companies(db, clean_q, limit=50)
         
         if not companies:
             error = tr["not_found"].format(clean_q)
@@ -77,9 +81,10 @@ async def index_page(
         }
     )
     
+    # Ответ с cookie — только для кэша браузера, не для общего прокси
+    resp = cacheable(request, resp, variant=current_lang, private=bool(lang), vary=vary)
     if lang:
         resp.set_cookie(key="company_registry_lang", value=current_lang, max_age=3600*24*30)
-        
     return resp
 
 @router.get("/settings")
@@ -0,0 +1,61 @@
+# company-registry-lt/benchmarks/common.py
+"""Общие функции бенчмарков: перцентили задержек, сводка по фазе, RSS, перенаправление stdout."""
+import contextlib
+import os
+import sys
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 2)
+
+
+def summarize(samples, seconds):
+    """samples — кортежи (время, длительность в сек, HTTP-статус; 0 — ошибка соединения)."""
+    latencies = [s[1] for s in samples]
+    errors = sum(1 for s in samples if s[2] >= 500 or s[2] == 0)
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / seconds, 1) if seconds else None,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else None,
+    }
+
+
+def rss_mb():
+    """Текущий RSS процесса в МБ (Linux: /proc; иначе — пиковый, None — узнать нельзя)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux — КБ, macOS — байты
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+@contextlib.contextmanager
+def stdout_to_stderr():
+    """
+    Перенаправляет дескриптор 1 в stderr: логи импорта, в том числе из процессов
+    пула разбора (они наследуют дескрипторы), не попадают в JSON на stdout.
+    """
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
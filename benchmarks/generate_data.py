@@ -0,0 +1,207 @@
+# company-registry-lt/benchmarks/generate_data.py
+"""
+Генератор синтетических файлов реестра: JAR.csv, PVM.csv, CAPITAL.csv.
+
+    python -m benchmarks.generate_data --size medium --out data/bench
+    python -m benchmarks.generate_data --rows 50000 --pvm-sep ";" --capital-sep "," --out /tmp/jar
+
+Размеры: small — 10 тыс., medium — 250 тыс., large — 2 млн компаний.
+Данные похожи на настоящие: литовские названия и адреса с диакритикой, правовые
+формы, статусы, даты, НДС примерно у трети компаний, капитал у половины.
+Чтобы импорт проходил те же ветки, что и на реальных файлах, добавляются:
+  - повторы кода в JAR (более поздняя строка с новым названием должна победить);
+  - битые значения в JAR (неразбираемые даты, пустой адрес) — JAR читается строго,
+    поэтому строк с лишними полями в нём нет;
+  - битые строки в PVM/CAPITAL (лишние поля, пропуски) — импортер их пропускает;
+  - записи НДС/капитала для кодов, которых нет в JAR.
+Генерация детерминирована (--seed).
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+SIZES = {"small": 10_000, "medium": 250_000, "large": 2_000_000}
+
+# Первый код компании; коды идут подряд, чтобы бенчмарк мог выбирать их без чтения файла
+FIRST_CODE = 300_000_000
+
+LEGAL_FORMS = [
+    # (код, название, сокращение, вес)
+    (310, "Uždaroji akcinė bendrovė", "UAB", 60),
+    (950, "Mažoji bendrija", "MB", 15),
+    (320, "Akcinė bendrovė", "AB", 3),
+    (330, "Individuali įmonė", "IĮ", 8),
+    (570, "Viešoji įstaiga", "VšĮ", 7),
+    (710, "Asociacija", "Asociacija", 4),
+    (410, "Žemės ūkio bendrovė", "ŽŪB", 3),
+]
+STATUSES = [
+    # (код, название, вес)
+    (0, "Teisinis statusas neįregistruotas", 80),
+    (10, "Likviduojamas", 6),
+    (11, "Bankrutuojantis", 5),
+    (12, "Bankrutavęs", 4),
+    (14, "Reorganizuojamas", 2),
+    (99, "Išregistruotas", 3),
+]
+NAME_WORDS = [
+    "Ąžuolas", "Šilas", "Žalgiris", "Vėjas", "Ūkininkas", "Čiurlionis", "Baltija",
+    "Nemunas", "Neris", "Gintaras", "Statyba", "Prekyba", "Transportas", "Logistika",
+    "Sprendimai", "Technologijos", "Konsultacijos", "Investicijos", "Projektai",
+    "Medis", "Duona", "Pienas", "Šviesa", "Energija", "Sodas", "Kelias", "Tiltas",
+    "Vilniaus", "Kauno", "Klaipėdos", "Šiaulių", "Panevėžio", "Alytaus", "Marijampolės",
+    "Grupė", "Namai", "Paslaugos", "Dizainas", "Sistemos", "Servisas", "Studija",
+]
+STREETS = [
+    "Gedimino pr.", "Konstitucijos pr.", "Laisvės al.", "Savanorių pr.", "Žalgirio g.",
+    "Ukmergės g.", "Šeimyniškių g.", "Vytauto g.", "Taikos pr.", "Liepų g.",
+    "Ąžuolyno g.", "Kęstučio g.", "Vilniaus g.", "Jūros g.", "Šilutės pl.",
+]
+CITIES = [
+    ("Vilnius", "LT-0"), ("Kaunas", "LT-4"), ("Klaipėda", "LT-9"), ("Šiauliai", "LT-7"),
+    ("Panevėžys", "LT-3"), ("Alytus", "LT-6"), ("Marijampolė", "LT-6"), ("Utena", "LT-2"),
+]
+
+JAR_HEADER = [
+    "ja_kodas", "ja_pavadinimas", "adresas", "ja_reg_data", "form_kodas",
+    "form_pavadinimas", "stat_kodas", "stat_pavadinimas", "stat_data_nuo", "formavimo_data",
+]
+PVM_HEADER = ["mokescio_moketojo_identifikacinis_numeris", "pvm_moketojo_kodas", "pvm_iregistravimo_data"]
+CAPITAL_HEADER = ["ja_kodas", "ist_kapitalas", "valiuta"]
+
+
+def _random_date(rnd, start=date(1990, 1, 1), days=13000):
+    return (start + timedelta(days=rnd.randrange(days))).isoformat()
+
+
+def _company_name(rnd, short_form, i):
+    words = " ".join(rnd.sample(NAME_WORDS, rnd.choice((1, 1, 2, 3))))
+    if short_form in ("UAB", "AB", "MB", "VšĮ", "ŽŪB"):
+        return f'{short_form} "{words}"'
+    if short_form == "IĮ":
+        return f"{words} IĮ {i % 1000}"
+    return f"{short_form} {words}"
+
+
+def _address(rnd):
+    city, prefix = rnd.choice(CITIES)
+    return (
+        f"{rnd.choice(STREETS)} {rnd.randint(1, 200)}-{rnd.randint(1, 90)}, "
+        f"{prefix}{rnd.randint(1000, 9999)} {city}"
+    )
+
+
+def _write_jar(path, codes, rnd, dup_ratio, bad_ratio):
+    forms_w = [f[3] for f in LEGAL_FORMS]
+    statuses_w = [s[2] for s in STATUSES]
+    updated = date.today().isoformat()
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("|".join(JAR_HEADER) + "\n")
+        for i, code in enumerate(codes):
+            form_code, form_name, short_form, _ = rnd.choices(LEGAL_FORMS, forms_w)[0]
+            stat_code, stat_name, _ = rnd.choices(STATUSES, statuses_w)[0]
+            reg_date = _random_date(rnd)
+            address = _address(rnd)
+            if rnd.random() < bad_ratio:
+                # Битые значения: импортер превращает их в NULL
+                reg_date = rnd.choice(("0000-00-00", "2001-13-45", "nežinoma"))
+                address = ""
+            row = [
+                str(code), _company_name(rnd, short_form, i), address, reg_date,
+                str(form_code), form_name, str(stat_code), stat_name,
+                _random_date(rnd, date(2005, 1, 1), 7000), updated,
+            ]
+            f.write("|".join(row) + "\n")
+            if rnd.random() < dup_ratio:
+                # Повтор кода дальше по файлу (в том числе в другом куске импорта)
+                row[1] = _company_name(rnd, short_form, i) + " (pakeista)"
+                f.write("|".join(row) + "\n")
+
+
+def _pvm_code(code):
+    return f"LT{code % 1_000_000_000:09d}1{code % 10}"
+
+
+def _write_pvm(path, codes, rnd, sep, bad_ratio, orphans):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(sep.join(PVM_HEADER) + "\n")
+        for code in codes:
+            if rnd.random() >= 0.35:
+                continue
+            if rnd.random() < bad_ratio:
+                f.write(sep.join([str(code), _pvm_code(code), _random_date(rnd), "x", "y"]) + "\n")
+                continue
+            f.write(sep.join([str(code), _pvm_code(code), _random_date(rnd, date(1994, 1, 1))]) + "\n")
+        for code in orphans:
+            f.write(sep.join([str(code), _pvm_code(code), _random_date(rnd)]) + "\n")
+
+
+def _write_capital(path, codes, rnd, sep, bad_ratio, orphans):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(sep.join(CAPITAL_HEADER) + "\n")
+        for code in list(codes) + list(orphans):
+            if rnd.random() >= 0.5:
+                continue
+            if rnd.random() < bad_ratio:
+                f.write(sep.join([str(code), "", "EUR", "extra"]) + "\n")
+                continue
+            amount = rnd.choice((2500, 2500, 10000, 40000)) * rnd.randint(1, 20)
+            cents = rnd.choice(("00", "00", "50"))
+            # В файлах с «|» десятичный разделитель — запятая, в CSV с «,» — точка
+            value = f"{amount}.{cents}" if sep == "," else f"{amount},{cents}"
+            currency = rnd.choice(("EUR", "EUR", "EUR", "LTL"))
+            f.write(sep.join([str(code), value, currency]) + "\n")
+
+
+def generate(out_dir, rows, seed=1, pvm_sep=",", capital_sep="|", dup_ratio=0.01, bad_ratio=0.002):
+    """
+    Пишет JAR.csv, PVM.csv, CAPITAL.csv в out_dir.
+    Возвращает dict с путями и числом уникальных кодов (для отчёта бенчмарка).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rnd = random.Random(seed)
+    codes = range(FIRST_CODE, FIRST_CODE + rows)
+    # Коды, которых нет в JAR (ликвидированные, иностранные плательщики НДС)
+    orphans = range(FIRST_CODE + rows, FIRST_CODE + rows + max(1, rows // 100))
+
+    paths = {name: os.path.join(out_dir, f"{name}.csv") for name in ("JAR", "PVM", "CAPITAL")}
+    _write_jar(paths["JAR"], codes, rnd, dup_ratio, bad_ratio)
+    _write_pvm(paths["PVM"], codes, rnd, pvm_sep, bad_ratio, orphans)
+    _write_capital(paths["CAPITAL"], codes, rnd, capital_sep, bad_ratio, orphans)
+    return {
+        "rows": rows,
+        "seed": seed,
+        "first_code": FIRST_CODE,
+        "files_mb": {name: round(os.path.getsize(p) / (1024 * 1024), 1) for name, p in paths.items()},
+    }
+
+
+def parse_rows(args):
+    return args.rows if args.rows else SIZES[args.size]
+
+
+def add_generator_args(parser):
+    parser.add_argument("--size", choices=SIZES, default="small")
+    parser.add_argument("--rows", type=int, help="Точное число компаний (вместо --size)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--pvm-sep", choices=[",", ";"], default=",")
+    parser.add_argument("--capital-sep", choices=["|", ","], default="|")
+    parser.add_argument("--dup-ratio", type=float, default=0.01, help="Доля повторов кода в JAR")
+    parser.add_argument("--bad-ratio", type=float, default=0.002, help="Доля битых строк/значений")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_generator_args(parser)
+    parser.add_argument("--out", default=os.path.join("data", "bench"))
+    args = parser.parse_args()
+    info = generate(
+        args.out, parse_rows(args), args.seed, args.pvm_sep, args.capital_sep,
+        args.dup_ratio, args.bad_ratio,
+    )
+    print(f"✅ Сгенерировано {info['rows']} компаний в {args.out}: {info['files_mb']} МБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# company-registry-lt/benchmarks/read_during_import.py
+"""
+Нагрузочный тест: пропускная способность чтения API до, во время и после импорта.
+
+Запускается против работающего сервиса (данные уже импортированы):
+    python -m benchmarks.read_during_import --base-url http://localhost:8010 --threads 8
+
+Сценарий: фаза before (чтение без импорта), затем запуск полной сборки
+поколения из уже скачанных файлов (force-update без скачивания), фаза during —
+пока не сменится активное поколение, фаза after. Запросы: компания по коду
+(случайный, мимо кэша) и страница списка с текстовым фильтром. Результат — JSON в stdout.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+import requests
+
+from benchmarks.common import summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8010")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--before", type=float, default=10, help="Секунд чтения до импорта")
+    parser.add_argument("--after", type=float, default=10, help="Секунд чтения после импорта")
+    parser.add_argument("--import-timeout", type=float, default=1800)
+    args = parser.parse_args()
+    api = args.base_url.rstrip("/") + "/api/v1"
+
+    page = requests.get(f"{api}/companies", params={"limit": 200}, timeout=30).json()
+    words = sorted({w for c in page["items"] for w in c["name"].split() if len(w) > 3 and w.isalpha()})
+    if not page["items"]:
+        raise SystemExit("В базе нет компаний — сначала выполните импорт.")
+
+    samples = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def reader():
+        session = requests.Session()
+        rnd = random.Random()
+        while not stop.is_set():
+            # Случайные коды: кэш ответов почти не попадает, каждый запрос идёт в БД
+            if rnd.random() < 0.5:
+                url, params = f"{api}/company/{rnd.randint(100000000, 399999999)}", None
+            else:
+                url, params = f"{api}/companies", {"q": rnd.choice(words or ["a"]), "limit": 20}
+            start = time.perf_counter()
+            try:
+                status = session.get(url, params=params, timeout=60).status_code
+            except requests.RequestException:
+                status = 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                samples.append((time.time(), elapsed, status))
+
+    def generation():
+        return requests.get(f"{api}/cache/stats", timeout=30).json().get("generation")
+
+    threads = [threading.Thread(target=reader, daemon=True) for _ in range(args.threads)]
+    for t in threads:
+        t.start()
+
+    phases = {}
+    t0 = time.time()
+    time.sleep(args.before)
+    phases["before"] = (t0, time.time())
+
+    old_generation = generation()
+    t1 = time.time()
+    requests.post(
+        f"{api}/force-update",
+        params={"dl_jar": False, "dl_pvm": False, "dl_cap": False, "incremental": False, "force": True},
+        timeout=30,
+    )
+    while generation() == old_generation and time.time() - t1 < args.import_timeout:
+        time.sleep(0.5)
+    phases["during"] = (t1, time.time())
+
+    t2 = time.time()
+    time.sleep(args.after)
+    phases["after"] = (t2, time.time())
+    stop.set()
+    for t in threads:
+        t.join()
+
+    report = {"threads": args.threads, "generation": [old_generation, generation()]}
+    for name, (start, end) in phases.items():
+        phase_samples = [s for s in samples if start <= s[0] < end]
+        report[name] = dict(summarize(phase_samples, end - start), seconds=round(end - start, 1))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# company-registry-lt/benchmarks/startup.py
+"""
+Бенчмарк старта процесса API (как у каждого воркера uvicorn).
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --db data/registry.db --out startup.json
+
+Каждый прогон — отдельный процесс: импорт app.main, затем lifespan (схема,
+поколение, индекс кодов, планировщик) до момента, когда сервис готов принимать
+запросы. Замеры: время импорта, время старта, общее время от запуска
+интерпретатора, RSS после старта и какие тяжёлые модули оказались загружены.
+Без --db используется пустая временная БД: первый прогон создаёт схему (cold),
+остальные стартуют на готовой (warm) — так работает каждый следующий рестарт.
+
+Итог — JSON в stdout (и в --out); логи сервиса идут в stderr.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Модули, которые процессу API не нужны, пока не идёт импорт или выгрузка
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "requests")
+
+
+def child():
+    """Один старт (в отдельном процессе); результат — JSON в stdout."""
+    import asyncio
+    from benchmarks.common import rss_mb, stdout_to_stderr
+
+    with stdout_to_stderr():
+        start = time.perf_counter()
+        from app.main import app
+        imported = time.perf_counter()
+        rss_after_import = rss_mb()
+
+        async def startup():
+            async with app.router.lifespan_context(app):
+                return time.perf_counter()
+
+        ready = asyncio.run(startup())
+    print(json.dumps({
+        "import_sec": round(imported - start, 3),
+        "startup_sec": round(ready - imported, 3),
+        "rss_after_import_mb": rss_after_import,
+        "rss_mb": rss_mb(),
+        "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules],
+    }))
+
+
+def run_once(env):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        cwd=BASE_DIR, env=env, stdout=subprocess.PIPE, stderr=sys.stderr, text=True, check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["total_sec"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def summarize_runs(runs):
+    keys = ("import_sec", "startup_sec", "total_sec", "rss_after_import_mb", "rss_mb")
+    return {
+        key: statistics.median(r[key] for r in runs if r[key] is not None)
+        for key in keys if any(r[key] is not None for r in runs)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--runs", type=int, default=5, help="Сколько стартов (после первого)")
+    parser.add_argument("--db", help="Файл БД (по умолчанию — пустая временная)")
+    parser.add_argument("--out", help="Сохранить JSON в файл")
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    env = dict(os.environ)
+    work_dir = None
+    if args.db:
+        env["REGISTRY_DB_PATH"] = os.path.abspath(args.db)
+    else:
+        work_dir = tempfile.mkdtemp(prefix="registry-startup-")
+        env["REGISTRY_DB_PATH"] = os.path.join(work_dir, "registry.db")
+    # Каталог static нужен app.main (в репозитории его может не быть)
+    os.makedirs(os.path.join(BASE_DIR, "app", "static"), exist_ok=True)
+
+    try:
+        print("⏱️ [BENCH] Первый старт...", file=sys.stderr)
+        first = run_once(env)
+        runs = []
+        for i in range(args.runs):
+            print(f"⏱️ [BENCH] Старт {i + 1}/{args.runs}...", file=sys.stderr)
+            runs.append(run_once(env))
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "python": sys.version.split()[0],
+        "db": "temporary" if work_dir else env["REGISTRY_DB_PATH"],
+        "first": first,
+        "median": summarize_runs(runs),
+        "heavy_modules": sorted({m for r in runs for m in r["heavy_modules"]}),
+        "runs": runs,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
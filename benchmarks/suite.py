@@ -0,0 +1,302 @@
+# company-registry-lt/benchmarks/suite.py
+"""
+Бенчмарк импорта и запросов на синтетических данных — базовая линия для сравнения.
+
+    python -m benchmarks.suite --size medium --out baseline-medium.json
+    python -m benchmarks.suite --rows 50000 --threads 16 --duration 20
+
+1. Генерирует JAR/PVM/CAPITAL (benchmarks.generate_data) во временный каталог
+   и направляет туда импортер и БД (REGISTRY_IMPORT_DIR, REGISTRY_DB_PATH).
+2. Импорт: process_and_save на пустой БД (полная сборка поколения), затем ещё раз
+   с incremental=True на тех же файлах (сравнение хэшей, изменений нет).
+   Для каждого прогона: тайминги стадий (StageTimer), строк/с, пиковый RSS процесса
+   и пиковый RSS по стадиям (по последней начатой стадии — они перекрываются).
+3. Запросы: поднимает uvicorn на этой БД и с фиксированной конкуренцией (--threads)
+   гоняет GET /api/v1/company/{code} и поиск на главной странице (/?q=...) —
+   по --duration секунд на сценарий: p50/p95/p99, rps, ошибки.
+
+Итог — JSON в stdout (и в --out); логи импорта и сервера идут в stderr.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from benchmarks.common import stdout_to_stderr, summarize
+from benchmarks.generate_data import FIRST_CODE, NAME_WORDS, add_generator_args, generate, parse_rows
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RssSampler:
+    """
+    Получатель прогресса StageTimer: фоновый поток раз в interval секунд снимает RSS
+    и относит его к последней начатой стадии.
+    """
+
+    def __init__(self, rss_func, interval=0.05):
+        self.rss_func = rss_func
+        self.interval = interval
+        self.current = "startup"
+        self.rows_processed = 0
+        self.error = None
+        self.peak_mb = 0.0
+        self.by_stage = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- интерфейс listener StageTimer ---
+    def stage(self, name):
+        self.current = name
+
+    def rows(self, count):
+        self.rows_processed += count
+
+    def failed(self, error):
+        self.error = str(error)
+
+    # --- замер ---
+    def _sample(self):
+        rss = self.rss_func()
+        if rss is None:
+            return
+        self.peak_mb = max(self.peak_mb, rss)
+        self.by_stage[self.current] = max(self.by_stage.get(self.current, 0.0), rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def children_peak_rss_mb():
+    """Пиковый RSS среди завершившихся дочерних процессов (пул разбора CSV)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux — КБ, macOS — байты
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def prepare_db():
+    from app.services.schema import init_schema
+    init_schema()
+
+
+def run_import(incremental):
+    from app.services.pipeline import StageTimer
+    from app.services.registry_importer import process_and_save, current_rss_mb
+
+    sampler = RssSampler(current_rss_mb)
+    timer = StageTimer(listener=sampler)
+    start = time.perf_counter()
+    with sampler, stdout_to_stderr():
+        generation_id = process_and_save(incremental=incremental, timer=timer)
+    seconds = time.perf_counter() - start
+    return {
+        "mode": "incremental" if incremental else "full",
+        "generation_id": generation_id,
+        "error": sampler.error,
+        "seconds": round(seconds, 2),
+        "rows_processed": sampler.rows_processed,
+        "rows_per_sec": round(sampler.rows_processed / seconds, 1) if seconds else None,
+        "peak_rss_mb": round(sampler.peak_mb, 1),
+        "peak_rss_by_stage_mb": {k: round(v, 1) for k, v in sampler.by_stage.items()},
+        "stages": timer.as_dict(),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def api_server(env, startup_timeout=120):
+    """uvicorn на БД бенчмарка; отдаёт базовый URL."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BASE_DIR, env=env, stdout=sys.stderr,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + startup_timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn завершился с кодом {process.returncode}")
+            try:
+                if requests.get(f"{base_url}/api/v1/cache/stats", timeout=5).ok:
+                    break
+            except requests.RequestException:
+                pass
+            if time.time() > deadline:
+                raise RuntimeError("uvicorn не поднялся")
+            time.sleep(0.3)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run_load(make_request, threads, duration, warmup):
+    """
+    threads потоков шлют запросы make_request(rnd) -> (url, params) без пауз.
+    Первые warmup секунд не учитываются. Возвращает сводку (benchmarks.common.summarize).
+    """
+    samples = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def worker(seed):
+        session = requests.Session()
+        rnd = random.Random(seed)
+        while not stop.is_set():
+            url, params = make_request(rnd)
+            start = time.perf_counter()
+            try:
+                status = session.get(url, params=params, timeout=60).status_code
+            except requests.RequestException:
+                status = 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                samples.append((time.time(), elapsed, status))
+
+    workers = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(threads)]
+    for t in workers:
+        t.start()
+    time.sleep(warmup)
+    measure_from = time.time()
+    time.sleep(duration)
+    measure_to = time.time()
+    stop.set()
+    for t in workers:
+        t.join()
+
+    measured = [s for s in samples if measure_from <= s[0] < measure_to]
+    report = summarize(measured, measure_to - measure_from)
+    report["ok"] = sum(1 for s in measured if s[2] == 200)
+    return report
+
+
+def run_queries(base_url, rows, threads, duration, warmup):
+    api = f"{base_url}/api/v1"
+
+    def company_by_code(rnd):
+        # ~5% кодов вне реестра (404); остальные случайные — кэш ответов прогревается постепенно
+        code = FIRST_CODE + rnd.randrange(int(rows * 1.05))
+        return f"{api}/company/{code}", None
+
+    def search(rnd):
+        word = rnd.choice(NAME_WORDS)
+        # Половина запросов — префикс слова (поиск по началу слова)
+        query = word if rnd.random() < 0.5 else word[:4]
+        return f"{base_url}/", {"q": query}
+
+    report = {"threads": threads, "duration_sec": duration}
+    for name, make_request in (("company_by_code", company_by_code), ("search", search)):
+        print(f"⏱️ [BENCH] Запросы: {name} ({threads} потоков, {duration} с)...", file=sys.stderr)
+        report[name] = run_load(make_request, threads, duration, warmup)
+    # Компания по коду: одна строка на ответ 200
+    report["company_by_code"]["rows_per_sec"] = round(report["company_by_code"]["ok"] / duration, 1)
+    report["cache"] = requests.get(f"{api}/cache/stats", timeout=30).json()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_generator_args(parser)
+    parser.add_argument("--threads", type=int, default=8, help="Конкуренция запросов")
+    parser.add_argument("--duration", type=float, default=15, help="Секунд на сценарий запросов")
+    parser.add_argument("--warmup", type=float, default=2, help="Секунд прогрева (не учитываются)")
+    parser.add_argument("--no-incremental", action="store_true", help="Без повторного инкрементального прогона")
+    parser.add_argument("--no-queries", action="store_true", help="Только импорт")
+    parser.add_argument("--work-dir", help="Каталог для файлов и БД (по умолчанию временный)")
+    parser.add_argument("--keep", action="store_true", help="Не удалять рабочий каталог")
+    parser.add_argument("--out", help="Сохранить JSON в файл")
+    args = parser.parse_args()
+
+    rows = parse_rows(args)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="registry-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+    # До первого импорта app: пути берутся из настроек при загрузке модулей
+    os.environ["REGISTRY_DB_PATH"] = os.path.join(work_dir, "registry.db")
+    os.environ["REGISTRY_IMPORT_DIR"] = work_dir
+
+    try:
+        print(f"🧪 [BENCH] Генерация {rows} компаний в {work_dir}...", file=sys.stderr)
+        start = time.perf_counter()
+        data = generate(
+            work_dir, rows, args.seed, args.pvm_sep, args.capital_sep, args.dup_ratio, args.bad_ratio,
+        )
+        data["generate_sec"] = round(time.perf_counter() - start, 2)
+
+        from app.core.config import settings
+        prepare_db()
+        imports = [run_import(incremental=False)]
+        if not args.no_incremental:
+            imports.append(run_import(incremental=True))
+
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": {
+                name: getattr(settings, name)
+                for name in (
+                    "import_chunk_rows", "import_parse_workers", "import_prefetch_chunks",
+                    "import_sqlite_cache_mb", "sqlite_journal_mode", "sqlite_mmap_mb",
+                    "sqlite_cache_mb", "sqlite_read_pool_size",
+                )
+            },
+            "data": data,
+            "import": imports,
+            "parse_workers_peak_rss_mb": children_peak_rss_mb(),
+            "db_size_mb": round(os.path.getsize(os.environ["REGISTRY_DB_PATH"]) / (1024 * 1024), 1),
+        }
+
+        if not args.no_queries:
+            with api_server(dict(os.environ)) as base_url:
+                report["queries"] = run_queries(base_url, rows, args.threads, args.duration, args.warmup)
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
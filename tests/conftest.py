@@ -0,0 +1,126 @@
+# company-registry-lt/tests/conftest.py
+"""
+Общие фикстуры тестов.
+
+Движки БД создаются при импорте app.core.db по настройкам REGISTRY_*, поэтому
+временные пути задаются до первого импорта приложения. Каждый тест начинает
+с пустой схемой: таблицы удаляются, init_schema создаёт их заново.
+"""
+import os
+import shutil
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="registry-tests-")
+os.environ["REGISTRY_DB_PATH"] = os.path.join(_TMP, "registry.db")
+os.environ["REGISTRY_IMPORT_DIR"] = os.path.join(_TMP, "import")
+# Разбор НДС и капитала в текущем процессе (без пула spawn)
+os.environ["REGISTRY_IMPORT_PARSE_WORKERS"] = "0"
+os.environ["REGISTRY_IMPORT_CHUNK_ROWS"] = "4"
+
+import pytest  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.db import sync_engine, jobs_engine  # noqa: E402
+from app.core.cache import company_cache  # noqa: E402
+from app.core.http_cache import validators  # noqa: E402
+from app.services import code_index as code_index_module, export, registry_importer  # noqa: E402
+from app.services.code_index import code_index  # noqa: E402
+from app.services.schema import init_schema  # noqa: E402
+
+JAR_HEADER = [
+    "ja_kodas", "ja_pavadinimas", "adresas", "ja_reg_data", "form_kodas", "form_pavadinimas",
+    "stat_kodas", "stat_pavadinimas", "stat_data_nuo", "formavimo_data",
+]
+LEGAL_FORMS = {310: "Uždaroji akcinė bendrovė", 320: "Akcinė bendrovė", 950: "Mažoji bendrija"}
+STATUSES = {0: "Teisinis statusas neįregistruotas", 10: "Likviduojama"}
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+def _drop_all(engine):
+    with engine.begin() as conn:
+        # Сначала виртуальные таблицы: их служебные таблицы удаляются вместе с ними
+        for sql in (
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%'",
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'",
+        ):
+            for (name,) in conn.exec_driver_sql(sql).all():
+                conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{name}"')
+        conn.exec_driver_sql("PRAGMA user_version = 0")
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    """Пустая схема обеих БД; снимки и индексы кодов — во временном каталоге теста."""
+    _drop_all(jobs_engine)
+    _drop_all(sync_engine)
+    init_schema()
+    monkeypatch.setattr(code_index_module, "INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(export, "EXPORT_DIR", str(tmp_path / "export"))
+    company_cache.set_generation(None)
+    code_index.set_generation(None)
+    validators.set_generation(None)
+    yield sync_engine
+    code_index.set_generation(None)
+
+
+def company(code, name=None, **fields):
+    """Строка JAR: код и название, остальное — значения по умолчанию или из fields."""
+    row = {
+        "code": str(code),
+        "name": name or f'UAB "Įmonė {code}"',
+        "address": f"Gedimino pr. {int(code) % 100}, Vilnius",
+        "registration_date": "2010-05-11",
+        "legal_form_code": 310,
+        "status_code": 0,
+        "status_date_from": "2010-05-11",
+        "data_updated_at": "2026-10-17",
+    }
+    row.update(fields)
+    return row
+
+
+def write_sources(companies, pvm=None, capital=None):
+    """Пишет JAR.csv, PVM.csv и CAPITAL.csv в каталог импорта (формат как у источников)."""
+    os.makedirs(registry_importer.TEMP_DIR, exist_ok=True)
+    with open(registry_importer.JAR_PATH, "w", encoding="utf-8") as f:
+        f.write("|".join(JAR_HEADER) + "\n")
+        for c in companies:
+            values = [
+                c["code"], c["name"], c["address"], c["registration_date"],
+                c["legal_form_code"], LEGAL_FORMS.get(c["legal_form_code"], "Kita"),
+                c["status_code"], STATUSES.get(c["status_code"], "Kitas"),
+                c["status_date_from"], c["data_updated_at"],
+            ]
+            f.write("|".join("" if v is None else str(v) for v in values) + "\n")
+    # Файл НДС меньше 100 байт импортер считает пустым — заголовок длинный
+    with open(registry_importer.PVM_PATH, "w", encoding="utf-8") as f:
+        f.write("mokescio_moketojo_identifikacinis_numeris,pvm_moketojo_kodas,pvm_iregistravimo_data\n")
+        for code, pvm_code in (pvm or {}).items():
+            f.write(f"{code},{pvm_code},2015-01-01\n")
+    with open(registry_importer.CAPITAL_PATH, "w", encoding="utf-8") as f:
+        f.write("ja_kodas|ist_kapitalas|valiuta\n")
+        for code, amount in (capital or {}).items():
+            f.write(f"{code}|{amount}|EUR\n")
+
+
+def run_import(companies, incremental=False, **sources):
+    """Пишет источники и обрабатывает их без скачивания. Возвращает id активного поколения."""
+    write_sources(companies, **sources)
+    return registry_importer.process_and_save(incremental=incremental)
+
+
+@pytest.fixture
+def client(db):
+    """Клиент API без lifespan (планировщика, аренды) — только роутеры."""
+    from app.api.v1.endpoints import router as api_router
+    from app.api.v1.imports import router as imports_router
+
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    app.include_router(imports_router, prefix="/api/v1")
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,136 @@
+# company-registry-lt/tests/test_changes.py
+"""Лента изменений /api/v1/changes: since/until и курсор по страницам."""
+import json
+
+from app.core.config import settings
+from app.services import generations, registry_importer
+from app.services.generations import get_active_generation
+from conftest import company, run_import
+
+BASE = [company(100000000 + i) for i in range(20)]
+
+
+def _walk(client, since, limit):
+    """Все страницы ленты по next_cursor: (записи по порядку, until каждой страницы)."""
+    items, untils, cursor = [], [], None
+    while True:
+        params = {"since": since, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/v1/changes", params=params).json()
+        items += page["items"]
+        untils.append(page["until"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items, untils
+
+
+def _second_generation(monkeypatch):
+    monkeypatch.setattr(settings, "incremental_max_change_ratio", 1.0)
+    first = run_import(BASE)
+    changed = [c for c in BASE if c["code"] != "100000005"]
+    changed[0] = company(100000000, name='UAB "Pervadinta"')
+    changed.append(company(100000099))
+    second = run_import(changed, incremental=True)
+    return first, second
+
+
+def test_since_returns_only_later_generations(client, monkeypatch):
+    first, second = _second_generation(monkeypatch)
+
+    page = client.get("/api/v1/changes", params={"since": first}).json()
+    assert (page["since"], page["until"], page["next_cursor"]) == (first, second, None)
+    assert sorted((i["code"], i["change"], i["fields"]) for i in page["items"]) == [
+        ("100000000", "modified", ["name"]),
+        ("100000005", "removed", None),
+        ("100000099", "added", None),
+    ]
+    assert {i["generation_id"] for i in page["items"]} == {second}
+    # Клиент уже на последнем поколении — лента пуста
+    assert client.get("/api/v1/changes", params={"since": second}).json()["items"] == []
+
+
+def test_cursor_pages_cover_feed_once(client, monkeypatch):
+    _, second = _second_generation(monkeypatch)
+
+    items, untils = _walk(client, since=0, limit=4)
+    ids = [i["id"] for i in items]
+    assert ids == sorted(set(ids))
+    assert len(items) == len(BASE) + 3
+    assert set(untils) == {second}
+    whole = client.get("/api/v1/changes", params={"since": 0, "limit": 100}).json()
+    assert [i["id"] for i in whole["items"]] == ids
+
+
+def test_cursor_survives_new_generation(client, monkeypatch):
+    first, second = _second_generation(monkeypatch)
+    page = client.get("/api/v1/changes", params={"since": first, "limit": 2}).json()
+    seen = [i["id"] for i in page["items"]]
+
+    third = run_import(BASE, incremental=True)
+
+    rest = client.get("/api/v1/changes", params={"since": first, "cursor": page["next_cursor"], "limit": 100}).json()
+    assert rest["until"] == third
+    ids = seen + [i["id"] for i in rest["items"]]
+    assert ids == sorted(set(ids))
+    assert {i["generation_id"] for i in rest["items"]} == {second, third}
+
+
+def test_limit_is_capped(client, monkeypatch):
+    monkeypatch.setattr(settings, "changes_max_limit", 5)
+    run_import(BASE)
+
+    page = client.get("/api/v1/changes", params={"since": 0, "limit": 1000}).json()
+    assert len(page["items"]) == 5
+    assert page["next_cursor"] == page["items"][-1]["id"]
+
+
+def test_ndjson_streams_whole_feed_after_cursor(client, monkeypatch):
+    _, second = _second_generation(monkeypatch)
+    pages, _ = _walk(client, since=0, limit=7)
+
+    response = client.get("/api/v1/changes", params={"since": 0, "format": "ndjson"})
+    assert response.headers["x-changes-until"] == str(second)
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert streamed == pages
+
+    cursor = pages[9]["id"]
+    tail = client.get("/api/v1/changes", params={"since": 0, "cursor": cursor, "format": "ndjson"})
+    assert [json.loads(line) for line in tail.text.splitlines()] == pages[10:]
+
+
+def test_no_feed_before_first_import(client):
+    assert client.get("/api/v1/changes", params={"since": 0}).status_code == 410
+
+
+def test_feed_is_recorded_when_generation_switches(client, monkeypatch):
+    # Слушатель смены поколения — момент, когда API начинает отдавать ETag нового поколения
+    monkeypatch.setattr(settings, "incremental_max_change_ratio", 1.0)
+    seen = []
+
+    def on_switch(generation_id):
+        page = client.get("/api/v1/changes", params={"since": 0, "limit": 100}).json()
+        history = client.get("/api/v1/company/100000000/history").json()
+        seen.append((generation_id, page["until"], history["versions"][-1]["name"]))
+
+    monkeypatch.setattr(generations, "_listeners", [on_switch])
+    first = run_import(BASE)
+    renamed = [company(100000000, name='UAB "Pervadinta"')] + BASE[1:]
+    second = run_import(renamed)
+    third = run_import(BASE, incremental=True)
+
+    name = BASE[0]["name"]
+    assert seen == [(first, first, name), (second, second, 'UAB "Pervadinta"'), (third, third, name)]
+
+
+def test_history_failure_does_not_cancel_full_import(client, db, monkeypatch):
+    first = run_import(BASE)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("history is broken")
+
+    monkeypatch.setattr(registry_importer, "record_history", broken)
+    second = run_import([company(100000000, name='UAB "Pervadinta"')] + BASE[1:])
+
+    assert get_active_generation(db).id == second
+    page = client.get("/api/v1/changes", params={"since": first}).json()
+    # Изменения поколения откатились вместе с историей; следующий импорт запишет их заново
+    assert (page["until"], page["items"]) == (first, [])
@@ -0,0 +1,67 @@
+# company-registry-lt/tests/test_companies_list.py
+"""Список компаний /api/v1/companies: keyset-пагинация по коду и фильтры."""
+from app.core.config import settings
+from conftest import company, run_import
+
+COMPANIES = [
+    company(100000000 + i, status_code=10 if i % 3 == 0 else 0, legal_form_code=950 if i % 2 else 310)
+    for i in range(25)
+]
+
+
+def _walk(client, **params):
+    """Все страницы по next_cursor: (коды по порядку, число страниц, ответ первой страницы)."""
+    codes, pages, first = [], 0, None
+    cursor = None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        page = client.get("/api/v1/companies", params=query).json()
+        first = first or page
+        pages += 1
+        codes += [c["code"] for c in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return codes, pages, first
+
+
+def test_pages_cover_all_codes_in_order(client):
+    run_import(COMPANIES)
+
+    codes, pages, first = _walk(client, limit=7)
+    assert codes == sorted(c["code"] for c in COMPANIES)
+    assert pages == 4
+    assert (first["total"], first["total_exact"]) == (25, True)
+
+
+def test_cursor_is_last_code_of_page(client):
+    run_import(COMPANIES)
+
+    page = client.get("/api/v1/companies", params={"limit": 5}).json()
+    assert page["next_cursor"] == page["items"][-1]["code"] == "100000004"
+    after = client.get("/api/v1/companies", params={"limit": 5, "cursor": "100000004"}).json()
+    assert after["items"][0]["code"] == "100000005"
+
+
+def test_filters_apply_on_every_page(client):
+    run_import(COMPANIES)
+
+    codes, _, first = _walk(client, status_code=10, legal_form_code=310, limit=2)
+    expected = [c["code"] for c in COMPANIES if c["status_code"] == 10 and c["legal_form_code"] == 310]
+    assert codes == expected
+    assert first["total"] == len(expected)
+
+
+def test_last_page_has_no_cursor(client):
+    run_import(COMPANIES)
+
+    page = client.get("/api/v1/companies", params={"limit": 25}).json()
+    assert len(page["items"]) == 25
+    assert page["next_cursor"] is None
+
+
+def test_count_cap_reports_lower_bound(client, monkeypatch):
+    monkeypatch.setattr(settings, "list_count_cap", 5)
+    run_import(COMPANIES)
+
+    page = client.get("/api/v1/companies", params={"legal_form_code": 310, "limit": 2}).json()
+    assert (page["total"], page["total_exact"]) == (5, False)
@@ -0,0 +1,174 @@
+# company-registry-lt/tests/test_downloads.py
+"""Условное скачивание источников и докачка — против локального HTTP-сервера."""
+import hashlib
+import os
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.settings import Setting
+from app.services import registry_importer
+from app.services.pipeline import StageTimer
+from app.services.registry_importer import SideTables, download_file, load_source_state, run_full_import
+from conftest import company, write_sources
+
+
+class StubServer:
+    """
+    Отдаёт файлы по путям: ETag — хэш содержимого, If-None-Match -> 304,
+    Range + If-Range (тот же ETag) -> 206. truncate[path] = N обрывает
+    следующий ответ после N байт тела.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.truncate = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.requests.append((self.path, dict(self.headers)))
+                body = stub.files.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                start = 0
+                range_header = self.headers.get("Range")
+                if range_header and self.headers.get("If-Range") == etag:
+                    start = int(range_header.removeprefix("bytes=").rstrip("-"))
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+                else:
+                    self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body) - start))
+                self.end_headers()
+                cut = stub.truncate.pop(self.path, None)
+                self.wfile.write(body[start:] if cut is None else body[start:start + cut])
+                if cut is not None:
+                    self.close_connection = True
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def headers(self, path):
+        return [headers for p, headers in self.requests if p == path]
+
+
+@pytest.fixture
+def server():
+    stub = StubServer()
+    stub.thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+def test_download_then_not_modified(server, tmp_path):
+    server.files["/jar"] = b"ja_kodas|ja_pavadinimas\n1|A\n"
+    path = str(tmp_path / "JAR.csv")
+
+    result, state = download_file(server.url("/jar"), path, "JAR")
+    assert result == "changed"
+    assert open(path, "rb").read() == server.files["/jar"]
+    assert state["sha256"] == hashlib.sha256(server.files["/jar"]).hexdigest()
+
+    result, same_state = download_file(server.url("/jar"), path, "JAR", state)
+    assert result == "unchanged"
+    assert same_state == state
+    assert server.headers("/jar")[-1]["If-None-Match"] == state["etag"]
+
+
+def test_interrupted_download_resumes_with_range(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "download_chunk_kb", 1)
+    body = bytes(range(256)) * 40
+    server.files["/jar"] = body
+    server.truncate["/jar"] = 4096
+    path = str(tmp_path / "JAR.csv")
+
+    result, state = download_file(server.url("/jar"), path, "JAR")
+    assert result is None
+    assert not os.path.exists(path)
+    assert os.path.getsize(path + ".part") == 4096
+
+    result, state = download_file(server.url("/jar"), path, "JAR")
+    assert result == "changed"
+    assert server.headers("/jar")[-1]["Range"] == "bytes=4096-"
+    assert open(path, "rb").read() == body
+    assert state["sha256"] == hashlib.sha256(body).hexdigest()
+    assert not os.path.exists(path + ".part")
+
+
+def _use_server(engine, server):
+    with Session(engine) as session:
+        for key in ("jar", "pvm", "capital"):
+            session.merge(Setting(key=f"{key}_url", value=server.url(f"/{key}")))
+        session.commit()
+
+
+def _serve_sources(server, companies):
+    write_sources(companies, pvm={companies[0]["code"]: "LT100000000016"}, capital={})
+    for key, path in (
+        ("jar", registry_importer.JAR_PATH),
+        ("pvm", registry_importer.PVM_PATH),
+        ("capital", registry_importer.CAPITAL_PATH),
+    ):
+        with open(path, "rb") as f:
+            server.files[f"/{key}"] = f.read()
+
+
+def test_failed_processing_is_retried_on_next_run(db, server, monkeypatch):
+    _use_server(db, server)
+    _serve_sources(server, [company(100000000 + i) for i in range(10)])
+    first = run_full_import(incremental=False)
+    assert first is not None
+    jar_state = load_source_state("jar")
+
+    # Новый JAR намного меньше активного поколения — публикация отклоняется
+    _serve_sources(server, [company(100000001)])
+    assert run_full_import(incremental=False) is None
+    assert load_source_state("jar") == jar_state
+
+    # Следующий запуск не получает 304 по непринятому файлу и обрабатывает его снова
+    monkeypatch.setattr(settings, "generation_min_row_ratio", 0)
+    retried = run_full_import(incremental=False)
+    assert retried is not None and retried != first
+    assert load_source_state("jar")["sha256"] == hashlib.sha256(server.files["/jar"]).hexdigest()
+
+    # После успешной публикации всё совпадает — обработка пропускается
+    assert run_full_import(incremental=False) is None
+    assert server.headers("/jar")[-1]["If-None-Match"] == load_source_state("jar")["etag"]
+
+
+def test_side_table_parse_error_is_reraised():
+    # Разбор НДС запускается из done-callback скачивания: ошибка разбора не должна теряться
+    def broken_pvm(path):
+        raise ValueError("PVM.csv is broken")
+
+    side = SideTables(StageTimer())
+    download = Future()
+    download.add_done_callback(lambda f: side.submit("pvm", broken_pvm, "PVM.csv"))
+    download.set_result(("skipped", None))
+    side.submit("capital", lambda path: {}, "CAPITAL.csv")
+
+    with pytest.raises(ValueError, match="PVM.csv is broken"):
+        side.maps()
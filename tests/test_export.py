@@ -0,0 +1,47 @@
+# company-registry-lt/tests/test_export.py
+"""Потоковая выгрузка /api/v1/export."""
+import csv
+import gzip
+import io
+import json
+
+from sqlalchemy import text
+
+from conftest import company, run_import
+
+COMPANIES = [
+    company(100000001, name='UAB "Žalgiris"'),
+    company(100000002, name='MB "Ąžuolas"', legal_form_code=950),
+    company(100000003, name='UAB "Žalgirio sporto klubas"', status_code=10),
+]
+
+
+def _ndjson(response):
+    assert response.status_code == 200
+    return [json.loads(line) for line in gzip.decompress(response.content).decode("utf-8").splitlines()]
+
+
+def test_csv_export_has_header_and_all_rows(client):
+    run_import(COMPANIES)
+
+    response = client.get("/api/v1/export")
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.content).decode("utf-8"))))
+    assert [r["code"] for r in rows] == ["100000001", "100000002", "100000003"]
+    assert rows[1]["legal_form_name"] == "Mažoji bendrija"
+
+
+def test_export_filters_match_company_list(client):
+    run_import(COMPANIES)
+
+    rows = _ndjson(client.get("/api/v1/export", params={"format": "ndjson", "q": "zalgir", "status_code": 10}))
+    assert [r["code"] for r in rows] == ["100000003"]
+
+
+def test_text_filter_without_fts_index_falls_back_to_like(client, db):
+    run_import(COMPANIES)
+    # База до первого импорта с FTS
+    with db.begin() as conn:
+        conn.execute(text("DROP TABLE companies_fts"))
+
+    rows = _ndjson(client.get("/api/v1/export", params={"format": "ndjson", "q": "Žalgir"}))
+    assert [r["code"] for r in rows] == ["100000001", "100000003"]
@@ -0,0 +1,91 @@
+# company-registry-lt/tests/test_generations.py
+"""Поколения данных: публикация, отказ в публикации, откат."""
+import pytest
+from sqlalchemy import select, text
+
+from app.core.config import settings
+from app.models.generation import DataGeneration
+from app.services.generations import (
+    GenerationError, get_active_generation, rollback_generation, start_generation, validate_generation,
+)
+from conftest import company, run_import
+
+
+def _generations(engine):
+    with engine.connect() as conn:
+        return conn.execute(
+            select(DataGeneration.id, DataGeneration.status, DataGeneration.mode, DataGeneration.row_count)
+            .order_by(DataGeneration.id)
+        ).all()
+
+
+def _codes(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT code FROM companies ORDER BY code")).scalars().all()
+
+
+def test_first_import_does_not_register_empty_legacy_table(db):
+    generation_id = run_import([company(100000001), company(100000002)])
+
+    assert get_active_generation(db).id == generation_id
+    assert [(g.status, g.mode, g.row_count) for g in _generations(db)] == [("active", "full", 2)]
+    assert _codes(db) == ["100000001", "100000002"]
+
+
+def test_legacy_table_with_rows_is_kept_for_rollback(db):
+    with db.begin() as conn:
+        conn.execute(text("INSERT INTO companies (code, name) VALUES ('100000009', 'Sena')"))
+
+    run_import([company(100000001)])
+    legacy = _generations(db)[0]
+    assert (legacy.status, legacy.mode, legacy.row_count) == ("retired", "legacy", 1)
+
+    assert rollback_generation(db) == legacy.id
+    assert _codes(db) == ["100000009"]
+
+
+def test_publish_swaps_tables_and_rollback_restores_previous(db):
+    first = run_import([company(100000001), company(100000002)])
+    second = run_import([company(100000001), company(100000003)], incremental=False)
+
+    assert get_active_generation(db).id == second
+    assert _codes(db) == ["100000001", "100000003"]
+
+    assert rollback_generation(db) == first
+    assert _codes(db) == ["100000001", "100000002"]
+    statuses = {g.id: g.status for g in _generations(db)}
+    assert statuses == {first: "active", second: "retired"}
+
+
+def test_rollback_never_picks_empty_generation(db, monkeypatch):
+    monkeypatch.setattr(settings, "incremental_max_change_ratio", 1.0)
+    # Поколение, зарегистрированное старой версией для пустой таблицы новой базы
+    with db.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO data_generations (id, storage_id, status, mode, row_count, created_at) "
+            "VALUES (1, 1, 'retired', 'legacy', 0, CURRENT_TIMESTAMP)"
+        ))
+    run_import([company(100000001), company(100000002)])
+    run_import([company(100000001), company(100000002), company(100000003)], incremental=True)
+
+    # Полное поколение заменено инкрементальным (superseded), откатываться некуда
+    assert rollback_generation(db) is None
+    assert _codes(db) == ["100000001", "100000002", "100000003"]
+
+
+def test_validation_rejects_generation_much_smaller_than_active(db):
+    run_import([company(100000000 + i) for i in range(10)])
+
+    generation_id = start_generation(db)
+    with db.begin() as conn:
+        conn.execute(text(f'CREATE TABLE "companies_{generation_id}" AS SELECT * FROM companies LIMIT 2'))
+    with pytest.raises(GenerationError):
+        validate_generation(db, generation_id, expected_rows=2)
+
+
+def test_rejected_import_keeps_active_generation(db):
+    first = run_import([company(100000000 + i) for i in range(10)])
+
+    assert run_import([company(100000001)]) is None
+    assert get_active_generation(db).id == first
+    assert len(_codes(db)) == 10
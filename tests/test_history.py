@@ -0,0 +1,120 @@
+# company-registry-lt/tests/test_history.py
+"""История компаний: интервалы версий [valid_from, valid_to) и запросы на дату."""
+from datetime import date
+
+import pytest
+
+from app.services import generations, history
+from conftest import company, run_import
+
+
+@pytest.fixture
+def import_day(monkeypatch):
+    """Дата импорта для истории: import_day("2026-01-10")."""
+    def set_day(value):
+        day = date.fromisoformat(value)
+
+        class ImportDate(date):
+            @classmethod
+            def today(cls):
+                return day
+
+        monkeypatch.setattr(history, "date", ImportDate)
+    return set_day
+
+
+def _versions(client, code):
+    response = client.get(f"/api/v1/company/{code}/history")
+    if response.status_code == 404:
+        return []
+    return [(v["name"], v["valid_from"], v["valid_to"]) for v in response.json()["versions"]]
+
+
+def test_change_closes_version_and_opens_new_one(client, import_day):
+    import_day("2026-01-10")
+    run_import([company(100000001, name="UAB Senas"), company(100000002)])
+    import_day("2026-02-01")
+    run_import([company(100000001, name="UAB Naujas"), company(100000003)])
+
+    assert _versions(client, "100000001") == [
+        ("UAB Senas", "2026-01-10", "2026-02-01"),
+        ("UAB Naujas", "2026-02-01", None),
+    ]
+    # Удалённая компания: версия закрыта датой импорта; новая — открыта
+    assert _versions(client, "100000002")[0][1:] == ("2026-01-10", "2026-02-01")
+    assert _versions(client, "100000003")[0][1:] == ("2026-02-01", None)
+
+
+def test_incremental_import_records_same_intervals(client, import_day):
+    import_day("2026-01-10")
+    base = [company(100000000 + i) for i in range(10)]
+    run_import(base)
+    import_day("2026-03-01")
+    base[4] = company(100000004, name="UAB Kitas")
+    run_import(base, incremental=True)
+
+    assert _versions(client, "100000004") == [
+        ('UAB "Įmonė 100000004"', "2026-01-10", "2026-03-01"),
+        ("UAB Kitas", "2026-03-01", None),
+    ]
+    assert _versions(client, "100000005") == [('UAB "Įmonė 100000005"', "2026-01-10", None)]
+
+
+def test_same_day_changes_leave_no_empty_interval(client, import_day):
+    import_day("2026-01-10")
+    run_import([company(100000001, name="UAB Pirmas")])
+    import_day("2026-02-01")
+    run_import([company(100000001, name="UAB Antras")])
+    run_import([company(100000001, name="UAB Trecias")])
+
+    assert _versions(client, "100000001") == [
+        ("UAB Pirmas", "2026-01-10", "2026-02-01"),
+        ("UAB Trecias", "2026-02-01", None),
+    ]
+
+
+def test_extract_date_alone_does_not_create_version(client, import_day):
+    import_day("2026-01-10")
+    run_import([company(100000001)])
+    import_day("2026-02-01")
+    run_import([company(100000001, data_updated_at="2026-01-31")])
+
+    assert len(_versions(client, "100000001")) == 1
+
+
+def test_as_of_returns_version_valid_on_that_day(client, import_day):
+    import_day("2026-01-10")
+    run_import([company(100000001, name="UAB Senas")])
+    import_day("2026-02-01")
+    run_import([company(100000001, name="UAB Naujas")])
+
+    def name_on(day):
+        response = client.get("/api/v1/company/100000001", params={"as_of": day})
+        return response.json()["name"] if response.status_code == 200 else response.status_code
+
+    assert name_on("2026-01-31") == "UAB Senas"
+    assert name_on("2026-02-01") == "UAB Naujas"
+    assert name_on("2025-12-31") == 404
+
+
+def test_history_is_visible_when_generation_switches(client, import_day, monkeypatch):
+    # Ответы, закэшированные под ETag нового поколения, уже должны содержать его версии
+    seen = []
+
+    def on_switch(generation_id):
+        as_of = client.get("/api/v1/company/100000001", params={"as_of": "2026-02-01"})
+        seen.append((
+            _versions(client, "100000001")[-1],
+            as_of.json()["name"] if as_of.status_code == 200 else as_of.status_code,
+        ))
+
+    monkeypatch.setattr(generations, "_listeners", [on_switch])
+    import_day("2026-01-10")
+    run_import([company(100000001, name="UAB Senas")])
+    import_day("2026-02-01")
+    run_import([company(100000001, name="UAB Naujas")])
+
+    assert seen == [
+        (("UAB Senas", "2026-01-10", None), "UAB Senas"),
+        (("UAB Naujas", "2026-02-01", None), "UAB Naujas"),
+    ]
@@ -0,0 +1,106 @@
+# company-registry-lt/tests/test_http_cache.py
+"""ETag / Last-Modified / 304 по поколению данных."""
+from datetime import timedelta
+from email.utils import format_datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.cache import company_cache
+from app.core.http_cache import validators
+from app.services.generations import get_active_generation
+from conftest import company, run_import
+
+URL = "/api/v1/company/100000001"
+
+
+def _publish(db, companies):
+    """Импорт и то, что делают слушатели смены поколения в приложении."""
+    run_import(companies)
+    active = get_active_generation(db)
+    company_cache.set_generation(active.id)
+    validators.set_generation(active.id, active.published_at)
+    return active
+
+
+def test_etag_carries_generation_and_repeat_is_304(client, db):
+    active = _publish(db, [company(100000001)])
+
+    first = client.get(URL)
+    etag = first.headers["etag"]
+    assert etag.startswith(f'"gen-{active.id}-')
+    assert first.headers["last-modified"]
+    assert first.headers["cache-control"].startswith("public, ")
+
+    again = client.get(URL, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+    # Слабый ETag и список тегов сравниваются так же
+    assert client.get(URL, headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+
+def test_new_generation_keeps_304_for_unchanged_body(client, db):
+    _publish(db, [company(100000001), company(100000002)])
+    etag = client.get(URL).headers["etag"]
+    other_etag = client.get("/api/v1/company/100000002").headers["etag"]
+
+    active = _publish(db, [company(100000001), company(100000002, name="UAB Kitas")])
+
+    # Тело то же — 304 с ETag уже нового поколения
+    unchanged = client.get(URL, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"].startswith(f'"gen-{active.id}-')
+    assert unchanged.headers["etag"].endswith(etag.rsplit("-", 1)[1])
+    # Компания изменилась — новое тело
+    changed = client.get("/api/v1/company/100000002", headers={"If-None-Match": other_etag})
+    assert changed.status_code == 200
+    assert changed.json()["name"] == "UAB Kitas"
+
+
+def test_if_modified_since(client, db):
+    active = _publish(db, [company(100000001)])
+    published = active.published_at.astimezone()
+
+    later = format_datetime(published + timedelta(seconds=5), usegmt=False)
+    earlier = format_datetime(published - timedelta(hours=1), usegmt=False)
+    assert client.get(URL, headers={"If-Modified-Since": later}).status_code == 304
+    assert client.get(URL, headers={"If-Modified-Since": earlier}).status_code == 200
+    # If-None-Match важнее даты
+    response = client.get(URL, headers={"If-Modified-Since": later, "If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+
+def test_no_validators_without_generation(client, db):
+    run_import([company(100000001)])
+
+    response = client.get(URL)
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert client.get(URL, headers={"If-None-Match": "*"}).status_code == 200
+
+
+@pytest.fixture
+def web_client(db):
+    from app.web.views import router as web_router
+
+    app = FastAPI()
+    app.include_router(web_router)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_language_choice_is_saved_on_conditional_request(web_client, db):
+    _publish(db, [company(100000001)])
+    etag = web_client.get("/", headers={"Accept-Language": "lt"}).headers["etag"]
+
+    # Копия клиента актуальна, но ?lang= всё равно должен сохранить выбор в cookie
+    response = web_client.get("/", params={"lang": "lt"}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert "company_registry_lang=lt" in response.headers["set-cookie"]
+    assert response.headers["cache-control"].startswith("private, ")
+    # Без ?lang= — обычный 304 без cookie
+    again = web_client.get("/", headers={"Accept-Language": "lt", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert "set-cookie" not in again.headers
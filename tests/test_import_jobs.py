@@ -0,0 +1,98 @@
+# company-registry-lt/tests/test_import_jobs.py
+"""Задания импорта: блокировка «одно за раз», зависшие задания, отмена."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.db import jobs_engine
+from app.models.job import ImportJob
+from app.services.import_jobs import (
+    ImportJobBusy, create_job, finish_job, get_job, mark_running, report_progress, request_cancel,
+)
+from app.services.import_worker import JobProgress
+from app.services.pipeline import ImportCancelled
+
+
+def _set(job_id, **values):
+    with jobs_engine.begin() as conn:
+        conn.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+
+
+def test_second_job_is_rejected_while_first_is_active(db):
+    job_id = create_job({"incremental": True}, "api")
+
+    with pytest.raises(ImportJobBusy) as busy:
+        create_job({}, "scheduler")
+    assert busy.value.job_id == job_id
+
+    finish_job(job_id, "succeeded", generation_id=7)
+    job = get_job(job_id)
+    assert (job.status, job.lock, job.generation_id) == ("succeeded", None, 7)
+    assert create_job({}, "scheduler") != job_id
+
+
+def test_job_without_heartbeat_is_released(db):
+    job_id = create_job({}, "api")
+    assert mark_running(job_id, pid=12345) == {}
+    _set(job_id, heartbeat_at=datetime.now() - timedelta(seconds=settings.import_job_stale_sec + 1))
+
+    new_id = create_job({}, "api")
+
+    job = get_job(job_id)
+    assert (job.status, job.lock) == ("failed", None)
+    assert get_job(new_id).status == "queued"
+    # Воркер снятого задания узнаёт об этом с ближайшим heartbeat и останавливается
+    assert report_progress(job_id, "write", 100, None) is True
+    finish_job(job_id, "cancelled")
+    assert get_job(job_id).status == "failed"
+
+
+def test_fresh_heartbeat_keeps_lock_whatever_the_pid(db):
+    # pid из другого контейнера (или уже переиспользованный) ничего не говорит о воркере
+    job_id = create_job({}, "api")
+    mark_running(job_id, pid=2 ** 22 + 1)
+    report_progress(job_id, "write", 10, None)
+
+    with pytest.raises(ImportJobBusy):
+        create_job({}, "api")
+    assert get_job(job_id).status == "running"
+
+
+def test_queued_job_cancelled_before_start(db):
+    job_id = create_job({}, "api")
+
+    assert request_cancel(job_id) == "queued"
+    assert mark_running(job_id, pid=1) is None
+    job = get_job(job_id)
+    assert (job.status, job.lock) == ("cancelled", None)
+
+
+def test_running_job_cancel_flow(db, client):
+    job_id = create_job({"download_jar": False}, "api")
+    assert mark_running(job_id, pid=1) == {"download_jar": False}
+    assert report_progress(job_id, "write", 10, 5.0) is False
+
+    response = client.post(f"/api/v1/import/jobs/{job_id}/cancel")
+    assert response.status_code == 200
+    assert response.json()["cancel_requested"] is True
+    assert report_progress(job_id, "write", 20, 5.0) is True
+
+    finish_job(job_id, "cancelled", stage="write", rows_processed=20)
+    assert client.post(f"/api/v1/import/jobs/{job_id}/cancel").status_code == 409
+    assert client.post("/api/v1/import/jobs/999/cancel").status_code == 404
+    assert create_job({}, "api") != job_id
+
+
+def test_worker_stops_between_chunks_but_not_while_publishing():
+    progress = JobProgress()
+    progress.stage("write")
+    progress.cancel_requested = True
+
+    with pytest.raises(ImportCancelled):
+        progress.rows(100)
+
+    progress.stage("publish")
+    progress.rows(100)
+    progress.stage("snapshot")
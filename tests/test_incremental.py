@@ -0,0 +1,80 @@
+# company-registry-lt/tests/test_incremental.py
+"""Инкрементальный импорт: сравнение по хэшам строк и применение только изменений."""
+from sqlalchemy import select, text
+
+from app.models.generation import DataGeneration
+from app.services.generations import get_active_generation
+from conftest import company, run_import
+
+BASE = [company(100000000 + i) for i in range(20)]
+
+
+def _generation(engine, generation_id):
+    with engine.connect() as conn:
+        return conn.execute(select(DataGeneration).where(DataGeneration.id == generation_id)).first()
+
+
+def test_incremental_counts_inserted_updated_deleted(db):
+    base_id = run_import(BASE)
+
+    changed = [c for c in BASE if c["code"] != "100000005"]
+    changed[0] = company(100000000, name='UAB "Pervadinta"')
+    changed.append(company(100000099))
+    generation_id = run_import(changed, incremental=True)
+
+    generation = _generation(db, generation_id)
+    assert generation.mode == "incremental"
+    assert (generation.rows_inserted, generation.rows_updated, generation.rows_deleted) == (1, 1, 1)
+    assert generation.row_count == 20
+    assert _generation(db, base_id).status == "superseded"
+
+    with db.connect() as conn:
+        assert conn.execute(text("SELECT name FROM companies WHERE code = '100000000'")).scalar() == 'UAB "Pervadinta"'
+        assert conn.execute(text("SELECT COUNT(*) FROM companies WHERE code = '100000005'")).scalar() == 0
+        # FTS-индекс обновлён вместе со строками
+        found = conn.execute(text(
+            "SELECT companies.code FROM companies_fts JOIN companies ON companies.rowid = companies_fts.rowid "
+            "WHERE companies_fts MATCH '\"pervadinta\"'"
+        )).scalars().all()
+    assert found == ["100000000"]
+
+
+def test_enrichment_change_counts_as_update(db):
+    run_import(BASE)
+    generation_id = run_import(BASE, incremental=True, capital={"100000003": "2500,50"})
+
+    generation = _generation(db, generation_id)
+    assert (generation.rows_inserted, generation.rows_updated, generation.rows_deleted) == (0, 1, 0)
+
+
+def test_no_changes_keeps_active_generation(db):
+    base_id = run_import(BASE)
+
+    assert run_import(BASE, incremental=True) is None
+    assert get_active_generation(db).id == base_id
+
+
+def test_too_many_changes_fall_back_to_full_build(db):
+    run_import(BASE)
+    generation_id = run_import([company(200000000 + i) for i in range(20)], incremental=True)
+
+    assert _generation(db, generation_id).mode == "full"
+
+
+def test_duplicate_code_across_chunks_last_row_wins(db):
+    # Куски по 4 строки: первая и последняя строки с кодом 110000001 попадают в разные куски
+    rows = [company(110000001, name="UAB Old name")] + BASE + [company(110000001, name="UAB New name")]
+    base_id = run_import(rows)
+
+    def name():
+        with db.connect() as conn:
+            return conn.execute(text("SELECT name FROM companies WHERE code = '110000001'")).scalar()
+
+    assert name() == "UAB New name"
+    for _ in range(3):
+        assert run_import(rows, incremental=True) is None
+        assert name() == "UAB New name"
+    assert get_active_generation(db).id == base_id
+    with db.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM company_history WHERE code = '110000001'")).scalar() == 1
+        assert conn.execute(text("SELECT COUNT(*) FROM company_changes WHERE change = 'modified'")).scalar() == 0
@@ -0,0 +1,96 @@
+# company-registry-lt/tests/test_schema.py
+"""Версия схемы (PRAGMA user_version): одновременный старт воркеров и обновление старой базы."""
+import threading
+import time
+
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine
+
+from app.core.db import configure_sqlite, ensure_schema, explicit_transactions
+from app.core.dictionaries import code_names
+from app.services.schema import init_schema
+from conftest import _drop_all
+
+
+def _engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    configure_sqlite(engine, "api")
+    explicit_transactions(engine)
+    return engine
+
+
+def test_concurrent_workers_update_schema_once(tmp_path):
+    metadata = MetaData()
+    Table("items", metadata, Column("id", Integer, primary_key=True))
+    migrations = []
+
+    def migrate(conn):
+        migrations.append(threading.current_thread().name)
+        # Второй воркер успевает прочитать старую версию и дойти до перепроверки
+        time.sleep(0.5)
+
+    engines = [_engine(tmp_path / "registry.db") for _ in range(2)]
+    results, errors = {}, []
+
+    def worker(index):
+        try:
+            results[index] = ensure_schema(engines[index], metadata, migrate)
+        except Exception as e:
+            errors.append(e)
+
+    first = threading.Thread(target=worker, args=(0,), name="first")
+    second = threading.Thread(target=worker, args=(1,), name="second")
+    first.start()
+    time.sleep(0.1)
+    second.start()
+    first.join()
+    second.join()
+
+    assert errors == []
+    assert sorted(results.values()) == [False, True]
+    assert migrations == ["first"]
+    assert ensure_schema(engines[1], metadata, migrate) is False
+    for engine in engines:
+        engine.dispose()
+
+
+BASELINE_COMPANIES = """
+CREATE TABLE companies (
+    code VARCHAR NOT NULL PRIMARY KEY, name VARCHAR NOT NULL, address TEXT,
+    registration_date DATE, legal_form_code INTEGER, legal_form_name VARCHAR,
+    status_code INTEGER, status_name VARCHAR, status_date_from DATE, data_updated_at DATE,
+    pvm_code VARCHAR, pvm_date DATE, authorized_capital NUMERIC(12, 2), capital_currency VARCHAR(3)
+)
+"""
+
+
+def test_upgrade_fills_dictionaries_from_company_rows(db, client):
+    # База исходной версии: названия формы и статуса хранятся в каждой строке
+    _drop_all(db)
+    with db.begin() as conn:
+        conn.exec_driver_sql(BASELINE_COMPANIES)
+        conn.exec_driver_sql(
+            "INSERT INTO companies (code, name, legal_form_code, legal_form_name, status_code, status_name) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                ("100000001", 'UAB "Senas"', 310, "Uždaroji akcinė bendrovė", 0, "Teisinis statusas neįregistruotas"),
+                ("100000002", 'MB "Ąžuolas"', 950, "Mažoji bendrija", 10, "Likviduojama"),
+                ("100000003", 'MB "Beržas"', 950, "Mažoji bendrija", None, None),
+            ],
+        )
+
+    assert init_schema() is True
+
+    with db.connect() as conn:
+        assert conn.exec_driver_sql("SELECT code, name FROM legal_forms ORDER BY code").all() == [
+            (310, "Uždaroji akcinė bendrovė"), (950, "Mažoji bendrija"),
+        ]
+        assert conn.exec_driver_sql("SELECT code, name FROM statuses ORDER BY code").all() == [
+            (0, "Teisinis statusas neįregistruotas"), (10, "Likviduojama"),
+        ]
+    code_names.load(db)
+    items = client.get("/api/v1/companies").json()["items"]
+    assert [(c["legal_form_name"], c["status_name"]) for c in items] == [
+        ("Uždaroji akcinė bendrovė", "Teisinis statusas neįregistruotas"),
+        ("Mažoji bendrija", "Likviduojama"),
+        ("Mažoji bendrija", None),
+    ]
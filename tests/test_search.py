@@ -0,0 +1,80 @@
+# company-registry-lt/tests/test_search.py
+"""Поиск: нормализация текста и запросы из одной правовой формы."""
+import anyio
+import pandas as pd
+import pytest
+
+from app.core.db import ReadSessionLocal
+from app.services.search import (
+    build_match_query, legal_form_only, normalize_series, normalize_text, search_companies,
+)
+from conftest import company, run_import
+
+COMPANIES = [
+    company(100000001, name='UAB "Žalgiris"'),
+    company(100000002, name='Akcinė bendrovė „Łódź AB Baltic“', legal_form_code=320),
+    company(100000003, name='VšĮ "Vilniaus VšĮ centras"', legal_form_code=950),
+    company(100000004, name='MB "Ąžuolas"', legal_form_code=950),
+]
+
+
+@pytest.mark.parametrize("value, strip, expected", [
+    ('UAB „Žalgiris-Łódź“', True, "zalgiris lodz"),
+    ("ŽALGIRIS, UAB", True, "zalgiris"),
+    ("VšĮ   Ąžuolas", True, "azuolas"),
+    ("Mėnulio g. 7, Vilnius", False, "menulio g 7 vilnius"),
+    ("UAB", True, "uab"),
+    ("UAB AB", True, "ab"),
+    (None, True, None),
+])
+def test_normalize_text(value, strip, expected):
+    assert normalize_text(value, strip_legal_form=strip) == expected
+
+
+def test_normalize_series_matches_normalize_text():
+    values = ['UAB „Žalgiris-Łódź“', "ŽALGIRIS, UAB", "VšĮ   Ąžuolas", "Straße æ", "UAB"]
+    series = normalize_series(pd.Series(values, dtype="string[pyarrow]"), strip_legal_form=True)
+    assert series.tolist() == [normalize_text(v, strip_legal_form=True) for v in values]
+
+
+def test_match_query_drops_legal_form():
+    assert build_match_query("UAB Žalg vilni") == '"zalg"* "vilni"*'
+    assert build_match_query("„Ąžuolas“, MB") == '"azuolas"*'
+
+
+@pytest.mark.parametrize("q, expected", [
+    ("UAB", True), ("VšĮ", True), ("uab, ab", True), ("UAB Žalgiris", False), ("Abra", False),
+])
+def test_legal_form_only(q, expected):
+    assert legal_form_only(q) is expected
+
+
+def _search(q):
+    async def run():
+        async with ReadSessionLocal() as session:
+            return [c.code for c in await search_companies(session, q)]
+    return anyio.run(run)
+
+
+def test_search_by_name_ignores_legal_form(db):
+    run_import(COMPANIES)
+
+    assert _search("UAB Žalgiris") == ["100000001"]
+    assert _search("zalgiris uab") == ["100000001"]
+    assert _search("lodz") == ["100000002"]
+
+
+def test_legal_form_only_query_searches_original_name(db, client):
+    # В индексе названия без правовой формы: «UAB» ищется по исходному названию
+    run_import(COMPANIES)
+
+    assert _search("UAB") == ["100000001"]
+    assert _search("VšĮ") == ["100000003"]
+    assert sorted(_search("AB")) == ["100000001", "100000002"]
+
+    def listed(q):
+        return [c["code"] for c in client.get("/api/v1/companies", params={"q": q}).json()["items"]]
+
+    assert listed("UAB") == ["100000001"]
+    assert listed("VšĮ") == ["100000003"]
+    assert listed("Žalgiris") == ["100000001"]
@@ -0,0 +1,66 @@
+# company-registry-lt/tests/test_stats.py
+"""Сводка company_stats: инкрементальный импорт вносит разницу, а не пересчитывает всё."""
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.services import registry_importer
+from app.services.generations import get_active_generation
+from app.services.stats import rebuild_stats
+from conftest import company, run_import
+
+BASE = [
+    company(100000000 + i, status_code=10 if i % 4 == 0 else 0,
+            legal_form_code=950 if i % 3 == 0 else 310, registration_date=f"{2000 + i % 5}-03-01")
+    for i in range(20)
+]
+CAPITAL = {c["code"]: 500 * (i + 1) ** 2 for i, c in enumerate(BASE)}
+
+
+def _stats(conn, table="company_stats"):
+    return sorted(
+        conn.execute(text(
+            f"SELECT legal_form_code, status_code, registration_year, capital_bracket, companies FROM {table}"
+        )).all(),
+        key=repr,
+    )
+
+
+def test_incremental_stats_equal_full_rebuild(db, monkeypatch):
+    monkeypatch.setattr(settings, "incremental_max_change_ratio", 1.0)
+    run_import(BASE, capital=CAPITAL)
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("инкрементальный импорт не должен пересчитывать сводку целиком")
+
+    monkeypatch.setattr(registry_importer, "rebuild_stats", no_rebuild)
+    changed = [c for c in BASE if c["code"] not in ("100000003", "100000008")]
+    # Смена статуса и формы переносит компанию в другие группы; новый год — новая группа
+    changed[0] = dict(changed[0], status_code=0)
+    changed[1] = dict(changed[1], legal_form_code=950, registration_date="1995-01-01")
+    changed.append(company(100000099, registration_date="2026-01-01"))
+    capital = dict(CAPITAL, **{"100000002": 5_000_000, "100000099": 10})
+    run_import(changed, incremental=True, capital=capital)
+    assert get_active_generation(db).mode == "incremental"
+
+    with db.begin() as conn:
+        incremental = _stats(conn)
+        assert sum(row.companies for row in incremental) == len(changed)
+        conn.execute(text("CREATE TEMP TABLE expected_stats AS SELECT * FROM company_stats WHERE 0"))
+        rebuild_stats(conn, target="expected_stats")
+        assert incremental == _stats(conn, "expected_stats")
+        # Опустевшие группы удалены, а не оставлены с нулём
+        assert conn.execute(text("SELECT COUNT(*) FROM company_stats WHERE companies <= 0")).scalar() == 0
+
+
+def test_stats_api_after_incremental_import(client, monkeypatch):
+    monkeypatch.setattr(settings, "incremental_max_change_ratio", 1.0)
+    run_import(BASE)
+    run_import(BASE[:-2] + [company(100000099, status_code=10)], incremental=True)
+
+    body = client.get("/api/v1/stats", params={"group_by": "status"}).json()
+    counts = {g["status_code"]: g["companies"] for g in body["groups"]}
+    expected = {0: 0, 10: 1}
+    for c in BASE[:-2]:
+        expected[c["status_code"]] += 1
+    assert counts == expected
+    assert body["total"] == 19
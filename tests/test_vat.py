@@ -0,0 +1,55 @@
+# company-registry-lt/tests/test_vat.py
+"""Коды НДС Литвы: нормализация, формат и контрольная цифра, поиск в реестре."""
+import pytest
+
+from app.core.vat import normalize_pvm, validate_lt_vat
+from conftest import company, run_import
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("LT100001919017", "100001919017"),
+    ("lt 1000 0191 9017", "100001919017"),
+    ("LT-119511515", "119511515"),
+    ("119511515", "119511515"),
+    ("", None),
+    (None, None),
+    ("LT", None),
+])
+def test_normalize_pvm(value, expected):
+    assert normalize_pvm(value) == expected
+
+
+@pytest.mark.parametrize("value", [
+    "119511515",          # юридическое лицо, 9 цифр
+    "LT 100001919017",    # временный плательщик, 12 цифр
+    "100004801610",       # контрольная цифра со второго прохода (остаток 10)
+])
+def test_valid_check_digits(value):
+    assert validate_lt_vat(value)[1] is None
+
+
+@pytest.mark.parametrize("value, error", [
+    ("100001919018", "неверная контрольная цифра"),
+    ("119511516", "неверная контрольная цифра"),
+    ("119511525", "неверный формат кода НДС"),
+    ("LT11951151", "код НДС должен содержать 9 или 12 цифр"),
+    ("LT1195115A5", "код НДС должен состоять из цифр (с префиксом LT или без)"),
+])
+def test_invalid_codes(value, error):
+    assert validate_lt_vat(value)[1] == error
+
+
+def test_validate_endpoint_checks_registry(client):
+    run_import([company(100000001), company(100000002)], pvm={"100000002": "LT100001919017"})
+
+    registered = client.get("/api/v1/pvm/validate/lt%201000%200191%209017").json()
+    assert registered == {
+        "pvm_code": "lt 1000 0191 9017", "normalized": "100001919017", "valid": True,
+        "error": None, "registered": True, "company_code": "100000002",
+    }
+
+    unknown = client.get("/api/v1/pvm/validate/119511515").json()
+    assert (unknown["valid"], unknown["registered"]) == (True, False)
+
+    invalid = client.get("/api/v1/pvm/validate/100001919018").json()
+    assert (invalid["valid"], invalid["registered"]) == (False, None)